@@ -6,12 +6,27 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import numpy as np
+import io
+import time
 from utils import get_color_scale, display_metric_card, animated_progress_bar
-from data_processor import load_data, filter_data_by_date, calculate_statistics, calculate_resource_efficiency
+from data_processor import load_data_and_aggregates, filter_data_by_date, calculate_statistics, calculate_resource_efficiency
 from recommendation_engine import generate_recommendations, calculate_potential_savings, calculate_environmental_impact
 from eco_impact import calculate_regional_comparison, get_eco_impact_score, get_impact_recommendations, get_all_regions
+from export import export_metrics, parquet_available
+from forecasting import get_forecast
+from quantile_sketch import SKETCH_METRICS, get_range_quantiles
+from scenario_simulator import DEFAULT_RANGES, sample_scenarios, summarize_distribution, sensitivity_table
+from precompute import start_precompute_worker, get_precomputed
+from charts import TIME_SERIES_METRICS, build_time_series_figure, chart_data_key
+from storage_backends import get_backend
+from live_tail import LIVE_REFRESH_SECONDS, LIVE_TAIL_SIZE, poll_live_tail
+from correlation import DEFAULT_WINDOW, DEFAULT_MAX_LAG, lagged_correlation_heatmap, pair_correlation_heatmap, lag_profile
+from instrumentation import start_exporter, observe
+from section_scheduler import SectionScheduler
 import db
 
+rerun_started = time.perf_counter()
+
 st.set_page_config(
     page_title="Agricultural Sustainability Dashboard",
     page_icon=None,
@@ -20,7 +35,10 @@ st.set_page_config(
 )
 
 if 'data' not in st.session_state:
-    st.session_state.data = load_data()
+    st.session_state.data, st.session_state.aggregates = load_data_and_aggregates()
+
+start_precompute_worker()
+start_exporter()
 
 st.markdown("""
 <div style="background-color:#e8f5e9; padding:10px; border-radius:10px; margin-bottom:10px">
@@ -75,6 +93,15 @@ selected_region = st.sidebar.selectbox(
     help="Choose a region to compare your resource usage against regional averages"
 )
 
+st.sidebar.markdown("---")
+st.sidebar.markdown("### Live Mode")
+live_mode = st.sidebar.toggle(
+    "Follow new readings",
+    value=False,
+    help=f"Refresh the metric cards and a chart of the latest {LIVE_TAIL_SIZE} readings without reloading the page"
+)
+live_interval = st.sidebar.number_input("Refresh every (seconds)", min_value=1, max_value=300, value=LIVE_REFRESH_SECONDS, disabled=not live_mode)
+
 st.sidebar.markdown("---")
 st.sidebar.markdown("### Add New Measurements")
 
@@ -83,13 +110,13 @@ with st.sidebar.form("new_measurements_form"):
     
     col1, col2 = st.columns(2)
     with col1:
-        new_temperature = st.number_input("Temperature (°C)", min_value=-10.0, max_value=50.0, value=22.0, step=0.1)
-        new_humidity = st.number_input("Humidity (%)", min_value=0.0, max_value=100.0, value=60.0, step=0.1)
-        new_soil_moisture = st.number_input("Soil Moisture (%)", min_value=0.0, max_value=100.0, value=70.0, step=0.1)
+        new_temperature = st.number_input("Temperature (°C)", min_value=db.METRIC_RANGES['temperature'][0], max_value=db.METRIC_RANGES['temperature'][1], value=22.0, step=0.1)
+        new_humidity = st.number_input("Humidity (%)", min_value=db.METRIC_RANGES['humidity'][0], max_value=db.METRIC_RANGES['humidity'][1], value=60.0, step=0.1)
+        new_soil_moisture = st.number_input("Soil Moisture (%)", min_value=db.METRIC_RANGES['soil_moisture'][0], max_value=db.METRIC_RANGES['soil_moisture'][1], value=70.0, step=0.1)
     
     with col2:
-        new_water_usage = st.number_input("Water Usage (L)", min_value=0.0, max_value=100.0, value=10.0, step=0.1)
-        new_energy_consumption = st.number_input("Energy Consumption (kWh)", min_value=0.0, max_value=100.0, value=15.0, step=0.1)
+        new_water_usage = st.number_input("Water Usage (L)", min_value=db.METRIC_RANGES['water_usage'][0], max_value=db.METRIC_RANGES['water_usage'][1], value=10.0, step=0.1)
+        new_energy_consumption = st.number_input("Energy Consumption (kWh)", min_value=db.METRIC_RANGES['energy_consumption'][0], max_value=db.METRIC_RANGES['energy_consumption'][1], value=15.0, step=0.1)
     
     submit_button = st.form_submit_button("Submit Measurements", use_container_width=True)
     
@@ -103,14 +130,60 @@ with st.sidebar.form("new_measurements_form"):
         )
         
         if success:
-            st.session_state.data = load_data()
+            st.session_state.data, st.session_state.aggregates = load_data_and_aggregates()
             st.success("Measurements added successfully!")
             st.rerun()
         else:
             st.error("Failed to add measurements. Please try again.")
 
 filtered_data = filter_data_by_date(st.session_state.data, selected_start_date, selected_end_date)
-stats = calculate_statistics(filtered_data)
+
+# The quick-filter windows (and the untouched default range) are kept hot by the
+# background precompute worker; custom ranges are computed on demand below.
+precompute_days = {"Last 7 days": 7, "Last 3 months": 90, "All time": 365}.get(quick_filters)
+if quick_filters == "Last 30 days" and (selected_start_date, selected_end_date) == (start_date.date(), end_date.date()):
+    precompute_days = 30
+precomputed = get_precomputed(precompute_days, selected_region) if precompute_days else None
+
+# Every section's computation starts now on the shared pool; each section below
+# only waits for its own result, so the rerun is as slow as the slowest section.
+sections = SectionScheduler()
+# Water/energy/cost/CO₂ totals from the insert-time ledger (None without a database).
+sections.submit('ledger_totals', db.get_ledger_totals, selected_start_date, selected_end_date)
+
+# Whole-history results come precomputed with the snapshot.
+covers_all_data = len(filtered_data) == len(st.session_state.data)
+for name, key, compute in [('stats', 'statistics', calculate_statistics),
+                           ('efficiency', 'efficiency', calculate_resource_efficiency)]:
+    if precomputed:
+        sections.add_result(name, precomputed[key])
+    elif covers_all_data and key in st.session_state.aggregates:
+        sections.add_result(name, st.session_state.aggregates[key])
+    else:
+        sections.submit(name, compute, filtered_data)
+
+if precomputed:
+    for name in ['recommendations', 'savings', 'impact', 'regional_comparison']:
+        sections.add_result(name, precomputed[name])
+else:
+    sections.submit('forecast', get_forecast, st.session_state.data)
+    sections.submit('recommendations', generate_recommendations, filtered_data, depends_on=('stats', 'forecast'))
+    sections.submit('savings', calculate_potential_savings, filtered_data, depends_on=('ledger_totals',))
+    sections.submit('impact', calculate_environmental_impact, filtered_data, depends_on=('savings', 'ledger_totals'))
+    sections.submit('regional_comparison', calculate_regional_comparison, filtered_data, selected_region,
+                    depends_on=('ledger_totals',))
+
+# Long ranges are only readable at daily/weekly resolution, so let the analytics backend bucket them.
+# With SQLite, whole-day bounds keep the query identical across sessions and reruns,
+# so it is served from the shared query cache until new data arrives.
+resample_freq = {"Last 3 months": "D", "All time": "W"}.get(quick_filters)
+plot_data = filtered_data
+water_column, energy_column = 'water_usage', 'energy_consumption'
+if resample_freq:
+    resampled_data = get_backend().aggregate(selected_start_date.date(), selected_end_date.date(), freq=resample_freq, aggs=('mean', 'sum'))
+    if len(resampled_data) > 0:
+        plot_data = resampled_data
+        water_column, energy_column = 'water_usage_sum', 'energy_consumption_sum'
 
 st.markdown("""
 <div style="background-color:#e8f5e9; padding:10px; border-radius:10px; margin-bottom:10px; border-left:5px solid #2e7d32">
@@ -119,31 +192,69 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-col1, col2, col3 = st.columns(3)
-
-with col1:
-    display_metric_card(
-        "Temperature", 
-        f"{stats['current_temp']:.1f}°C", 
-        f"{stats['temp_change']:+.1f}°C from average",
-        stats['temp_status']
-    )
-
-with col2:
-    display_metric_card(
-        "Humidity", 
-        f"{stats['current_humidity']:.1f}%", 
-        f"{stats['humidity_change']:+.1f}% from average",
-        stats['humidity_status']
-    )
+def render_metric_cards(card_stats):
+    card_col1, card_col2, card_col3 = st.columns(3)
+    
+    with card_col1:
+        display_metric_card(
+            "Temperature", 
+            f"{card_stats['current_temp']:.1f}°C", 
+            f"{card_stats['temp_change']:+.1f}°C from average",
+            card_stats['temp_status']
+        )
+    
+    with card_col2:
+        display_metric_card(
+            "Humidity", 
+            f"{card_stats['current_humidity']:.1f}%", 
+            f"{card_stats['humidity_change']:+.1f}% from average",
+            card_stats['humidity_status']
+        )
+    
+    with card_col3:
+        display_metric_card(
+            "Soil Moisture", 
+            f"{card_stats['current_soil_moisture']:.1f}%", 
+            f"{card_stats['soil_moisture_change']:+.1f}% from average",
+            card_stats['soil_moisture_status']
+        )
 
-with col3:
-    display_metric_card(
-        "Soil Moisture", 
-        f"{stats['current_soil_moisture']:.1f}%", 
-        f"{stats['soil_moisture_change']:+.1f}% from average",
-        stats['soil_moisture_status']
-    )
+if live_mode:
+    # Only this fragment reruns on the timer; each tick fetches rows newer than the
+    # last seen id into a fixed-size buffer, so its cost does not grow with history.
+    @st.fragment(run_every=live_interval)
+    def live_metrics():
+        live_data = poll_live_tail()
+        if len(live_data) == 0:
+            st.info("Waiting for readings...")
+            return
+        
+        render_metric_cards(calculate_statistics(live_data))
+        st.caption(f"Live: latest reading at {live_data['date'].iloc[-1]:%Y-%m-%d %H:%M:%S}, "
+                   f"averages over the last {len(live_data)} readings")
+        
+        live_fig = go.Figure()
+        for column, name in [('temperature', 'Temperature (°C)'), ('humidity', 'Humidity (%)'), ('soil_moisture', 'Soil Moisture (%)')]:
+            live_fig.add_trace(go.Scattergl(x=live_data['date'], y=live_data[column], mode='lines', name=name))
+        live_fig.update_layout(
+            height=300,
+            margin=dict(t=30, b=30),
+            hovermode='x unified',
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+        )
+        st.plotly_chart(live_fig, use_container_width=True)
+    
+    live_metrics()
+else:
+    render_metric_cards(sections.result('stats'))
+
+range_quantiles = get_range_quantiles(selected_start_date, selected_end_date, data=filtered_data)
+for quantile_col, metric, unit in zip(st.columns(3), SKETCH_METRICS, ["°C", "%", "%"]):
+    if metric in range_quantiles.index:
+        metric_quantiles = range_quantiles.loc[metric]
+        quantile_col.caption(
+            f"Range p5 / p50 / p95: {metric_quantiles['p5']:.1f} / {metric_quantiles['p50']:.1f} / {metric_quantiles['p95']:.1f}{unit}"
+        )
 
 st.markdown("""
 <div style="background-color:#e8f5e9; padding:10px; border-radius:10px; margin-bottom:10px; border-left:5px solid #2e7d32">
@@ -160,60 +271,13 @@ with tab1:
     
     metrics = st.multiselect(
         "Select metrics to display",
-        ["Temperature", "Humidity", "Soil Moisture", "Water Usage", "Energy Consumption"],
+        list(TIME_SERIES_METRICS),
         default=["Temperature", "Humidity", "Soil Moisture"]
     )
     
     if metrics:
-        fig = go.Figure()
-        
-        if "Temperature" in metrics:
-            fig.add_trace(go.Scatter(
-                x=filtered_data['date'], 
-                y=filtered_data['temperature'], 
-                mode='lines+markers',
-                name='Temperature (°C)'
-            ))
-            
-        if "Humidity" in metrics:
-            fig.add_trace(go.Scatter(
-                x=filtered_data['date'], 
-                y=filtered_data['humidity'], 
-                mode='lines+markers',
-                name='Humidity (%)'
-            ))
-            
-        if "Soil Moisture" in metrics:
-            fig.add_trace(go.Scatter(
-                x=filtered_data['date'], 
-                y=filtered_data['soil_moisture'], 
-                mode='lines+markers',
-                name='Soil Moisture (%)'
-            ))
-            
-        if "Water Usage" in metrics:
-            fig.add_trace(go.Scatter(
-                x=filtered_data['date'], 
-                y=filtered_data['water_usage'], 
-                mode='lines+markers',
-                name='Water Usage (L)'
-            ))
-            
-        if "Energy Consumption" in metrics:
-            fig.add_trace(go.Scatter(
-                x=filtered_data['date'], 
-                y=filtered_data['energy_consumption'], 
-                mode='lines+markers',
-                name='Energy (kWh)'
-            ))
-        
-        fig.update_layout(
-            height=500,
-            xaxis_title='Date',
-            yaxis_title='Value',
-            hovermode='x unified',
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-        )
+        # Large ranges render with WebGL; traces and figures are cached per data version and range.
+        fig = build_time_series_figure(plot_data, metrics, chart_data_key(plot_data, db.get_data_version(), resample_freq))
         
         st.plotly_chart(fig, use_container_width=True)
     else:
@@ -268,6 +332,51 @@ with tab2:
             st.warning(f"Weak correlation detected between {x_axis} and {y_axis}.")
     else:
         st.warning("Please select different metrics for X and Y axes.")
+    
+    st.subheader("Correlation Over Time")
+    
+    lag_col1, lag_col2, lag_col3 = st.columns(3)
+    with lag_col1:
+        correlation_window = st.slider("Window (readings)", 5, 200, DEFAULT_WINDOW)
+    with lag_col2:
+        max_lag = st.slider("Maximum lag (readings)", 0, 30, DEFAULT_MAX_LAG)
+    with lag_col3:
+        heatmap_view = st.radio("Show", ["Lags for X → Y", "All pairs"], horizontal=True)
+    
+    if len(filtered_data) < correlation_window + max_lag:
+        st.info("Not enough readings in the selected range for this window and lag.")
+    elif heatmap_view == "Lags for X → Y":
+        if x_axis != y_axis:
+            lag_heatmap = lagged_correlation_heatmap(
+                filtered_data, metric_to_column[x_axis], metric_to_column[y_axis], correlation_window, max_lag
+            )
+            heatmap_fig = px.imshow(
+                lag_heatmap, aspect='auto', zmin=-1, zmax=1, color_continuous_scale='RdBu_r',
+                labels={'x': 'Date', 'y': 'Lag (readings)', 'color': 'Correlation'}
+            )
+            heatmap_fig.update_layout(height=400)
+            st.plotly_chart(heatmap_fig, use_container_width=True)
+            
+            profile = lag_profile(filtered_data, metric_to_column[x_axis], metric_to_column[y_axis], max_lag)
+            # A metric that stays constant over the range has no correlation at any lag.
+            if profile.dropna().empty:
+                st.info(f"{x_axis} or {y_axis} does not vary over the selected range, so no lag can be estimated.")
+            else:
+                strongest_lag = int(profile.abs().idxmax())
+                st.info(f"{y_axis} follows {x_axis} most closely at a lag of {strongest_lag} readings "
+                        f"(correlation {profile[strongest_lag]:.3f}).")
+        else:
+            st.warning("Please select different metrics for X and Y axes.")
+    else:
+        # A slider needs a range; with no lag allowed the pairs are compared unshifted.
+        lag_for_pairs = st.slider("Lag for all pairs (readings)", 0, max_lag, 0) if max_lag > 0 else 0
+        pairs_heatmap = pair_correlation_heatmap(filtered_data, correlation_window, lag_for_pairs)
+        heatmap_fig = px.imshow(
+            pairs_heatmap, aspect='auto', zmin=-1, zmax=1, color_continuous_scale='RdBu_r',
+            labels={'x': 'Date', 'y': 'Metric pair', 'color': 'Correlation'}
+        )
+        heatmap_fig.update_layout(height=500)
+        st.plotly_chart(heatmap_fig, use_container_width=True)
 
 with tab3:
     st.subheader("Resource Usage Analysis")
@@ -275,15 +384,15 @@ with tab3:
     resource_fig = go.Figure()
     
     resource_fig.add_trace(go.Bar(
-        x=filtered_data['date'],
-        y=filtered_data['water_usage'],
+        x=plot_data['date'],
+        y=plot_data[water_column],
         name='Water Usage (L)',
         marker_color='blue'
     ))
     
     resource_fig.add_trace(go.Bar(
-        x=filtered_data['date'],
-        y=filtered_data['energy_consumption'],
+        x=plot_data['date'],
+        y=plot_data[energy_column],
         name='Energy (kWh)',
         marker_color='orange',
         yaxis='y2'
@@ -303,8 +412,9 @@ with tab3:
     
     st.plotly_chart(resource_fig, use_container_width=True)
     
-    total_water = filtered_data['water_usage'].sum()
-    total_energy = filtered_data['energy_consumption'].sum()
+    ledger_totals = sections.result('ledger_totals')
+    total_water = ledger_totals['water'] if ledger_totals else filtered_data['water_usage'].sum()
+    total_energy = ledger_totals['energy'] if ledger_totals else filtered_data['energy_consumption'].sum()
     
     col1, col2 = st.columns(2)
     
@@ -321,7 +431,7 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-efficiency = calculate_resource_efficiency(filtered_data)
+efficiency = sections.result('efficiency')
 eff_col1, eff_col2 = st.columns(2)
 
 with eff_col1:
@@ -377,8 +487,8 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-recommendations = generate_recommendations(filtered_data, stats)
-savings = calculate_potential_savings(filtered_data)
+recommendations = sections.result('recommendations')
+savings = sections.result('savings')
 col1, col2 = st.columns([2, 1])
 
 with col1:
@@ -430,6 +540,38 @@ with col2:
     </div>
     """, unsafe_allow_html=True)
 
+with st.expander("What-if Scenario Simulator"):
+    st.markdown("Explore how savings and carbon impact change across reduction targets, prices and emission factors.")
+
+    sim_col1, sim_col2 = st.columns(2)
+    with sim_col1:
+        water_reduction_range = st.slider("Water reduction (%)", 0.0, 60.0, DEFAULT_RANGES['water_reduction_percent'], step=1.0)
+        energy_reduction_range = st.slider("Energy reduction (%)", 0.0, 60.0, DEFAULT_RANGES['energy_reduction_percent'], step=1.0)
+        carbon_per_kwh_range = st.slider("Carbon factor (kg CO₂/kWh)", 0.1, 1.0, DEFAULT_RANGES['carbon_per_kwh'], step=0.01)
+    with sim_col2:
+        water_cost_range = st.slider("Water price ($/L)", 0.0005, 0.01, DEFAULT_RANGES['water_cost_per_liter'], step=0.0005, format="%.4f")
+        energy_cost_range = st.slider("Energy price ($/kWh)", 0.05, 0.50, DEFAULT_RANGES['energy_cost_per_kwh'], step=0.01)
+        scenario_samples = st.select_slider("Monte Carlo samples", [1000, 10000, 100000], value=10000)
+
+    scenario_ranges = {
+        'water_reduction_percent': water_reduction_range,
+        'energy_reduction_percent': energy_reduction_range,
+        'water_cost_per_liter': water_cost_range,
+        'energy_cost_per_kwh': energy_cost_range,
+        'carbon_per_kwh': carbon_per_kwh_range,
+    }
+    scenarios = sample_scenarios(filtered_data, n=scenario_samples, ranges=scenario_ranges, seed=0)
+    scenario_summary = summarize_distribution(scenarios)
+
+    st.dataframe(scenario_summary.style.format("{:.2f}"), use_container_width=True)
+
+    scenario_fig = px.histogram(scenarios, x='cost_savings', nbins=50, labels={'cost_savings': 'Cost Savings ($)'})
+    scenario_fig.update_layout(height=300, showlegend=False)
+    st.plotly_chart(scenario_fig, use_container_width=True)
+
+    st.markdown("**Sensitivity of cost savings to each assumption**")
+    st.dataframe(sensitivity_table(filtered_data, ranges=scenario_ranges), use_container_width=True, hide_index=True)
+
 st.markdown("""
 <div style="background-color:#e8f5e9; padding:10px; border-radius:10px; margin-bottom:10px; border-left:5px solid #2e7d32">
     <h2 style="color:#2e7d32; text-align:center">Environmental Impact</h2>
@@ -437,7 +579,7 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-impact = calculate_environmental_impact(filtered_data, savings)
+impact = sections.result('impact')
 
 st.container().markdown("<div style='height: 30px'></div>", unsafe_allow_html=True)
 col1, col2, col3 = st.columns(3)
@@ -504,7 +646,7 @@ st.markdown(f"""
 # Add spacing between sections
 st.container().markdown("<div style='height: 30px'></div>", unsafe_allow_html=True)
 
-regional_comparison = calculate_regional_comparison(filtered_data, selected_region)
+regional_comparison = sections.result('regional_comparison')
 eco_impact_score = get_eco_impact_score(regional_comparison)
 
 st.markdown(f"""
@@ -600,6 +742,11 @@ with col1:
     st.markdown("### Data Source")
     if db.check_connection():
         st.success(" Connected to SQLite database")
+        cache_stats = db.get_query_cache_stats()
+        st.caption(f"Query cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses ({cache_stats['hit_rate']:.0%} hit rate)")
+        quality = st.session_state.aggregates.get('quality')
+        if quality:
+            st.caption(f"Data quality: {quality['flagged_readings']} readings had spikes or out-of-range values replaced by interpolation")
     else:
         st.error(" Database connection error")
         st.info("Using sample data for demonstration")
@@ -612,5 +759,29 @@ with col2:
     Data will persist between sessions.
     """)
 
+    export_formats = ["csv", "parquet"] if parquet_available() else ["csv"]
+    export_col1, export_col2 = st.columns(2)
+    with export_col1:
+        export_format = st.selectbox("Export format", export_formats)
+    with export_col2:
+        if st.button("Prepare export of selected range", use_container_width=True):
+            # Chunks are encoded as they stream in, so the export never sits in
+            # memory as one frame; the download button needs the bytes anyway.
+            export_buffer = io.BytesIO()
+            exported_rows = export_metrics(export_buffer, selected_start_date, selected_end_date, fmt=export_format)
+            st.session_state.export_file = (export_buffer.getvalue(), export_format, exported_rows)
+
+    if 'export_file' in st.session_state:
+        export_bytes, exported_format, exported_rows = st.session_state.export_file
+        st.download_button(
+            f"Download {exported_rows} records ({exported_format.upper()})",
+            export_bytes,
+            file_name=f"environmental_metrics.{exported_format}",
+            mime="text/csv" if exported_format == "csv" else "application/octet-stream",
+            use_container_width=True
+        )
+
 st.sidebar.markdown("---")
 st.sidebar.info("Dashboard last updated: " + datetime.now().strftime("%Y-%m-%d %H:%M"))
+
+observe('streamlit_rerun_seconds', time.perf_counter() - rerun_started, help_text="Duration of full dashboard reruns")
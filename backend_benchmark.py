@@ -0,0 +1,148 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import os
+import json
+import time
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def generate_history(days=730, interval_minutes=15, seed=0):
+    """
+    Synthetic sensor history with daily cycles and noise.
+
+    Args:
+        days: Length of the history in days
+        interval_minutes: Minutes between readings
+        seed: Random seed
+
+    Returns:
+        DataFrame: Readings in the environmental_metrics layout (without id)
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(end=pd.Timestamp.now().floor('D'), periods=days * 24 * 60 // interval_minutes,
+                          freq=f'{interval_minutes}min')
+    hours = dates.hour.to_numpy() + dates.minute.to_numpy() / 60
+    daily = np.sin((hours - 6) / 24 * 2 * np.pi)
+    size = len(dates)
+    return pd.DataFrame({
+        'date': dates,
+        'temperature': 21 + 5 * daily + rng.normal(0, 1, size),
+        'humidity': 60 - 10 * daily + rng.normal(0, 3, size),
+        'soil_moisture': 70 + rng.normal(0, 5, size),
+        'water_usage': np.clip(10 + 3 * daily + rng.normal(0, 2, size), 0, None),
+        'energy_consumption': np.clip(15 + 4 * daily + rng.normal(0, 2, size), 0, None),
+    })
+
+
+def _time(fn, repeat):
+    timings = []
+    rows = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = len(fn())
+        timings.append(time.perf_counter() - started)
+    return {'rows': rows, 'median_ms': float(np.median(timings) * 1000), 'min_ms': float(np.min(timings) * 1000)}
+
+
+def run_benchmark(db_path, backends=('sqlite', 'duckdb'), days=730, interval_minutes=15, repeat=5):
+    """
+    Compare analytics backends on the same synthetic history.
+
+    The SQLite query cache is cleared before every timed call so both backends
+    measure the storage engine rather than the cache.
+
+    Args:
+        db_path: SQLite file to create (the columnar mirror is written next to it)
+        backends: Backend names to compare
+        days: Length of the synthetic history in days
+        interval_minutes: Minutes between readings
+        repeat: Timed runs per query
+
+    Returns:
+        dict: Per backend and query, row count and timings
+    """
+    db_path = os.path.abspath(db_path)
+    for path in (db_path, f"{db_path}.duckdb"):
+        if os.path.exists(path):
+            os.remove(path)
+
+    # db and storage_backends read their paths at import time.
+    os.environ["METRICS_DB_URL"] = f"sqlite:///{db_path}"
+    os.environ["METRICS_COLUMNAR_PATH"] = f"{db_path}.duckdb"
+    import db
+    import storage_backends
+
+    history = generate_history(days, interval_minutes)
+    started = time.perf_counter()
+    db.insert_data(history)
+    logger.info(f"Wrote {len(history)} synthetic readings in {time.perf_counter() - started:.1f}s")
+
+    end = history['date'].iloc[-1]
+    queries = {
+        'scan_30d': lambda backend: backend.scan(end - pd.Timedelta(days=30), end),
+        'scan_all': lambda backend: backend.scan(),
+        'daily_mean_90d': lambda backend: backend.aggregate(end - pd.Timedelta(days=90), end, freq='D'),
+        'weekly_mean_sum_all': lambda backend: backend.aggregate(freq='W', aggs=('mean', 'sum')),
+        'monthly_min_max_all': lambda backend: backend.aggregate(freq='M', aggs=('min', 'max')),
+    }
+
+    report = {'readings': len(history), 'sqlite_file_mb': os.path.getsize(db_path) / 1e6, 'backends': {}}
+    for name in backends:
+        if name == 'duckdb' and not storage_backends.duckdb_available():
+            logger.warning("duckdb is not installed, skipping the columnar backend")
+            continue
+        backend = storage_backends.BACKENDS[name]()
+        started = time.perf_counter()
+        if name == 'duckdb':
+            backend.sync()
+        results = {'setup_s': time.perf_counter() - started}
+        for query_name, query in queries.items():
+            def timed_query():
+                db.clear_query_cache()
+                return query(backend)
+            timed_query()
+            results[query_name] = _time(timed_query, repeat)
+        backend.close()
+        report['backends'][name] = results
+
+    if os.path.exists(f"{db_path}.duckdb"):
+        report['duckdb_file_mb'] = os.path.getsize(f"{db_path}.duckdb") / 1e6
+    return report
+
+
+def _format_report(report):
+    lines = [f"Readings: {report['readings']}  SQLite file: {report['sqlite_file_mb']:.1f} MB"
+             + (f"  DuckDB file: {report['duckdb_file_mb']:.1f} MB" if 'duckdb_file_mb' in report else "")]
+    names = list(report['backends'])
+    lines.append(f"{'query':<22}" + "".join(f"{name + ' ms':>14}" for name in names))
+    queries = [key for key in next(iter(report['backends'].values()), {}) if key != 'setup_s']
+    for query in queries:
+        lines.append(f"{query:<22}" + "".join(f"{report['backends'][name][query]['median_ms']:>14.1f}" for name in names))
+    lines.append(f"{'setup (s)':<22}" + "".join(f"{report['backends'][name]['setup_s']:>14.2f}" for name in names))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the SQLite and columnar analytics backends.")
+    parser.add_argument("--db", default="backend_benchmark.db", help="SQLite file to create for the run")
+    parser.add_argument("--backends", nargs="+", default=['sqlite', 'duckdb'], help="Backends to compare")
+    parser.add_argument("--days", type=int, default=730, help="Days of synthetic history")
+    parser.add_argument("--interval", type=int, default=15, help="Minutes between synthetic readings")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per query")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.db, backends=args.backends, days=args.days,
+                           interval_minutes=args.interval, repeat=args.repeat)
+    print(json.dumps(report, indent=2) if args.json else _format_report(report))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    main()
@@ -0,0 +1,160 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import os
+import argparse
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import quote
+
+import pandas as pd
+from sqlalchemy import create_engine
+
+from data_processor import calculate_statistics, calculate_resource_efficiency
+from recommendation_engine import calculate_potential_savings, calculate_environmental_impact
+from eco_impact import calculate_regional_comparison, get_eco_impact_score, get_all_regions
+
+logger = logging.getLogger(__name__)
+
+METRICS_QUERY = "SELECT * FROM environmental_metrics ORDER BY date"
+
+
+def _open_site_engine(db_path):
+    # Each site is read once, so the engine is disposed as soon as its report is
+    # done; read-only mode makes a mistyped path an error instead of a new empty file.
+    return create_engine(f"sqlite:///file:{quote(os.path.abspath(db_path))}?mode=ro&uri=true")
+
+
+def _site_name(db_path):
+    return os.path.splitext(os.path.basename(db_path))[0]
+
+
+def generate_site_report(db_path, region):
+    """
+    Compute the dashboard summary for a single site database.
+
+    Args:
+        db_path: Path to the site's SQLite database file
+        region: Region name used for the eco-impact comparison
+
+    Returns:
+        dict: Flat summary row for the site
+    """
+    row = {'site': _site_name(db_path), 'db_path': db_path, 'region': region}
+
+    engine = _open_site_engine(db_path)
+    try:
+        data = pd.read_sql(METRICS_QUERY, engine)
+        if len(data) == 0:
+            row['status'] = 'empty'
+            return row
+
+        data['date'] = pd.to_datetime(data['date'])
+
+        stats = calculate_statistics(data)
+        efficiency = calculate_resource_efficiency(data)
+        savings = calculate_potential_savings(data)
+        impact = calculate_environmental_impact(data, savings)
+        comparison = calculate_regional_comparison(data, region)
+        eco_score = get_eco_impact_score(comparison)
+
+        row.update({
+            'status': 'ok',
+            'records': len(data),
+            'first_date': data['date'].iloc[0],
+            'last_date': data['date'].iloc[-1],
+            'avg_temp': stats['avg_temp'],
+            'avg_humidity': stats['avg_humidity'],
+            'avg_soil_moisture': stats['avg_soil_moisture'],
+            'avg_water_usage': stats['avg_water_usage'],
+            'avg_energy_consumption': stats['avg_energy_consumption'],
+            'temp_status': stats['temp_status'],
+            'humidity_status': stats['humidity_status'],
+            'soil_moisture_status': stats['soil_moisture_status'],
+            'efficiency_score': efficiency['overall_score'],
+            'water_savings': savings['water_savings'],
+            'energy_savings': savings['energy_savings'],
+            'cost_savings': savings['cost_savings'],
+            'carbon_reduction': impact['carbon_reduction'],
+            'sustainability_score': impact['sustainability_score'],
+            'eco_impact_score': eco_score['total_score'],
+            'water_impact_score': eco_score['water_impact_score'],
+            'energy_impact_score': eco_score['energy_impact_score'],
+            'carbon_impact_score': eco_score['carbon_impact_score'],
+        })
+    except Exception as e:
+        logger.error(f"Error generating report for {db_path}: {e}")
+        row['status'] = 'error'
+        row['error'] = str(e)
+    finally:
+        engine.dispose()
+
+    return row
+
+
+def _generate_site_report_task(task):
+    db_path, region = task
+    return generate_site_report(db_path, region)
+
+
+def run_batch_reports(db_paths, region, max_workers=None, chunksize=None):
+    """
+    Generate summaries for many site databases in parallel.
+
+    Sites are distributed over a process pool in chunks so that the
+    per-task IPC overhead stays small compared to the analytics work.
+
+    Args:
+        db_paths: Iterable of SQLite database file paths, one per site
+        region: Region name, or dict mapping db path to region name
+        max_workers: Number of worker processes (defaults to CPU count)
+        chunksize: Number of sites sent to a worker per task
+
+    Returns:
+        DataFrame: One summary row per site, in input order
+    """
+    db_paths = list(db_paths)
+    if not db_paths:
+        return pd.DataFrame()
+
+    if isinstance(region, dict):
+        tasks = [(path, region[path]) for path in db_paths]
+    else:
+        tasks = [(path, region) for path in db_paths]
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(tasks)))
+
+    if chunksize is None:
+        # Roughly four chunks per worker balances load without flooding the queue.
+        chunksize = max(1, len(tasks) // (max_workers * 4))
+
+    logger.info(f"Generating reports for {len(tasks)} sites with {max_workers} workers (chunksize={chunksize})")
+
+    if max_workers == 1:
+        rows = [_generate_site_report_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            rows = list(executor.map(_generate_site_report_task, tasks, chunksize=chunksize))
+
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate dashboard summaries for many site databases.")
+    parser.add_argument("databases", nargs="+", help="SQLite database files, one per site")
+    parser.add_argument("--region", default=get_all_regions()[0], choices=get_all_regions(),
+                        help="Region used for the eco-impact comparison")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("--chunksize", type=int, default=None, help="Sites per worker task")
+    parser.add_argument("--output", default="site_reports.csv", help="Output CSV file")
+    args = parser.parse_args()
+
+    report = run_batch_reports(args.databases, args.region, max_workers=args.workers, chunksize=args.chunksize)
+    report.to_csv(args.output, index=False)
+    logger.info(f"Wrote {len(report)} site reports to {args.output}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,177 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import os
+import json
+import zlib
+
+import numpy as np
+import pandas as pd
+
+BLOCK_SIZE = int(os.environ.get("METRICS_BLOCK_SIZE", "4096"))
+BLOCK_COMPRESSION_LEVEL = int(os.environ.get("METRICS_BLOCK_COMPRESSION_LEVEL", "6"))
+
+
+def _zigzag(values):
+    # Maps small negative and positive integers to small unsigned ones.
+    values = values.astype(np.int64)
+    return ((values << 1) ^ (values >> 63)).view(np.uint64)
+
+
+def _unzigzag(values):
+    return (values >> np.uint64(1)).view(np.int64) ^ -(values & np.uint64(1)).view(np.int64)
+
+
+def _pack_words(words):
+    # Byte-shuffling puts the i-th byte of every word together, so the runs of
+    # zero bytes that delta-of-delta and XOR leave behind compress well.
+    planes = np.ascontiguousarray(words.astype('<u8').view(np.uint8).reshape(-1, 8).T)
+    return zlib.compress(planes.tobytes(), BLOCK_COMPRESSION_LEVEL)
+
+
+def _unpack_words(blob, count):
+    planes = np.frombuffer(zlib.decompress(blob), dtype=np.uint8).reshape(8, count)
+    return np.ascontiguousarray(planes.T).view('<u8').ravel()
+
+
+def encode_integers(values):
+    """
+    Encode an integer series as delta-of-deltas.
+
+    Regular series (evenly spaced timestamps, consecutive ids) turn into
+    almost nothing but zeros.
+
+    Args:
+        values: 1-D integer array
+
+    Returns:
+        bytes: Compressed block
+    """
+    values = np.asarray(values, dtype=np.int64)
+    deltas = np.diff(values, prepend=np.int64(0))
+    return _pack_words(_zigzag(np.diff(deltas, prepend=np.int64(0))))
+
+
+def decode_integers(blob, count):
+    """
+    Decode a block written by encode_integers.
+
+    Args:
+        blob: Compressed block
+        count: Number of values in the block
+
+    Returns:
+        ndarray: int64 values
+    """
+    return np.cumsum(np.cumsum(_unzigzag(_unpack_words(blob, count))))
+
+
+def encode_floats(values):
+    """
+    Encode a float series by XOR-ing each value with the previous one.
+
+    As in Gorilla, neighbouring readings share sign, exponent and leading
+    mantissa bits, so the XOR is mostly zero bytes.
+
+    Args:
+        values: 1-D float array
+
+    Returns:
+        bytes: Compressed block
+    """
+    bits = np.asarray(values, dtype=np.float64).view(np.uint64)
+    return _pack_words(bits ^ np.concatenate([np.zeros(1, dtype=np.uint64), bits[:-1]]))
+
+
+def decode_floats(blob, count):
+    """
+    Decode a block written by encode_floats.
+
+    Args:
+        blob: Compressed block
+        count: Number of values in the block
+
+    Returns:
+        ndarray: float64 values
+    """
+    return np.bitwise_xor.accumulate(_unpack_words(blob, count)).view(np.float64)
+
+
+def encode_block(frame, metrics):
+    """
+    Encode a run of readings as one block.
+
+    Args:
+        frame: DataFrame with id, date, source and metric columns, sorted by date
+        metrics: Metric columns to encode
+
+    Returns:
+        dict: Block row with date bounds (microseconds since the epoch), highest
+        id, row count and one compressed blob per column
+    """
+    # Microseconds, the precision the database stores timestamps with.
+    dates = pd.to_datetime(frame['date']).to_numpy(dtype='datetime64[us]').view(np.int64)
+    ids = frame['id'].to_numpy(dtype=np.int64)
+    codes, sources = pd.factorize(frame['source'].fillna('') if 'source' in frame.columns else pd.Series([''] * len(frame)))
+
+    block = {
+        'start_us': int(dates.min()),
+        'end_us': int(dates.max()),
+        'max_id': int(ids.max()),
+        'row_count': len(frame),
+        'dates': encode_integers(dates),
+        'ids': encode_integers(ids),
+        'sources': json.dumps([str(source) for source in sources]),
+        'source_codes': encode_integers(codes),
+    }
+    for metric in metrics:
+        block[metric] = encode_floats(frame[metric].to_numpy(dtype=float))
+    return block
+
+
+def encode_blocks(frame, metrics, block_size=BLOCK_SIZE):
+    """
+    Split readings into fixed-size runs and encode each one.
+
+    Args:
+        frame: DataFrame with id, date, source and metric columns, sorted by date
+        metrics: Metric columns to encode
+        block_size: Readings per block
+
+    Returns:
+        list: Block rows, see encode_block
+    """
+    return [encode_block(frame.iloc[start:start + block_size], metrics) for start in range(0, len(frame), block_size)]
+
+
+def decode_blocks(blocks, metrics):
+    """
+    Decode blocks straight into NumPy arrays and assemble a frame.
+
+    Args:
+        blocks: Block rows (mappings with the keys written by encode_block)
+        metrics: Metric columns to decode; other metric blobs are never decompressed
+
+    Returns:
+        DataFrame: id, date, source and the requested metrics, in block order
+    """
+    columns = ['id', 'date', 'source'] + list(metrics)
+    if not blocks:
+        # Typed like a decoded frame, so date lookups work on a shard without readings.
+        frame = pd.DataFrame({'id': np.empty(0, dtype=np.int64), 'date': np.empty(0, dtype='datetime64[us]'),
+                              'source': np.empty(0, dtype=object)})
+        for metric in metrics:
+            frame[metric] = np.empty(0, dtype=float)
+        return frame
+
+    counts = [block['row_count'] for block in blocks]
+    ids = np.concatenate([decode_integers(block['ids'], count) for block, count in zip(blocks, counts)])
+    dates = np.concatenate([decode_integers(block['dates'], count) for block, count in zip(blocks, counts)])
+    sources = np.concatenate([
+        np.asarray(json.loads(block['sources']), dtype=object)[decode_integers(block['source_codes'], count)]
+        for block, count in zip(blocks, counts)
+    ])
+
+    frame = pd.DataFrame({'id': ids, 'date': dates.view('datetime64[us]'), 'source': sources})
+    for metric in metrics:
+        frame[metric] = np.concatenate([decode_floats(block[metric], count) for block, count in zip(blocks, counts)])
+    return frame[columns]
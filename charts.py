@@ -0,0 +1,126 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import plotly.graph_objects as go
+
+TIME_SERIES_METRICS = {
+    "Temperature": ('temperature', 'Temperature (°C)'),
+    "Humidity": ('humidity', 'Humidity (%)'),
+    "Soil Moisture": ('soil_moisture', 'Soil Moisture (%)'),
+    "Water Usage": ('water_usage', 'Water Usage (L)'),
+    "Energy Consumption": ('energy_consumption', 'Energy (kWh)'),
+}
+
+# Above this many points per trace the chart is drawn with WebGL instead of SVG.
+WEBGL_POINT_THRESHOLD = int(os.environ.get("METRICS_WEBGL_THRESHOLD", "5000"))
+# Above this many points markers overlap into a solid band, so only lines are drawn.
+MARKER_POINT_LIMIT = int(os.environ.get("METRICS_MARKER_LIMIT", "1000"))
+FIGURE_CACHE_SIZE = int(os.environ.get("METRICS_FIGURE_CACHE_SIZE", "16"))
+
+# Shared by every session: traces per metric, and assembled figures per metric selection.
+_trace_cache = OrderedDict()
+_figure_cache = OrderedDict()
+_chart_cache_lock = threading.Lock()
+
+
+def _cache_get(cache, key):
+    with _chart_cache_lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def _cache_put(cache, key, value, size):
+    with _chart_cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > size:
+            cache.popitem(last=False)
+
+
+def clear_chart_cache():
+    with _chart_cache_lock:
+        _trace_cache.clear()
+        _figure_cache.clear()
+
+
+def chart_data_key(plot_data, version=None, freq=None):
+    """
+    Identify the plotted data by data version and the range it actually covers.
+
+    Args:
+        plot_data: DataFrame with a date column, raw or resampled
+        version: Data version (see db.get_data_version)
+        freq: Resampling frequency, or None for raw readings
+
+    Returns:
+        tuple: Hashable key for the chart caches
+    """
+    if len(plot_data) == 0:
+        return (version, freq, 0, None, None)
+    dates = plot_data['date']
+    return (version, freq, len(plot_data), dates.iloc[0], dates.iloc[-1])
+
+
+def _build_trace(plot_data, metric):
+    column, name = TIME_SERIES_METRICS[metric]
+    points = len(plot_data)
+    trace_type = go.Scattergl if points > WEBGL_POINT_THRESHOLD else go.Scatter
+    mode = 'lines' if points > MARKER_POINT_LIMIT else 'lines+markers'
+    return trace_type(
+        x=plot_data['date'].to_numpy(),
+        y=np.asarray(plot_data[column].to_numpy(), dtype=float),
+        mode=mode,
+        name=name
+    )
+
+
+def build_time_series_figure(plot_data, metrics, data_key=None):
+    """
+    Build the Time Series figure, reusing cached traces and figures.
+
+    Each metric's trace is cached on its own, so toggling a metric only
+    assembles a figure from traces that already exist.
+
+    Args:
+        plot_data: DataFrame with a date column and metric columns
+        metrics: Selected metric labels (keys of TIME_SERIES_METRICS)
+        data_key: Key from chart_data_key; without it nothing is cached
+
+    Returns:
+        go.Figure: Figure ready for st.plotly_chart (treat as read-only)
+    """
+    # Traces keep a fixed order no matter in which order metrics were picked.
+    metrics = tuple(metric for metric in TIME_SERIES_METRICS if metric in metrics)
+    figure_key = (data_key, metrics)
+    if data_key is not None:
+        cached = _cache_get(_figure_cache, figure_key)
+        if cached is not None:
+            return cached
+
+    traces = []
+    for metric in metrics:
+        trace = _cache_get(_trace_cache, (data_key, metric)) if data_key is not None else None
+        if trace is None:
+            trace = _build_trace(plot_data, metric)
+            if data_key is not None:
+                _cache_put(_trace_cache, (data_key, metric), trace, FIGURE_CACHE_SIZE * len(TIME_SERIES_METRICS))
+        traces.append(trace)
+
+    fig = go.Figure(data=traces)
+    fig.update_layout(
+        height=500,
+        xaxis_title='Date',
+        yaxis_title='Value',
+        hovermode='x unified',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+
+    if data_key is not None:
+        _cache_put(_figure_cache, figure_key, fig, FIGURE_CACHE_SIZE)
+    return fig
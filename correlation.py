@@ -0,0 +1,142 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import numpy as np
+import pandas as pd
+
+CORRELATION_METRICS = ['temperature', 'humidity', 'soil_moisture', 'water_usage', 'energy_consumption']
+DEFAULT_WINDOW = 14
+DEFAULT_MAX_LAG = 7
+MAX_HEATMAP_COLUMNS = 400
+
+
+def _rolling_sums(values, window):
+    # Window sums as differences of a cumulative sum: O(n) whatever the window size.
+    cumulative = np.cumsum(values, axis=0)
+    cumulative = np.concatenate([np.zeros((1,) + values.shape[1:]), cumulative])
+    return cumulative[window:] - cumulative[:-window]
+
+
+def rolling_correlation_matrix(values, window, lag=0):
+    """
+    Rolling Pearson correlation between every pair of columns at one lag.
+
+    Entry [t, i, j] correlates column i, shifted back by lag readings, with
+    column j over the window of readings ending at t + lag + window - 1.
+    All pairs come from the same five cumulative sums.
+
+    Args:
+        values: 2-D array with one column per metric
+        window: Number of readings per window
+        lag: How many readings column i leads column j
+
+    Returns:
+        ndarray: Shape (len(values) - lag - window + 1, columns, columns), NaN
+        where a window has no variance
+    """
+    values = np.asarray(values, dtype=float)
+    # Centering keeps the cumulative sums small, which avoids cancellation.
+    values = values - np.nanmean(values, axis=0)
+    leading = values[:len(values) - lag]
+    following = values[lag:]
+    if len(following) < window:
+        return np.empty((0, values.shape[1], values.shape[1]))
+
+    sum_x = _rolling_sums(leading, window)[:, :, None]
+    sum_y = _rolling_sums(following, window)[:, None, :]
+    sum_xx = _rolling_sums(leading ** 2, window)[:, :, None]
+    sum_yy = _rolling_sums(following ** 2, window)[:, None, :]
+    sum_xy = _rolling_sums(leading[:, :, None] * following[:, None, :], window)
+
+    covariance = sum_xy - sum_x * sum_y / window
+    variance_x = sum_xx - sum_x ** 2 / window
+    variance_y = sum_yy - sum_y ** 2 / window
+    with np.errstate(divide='ignore', invalid='ignore'):
+        correlation = covariance / np.sqrt(variance_x * variance_y)
+    # The differences of cumulative sums carry rounding error in proportion to
+    # the whole column, so a flat window is detected relative to that scale.
+    flat_x = variance_x <= 1e-11 * np.sum(leading ** 2, axis=0)[None, :, None] + 1e-12
+    flat_y = variance_y <= 1e-11 * np.sum(following ** 2, axis=0)[None, None, :] + 1e-12
+    correlation[flat_x | flat_y] = np.nan
+    return np.clip(correlation, -1.0, 1.0)
+
+
+def _heatmap_frame(matrix, index, dates, max_columns):
+    # Thin out the time axis before building the frame; the browser cannot show more cells anyway.
+    step = max(1, int(np.ceil(matrix.shape[1] / max_columns)))
+    return pd.DataFrame(matrix[:, ::step], index=index, columns=pd.DatetimeIndex(dates)[::step])
+
+
+def lagged_correlation_heatmap(data, x_metric, y_metric, window=DEFAULT_WINDOW, max_lag=DEFAULT_MAX_LAG,
+                               max_columns=MAX_HEATMAP_COLUMNS):
+    """
+    Rolling correlation of one metric pair over time, for every lag up to max_lag.
+
+    Args:
+        data: DataFrame with environmental metrics, sorted by date
+        x_metric: Leading metric (e.g. water_usage)
+        y_metric: Following metric (e.g. soil_moisture)
+        window: Number of readings per window
+        max_lag: Largest lag in readings
+        max_columns: Maximum number of time columns returned
+
+    Returns:
+        DataFrame: One row per lag, one column per window end date
+    """
+    if len(data) < window + max_lag:
+        return pd.DataFrame()
+
+    values = data[[x_metric, y_metric]].to_numpy(dtype=float)
+    dates = data['date'].iloc[max_lag + window - 1:]
+    # Trim the start so that every lag lines up on the same window end dates.
+    matrix = np.stack([rolling_correlation_matrix(values, window, lag)[max_lag - lag:, 0, 1]
+                       for lag in range(max_lag + 1)])
+    return _heatmap_frame(matrix, pd.RangeIndex(max_lag + 1, name='lag'), dates, max_columns)
+
+
+def pair_correlation_heatmap(data, window=DEFAULT_WINDOW, lag=0, metrics=CORRELATION_METRICS,
+                             max_columns=MAX_HEATMAP_COLUMNS):
+    """
+    Rolling correlation of every metric pair over time at one lag.
+
+    Args:
+        data: DataFrame with environmental metrics, sorted by date
+        window: Number of readings per window
+        lag: How many readings the first metric of each pair leads the second
+        metrics: Metrics to pair up
+        max_columns: Maximum number of time columns returned
+
+    Returns:
+        DataFrame: One row per pair ("x → y"), one column per window end date
+    """
+    if len(data) < window + lag:
+        return pd.DataFrame()
+
+    correlation = rolling_correlation_matrix(data[list(metrics)].to_numpy(dtype=float), window, lag)
+    dates = data['date'].iloc[lag + window - 1:]
+
+    # Without a lag the matrix is symmetric, so only one direction of each pair is kept.
+    pairs = [(i, j) for i in range(len(metrics)) for j in range(len(metrics))
+             if (i < j if lag == 0 else i != j)]
+    matrix = np.stack([correlation[:, i, j] for i, j in pairs])
+    return _heatmap_frame(matrix, [f"{metrics[i]} → {metrics[j]}" for i, j in pairs], dates, max_columns)
+
+
+def lag_profile(data, x_metric, y_metric, max_lag=DEFAULT_MAX_LAG):
+    """
+    Correlation over the whole range for each lag.
+
+    Args:
+        data: DataFrame with environmental metrics, sorted by date
+        x_metric: Leading metric
+        y_metric: Following metric
+        max_lag: Largest lag in readings
+
+    Returns:
+        Series: Correlation indexed by lag
+    """
+    values = data[[x_metric, y_metric]].to_numpy(dtype=float)
+    profile = {}
+    for lag in range(max_lag + 1):
+        window = len(values) - lag
+        profile[lag] = rolling_correlation_matrix(values, window, lag)[0, 0, 1] if window > 1 else np.nan
+    return pd.Series(profile, name='correlation').rename_axis('lag')
@@ -5,6 +5,9 @@ import numpy as np
 from datetime import datetime, timedelta
 from data.sample_data import get_environmental_data
 import db
+import snapshot
+from data_quality import clean_data, summarize_quality
+from instrumentation import instrument
 
 def load_data():
     """
@@ -14,7 +17,44 @@ def load_data():
         DataFrame: Environmental metrics data
     """
     
-    return db.load_data_from_db()
+    return load_data_and_aggregates()[0]
+
+def load_data_and_aggregates():
+    """
+    Load cleaned environmental data together with whole-history aggregates.
+    
+    A snapshot taken at the current data version is memory-mapped instead of
+    querying SQLite; otherwise the data is loaded from the database and a new
+    snapshot is written for the next session.
+    
+    Returns:
+        tuple: (DataFrame with environmental metrics, dict of aggregates)
+    """
+    version = db.get_data_version()
+    cached = snapshot.load_snapshot(version)
+    if cached is not None:
+        return cached
+    
+    # The snapshot is tagged with the version the rows were read at, which a
+    # cached frame can't vouch for. An empty database is seeded by load_data_from_db.
+    raw, version = db.load_data_with_version()
+    if len(raw) == 0:
+        raw, version = db.load_data_from_db(), None
+    
+    # Spikes, repeated timestamps and gaps are cleaned before any analytics run.
+    data = clean_data(raw)
+    aggregates = {}
+    if len(data) > 0:
+        aggregates = {
+            'statistics': calculate_statistics(data),
+            'efficiency': calculate_resource_efficiency(data),
+            'quality': summarize_quality(data),
+        }
+    
+    if version is not None:
+        snapshot.save_snapshot(data, version, aggregates)
+    
+    return data, aggregates
 
 def filter_data_by_date(data, start_date, end_date):
     """
@@ -26,7 +66,8 @@ def filter_data_by_date(data, start_date, end_date):
         end_date: End date for filtering
     
     Returns:
-        DataFrame: Filtered data
+        DataFrame: Filtered data. When the data is sorted by date this is a
+        row slice of the input that shares its memory, so treat it as read-only.
     """
    
     if not isinstance(start_date, datetime):
@@ -34,12 +75,23 @@ def filter_data_by_date(data, start_date, end_date):
     if not isinstance(end_date, datetime):
         end_date = datetime.combine(end_date, datetime.max.time())
     
-    
-    mask = (data['date'] >= start_date) & (data['date'] <= end_date)
+    # Data loaded from the database is already ordered by date, so the range
+    # can be found by binary search and returned as a slice without copying.
+    dates = data['date']
+    if pd.api.types.is_datetime64_dtype(dates) and dates.is_monotonic_increasing:
+        # The bounds are rounded inward to the column's unit (a [s] column can't
+        # hold the microseconds of the end of a day), which keeps the same rows.
+        unit = dates.dt.unit
+        start_index = dates.searchsorted(pd.Timestamp(start_date).ceil(unit).as_unit(unit), side='left')
+        end_index = dates.searchsorted(pd.Timestamp(end_date).floor(unit).as_unit(unit), side='right')
+        return data.iloc[start_index:end_index]
+    
+    mask = (dates >= start_date) & (dates <= end_date)
     filtered_data = data.loc[mask].copy()
     
     return filtered_data
 
+@instrument('calculate_statistics', 'analytics')
 def calculate_statistics(data):
     """
     Calculate various statistics from the environmental data.
@@ -107,6 +159,7 @@ def calculate_statistics(data):
     
     return stats
 
+@instrument('calculate_resource_efficiency', 'analytics')
 def calculate_resource_efficiency(data):
     """
     Calculate resource efficiency metrics.
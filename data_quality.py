@@ -0,0 +1,273 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import os
+import logging
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from sqlalchemy import text
+
+import db
+from instrumentation import instrument
+
+logger = logging.getLogger(__name__)
+
+QUALITY_METRICS = list(db.METRIC_COLUMNS)
+# Bit i flags QUALITY_METRICS[i] as an outlier; the next bit marks a repeated
+# reading, i.e. a second row with the same date and source. The database keeps
+# one row per date and source, so only frames from elsewhere (sample data,
+# files) can have repeats.
+DUPLICATE_FLAG = 1 << len(QUALITY_METRICS)
+
+HAMPEL_WINDOW = int(os.environ.get("METRICS_HAMPEL_WINDOW", "25"))
+HAMPEL_SIGMAS = float(os.environ.get("METRICS_HAMPEL_SIGMAS", "4"))
+# Bump when the flagging rules change so stored flags are recomputed.
+QUALITY_RULES_VERSION = 2
+QUALITY_CHUNK_SIZE = int(os.environ.get("METRICS_QUALITY_CHUNK_SIZE", "10000"))
+# Scales the median absolute deviation to a standard deviation for normal data.
+MAD_SCALE = 1.4826
+# Smallest MAD the filter works with, as a fraction of each metric's valid range.
+# A flat window (a quiet sensor, coarsely rounded readings) has a MAD of 0, and
+# would otherwise flag the first change of even one resolution step.
+MAD_FLOOR_FRACTION = float(os.environ.get("METRICS_HAMPEL_MAD_FLOOR", "0.005"))
+
+
+def metric_flag(metric):
+    return 1 << QUALITY_METRICS.index(metric)
+
+
+def hampel_outliers(values, window=HAMPEL_WINDOW, n_sigmas=HAMPEL_SIGMAS, context=0, mad_floor=0.0):
+    """
+    Flag outliers with a trailing Hampel filter.
+
+    Each value is compared with the median of the window of readings ending
+    at it; it is an outlier if it lies more than n_sigmas scaled MADs away.
+    The window only looks back, so a flag never changes once computed and
+    the data can be processed in chunks.
+
+    Args:
+        values: 2-D array, one column per metric
+        window: Number of readings per window
+        n_sigmas: Threshold in scaled MADs
+        context: Number of leading rows that are only history from the previous chunk
+        mad_floor: Lower bound for the MAD, scalar or one per column; windows
+            whose MAD is still 0 are not judged
+
+    Returns:
+        ndarray: Boolean array with the shape of values[context:]
+    """
+    values = np.asarray(values, dtype=float)
+    flags = np.zeros((len(values) - context, values.shape[1]), dtype=bool)
+    if len(values) < window:
+        return flags
+
+    # windows[t] holds readings t .. t + window - 1 for every column.
+    windows = sliding_window_view(values, window, axis=0)
+    median = np.median(windows, axis=-1)
+    mad = np.maximum(np.median(np.abs(windows - median[..., None]), axis=-1), mad_floor)
+    current = values[window - 1:]
+    outliers = (np.abs(current - median) > n_sigmas * MAD_SCALE * mad) & (mad > 0)
+
+    # Readings without a full window of history are not judged.
+    first = max(window - 1, context)
+    flags[first - context:] = outliers[first - window + 1:]
+    return flags
+
+
+def _mad_floor():
+    return np.array([MAD_FLOOR_FRACTION * (db.METRIC_RANGES[metric][1] - db.METRIC_RANGES[metric][0])
+                     for metric in QUALITY_METRICS])
+
+
+def _reading_keys(frame):
+    sources = frame['source'].fillna('').astype(str) if 'source' in frame.columns else pd.Series('', index=frame.index)
+    return pd.MultiIndex.from_arrays([frame['date'].to_numpy(), sources.to_numpy()])
+
+
+def _range_outliers(values):
+    low = np.array([db.METRIC_RANGES[metric][0] for metric in QUALITY_METRICS])
+    high = np.array([db.METRIC_RANGES[metric][1] for metric in QUALITY_METRICS])
+    return np.isnan(values) | (values < low) | (values > high)
+
+
+def compute_quality_flags(data, history=None, chunksize=QUALITY_CHUNK_SIZE, check_duplicates=True):
+    """
+    Compute quality flags for readings, streaming through them in chunks.
+
+    Args:
+        data: DataFrame of new readings sorted by date
+        history: Already flagged readings just before data (sorted by date),
+            used as filter context and to detect repeated readings
+        chunksize: Number of readings processed per chunk
+        check_duplicates: Look for repeated readings; off for database rows,
+            which are unique per date and source
+
+    Returns:
+        ndarray: Integer flag bitmask per row of data
+    """
+    flags = np.zeros(len(data), dtype=np.int64)
+    if len(data) == 0:
+        return flags
+
+    # Keep the first reading per date and source; later ones are gateway retries.
+    # Different sources reporting at the same time are separate readings.
+    duplicated = np.zeros(len(data), dtype=bool)
+    if check_duplicates:
+        keys = _reading_keys(data)
+        duplicated = keys.duplicated()
+        if history is not None and len(history):
+            duplicated |= keys.isin(_reading_keys(history))
+        flags[duplicated] |= DUPLICATE_FLAG
+
+    values = data[QUALITY_METRICS].to_numpy(dtype=float)
+    bits = np.array([metric_flag(metric) for metric in QUALITY_METRICS], dtype=np.int64)
+    flags |= (_range_outliers(values) * bits).sum(axis=1)
+
+    # Hampel context: the trailing clean readings from history, then from each previous chunk.
+    unique_rows = np.flatnonzero(~duplicated)
+    mad_floor = _mad_floor()
+    context = np.empty((0, len(QUALITY_METRICS)))
+    if history is not None and len(history):
+        context = history[QUALITY_METRICS].to_numpy(dtype=float)[-(HAMPEL_WINDOW - 1):]
+
+    for start in range(0, len(unique_rows), chunksize):
+        rows = unique_rows[start:start + chunksize]
+        chunk = np.vstack([context, values[rows]])
+        outliers = hampel_outliers(chunk, context=len(context), mad_floor=mad_floor)
+        flags[rows] |= (outliers * bits).sum(axis=1)
+        context = chunk[-(HAMPEL_WINDOW - 1):]
+
+    return flags
+
+
+def _load_stored_flags():
+    with db.engine.begin() as conn:
+        rules = conn.execute(text("SELECT revision FROM metric_revisions WHERE name = 'quality_rules'")).scalar()
+        if rules != QUALITY_RULES_VERSION:
+            # Flags stored under older rules are recomputed on this load.
+            conn.execute(text("DELETE FROM metric_quality_flags"))
+            conn.execute(text(
+                "INSERT INTO metric_revisions (name, revision) VALUES ('quality_rules', :revision) "
+                "ON CONFLICT (name) DO UPDATE SET revision = excluded.revision"
+            ), {'revision': QUALITY_RULES_VERSION})
+        return pd.read_sql(text("SELECT id, flags FROM metric_quality_flags"), conn)
+
+
+def _store_flags(ids, flags):
+    rows = [{'id': int(row_id), 'flags': int(row_flags)} for row_id, row_flags in zip(ids, flags)]
+    with db.engine.begin() as conn:
+        conn.execute(db.metric_quality_flags.insert().prefix_with("OR REPLACE"), rows)
+
+
+def get_quality_flags(data):
+    """
+    Quality flags for every row of data, computing only rows not flagged before.
+
+    Stored flags are looked up by reading id. New rows are flagged with the
+    trailing readings before them as context and then stored.
+
+    Args:
+        data: DataFrame from db.load_data_from_db, sorted by date
+
+    Returns:
+        ndarray: Integer flag bitmask per row of data
+    """
+    if not db.db_available or 'id' not in data.columns:
+        return compute_quality_flags(data)
+
+    try:
+        stored = _load_stored_flags()
+    except Exception as e:
+        logger.error(f"Error loading quality flags: {e}")
+        return compute_quality_flags(data)
+
+    ids = data['id'].to_numpy()
+    positions = pd.Index(stored['id']).get_indexer(ids)
+    stored_flags = np.append(stored['flags'].to_numpy(dtype=np.int64), -1)
+    # get_indexer returns -1 for unknown ids, which picks the -1 sentinel at the end.
+    flags = stored_flags[positions]
+    missing = np.flatnonzero(flags < 0)
+    if len(missing) == 0:
+        return flags
+
+    # History is the readings before the first unflagged one, as Hampel context.
+    first = missing[0]
+    history = data.iloc[max(0, first - HAMPEL_WINDOW):first]
+
+    new_flags = compute_quality_flags(data.iloc[first:], history, check_duplicates=False)
+    # Rows after the first unflagged one keep their stored flags if they have them.
+    flags[first:] = np.where(flags[first:] >= 0, flags[first:], new_flags)
+
+    try:
+        _store_flags(ids[missing], flags[missing])
+        logger.info(f"Flagged {len(missing)} new records, {int((flags[missing] != 0).sum())} with quality issues")
+    except Exception as e:
+        logger.error(f"Error storing quality flags: {e}")
+    return flags
+
+
+def apply_quality_flags(data, flags):
+    """
+    Clean data using its quality flags.
+
+    Repeated readings are collapsed to the first one, flagged values
+    are dropped and filled by time-based interpolation from their neighbours.
+
+    Args:
+        data: DataFrame with environmental metrics, sorted by date
+        flags: Integer flag bitmask per row
+
+    Returns:
+        DataFrame: Cleaned copy with a 'quality_flags' column
+    """
+    keep = (flags & DUPLICATE_FLAG) == 0
+    cleaned = data.loc[keep].copy()
+    cleaned['quality_flags'] = flags[keep]
+
+    kept_flags = flags[keep]
+    indexed = cleaned.set_index('date')
+    for metric in QUALITY_METRICS:
+        bad = (kept_flags & metric_flag(metric)) != 0
+        if not bad.any():
+            continue
+        column = indexed[metric].mask(bad)
+        # Time-based so uneven gaps between readings weigh neighbours correctly;
+        # flagged readings at either end take the nearest clean value.
+        cleaned[metric] = column.interpolate(method='time', limit_direction='both').to_numpy()
+
+    return cleaned
+
+
+@instrument('clean_data', 'analytics')
+def clean_data(data):
+    """
+    Run the data-quality stage on loaded readings.
+
+    Args:
+        data: DataFrame from db.load_data_from_db (not modified)
+
+    Returns:
+        DataFrame: Cleaned readings with a 'quality_flags' column
+    """
+    if len(data) == 0:
+        return data
+    return apply_quality_flags(data, get_quality_flags(data))
+
+
+def summarize_quality(data):
+    """
+    Count the issues found by the data-quality stage.
+
+    Args:
+        data: Cleaned DataFrame with a 'quality_flags' column
+
+    Returns:
+        dict: Number of replaced values per metric and of cleaned readings
+    """
+    if 'quality_flags' not in data.columns:
+        return {}
+    flags = data['quality_flags'].to_numpy()
+    summary = {metric: int(((flags & metric_flag(metric)) != 0).sum()) for metric in QUALITY_METRICS}
+    summary['flagged_readings'] = int((flags != 0).sum())
+    return summary
@@ -1,12 +1,23 @@
 # This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
 
 import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
-from sqlalchemy import create_engine, Column, Float, Integer, String, DateTime, Table, MetaData
+from sqlalchemy import create_engine, event, text, Column, Float, Integer, String, DateTime, LargeBinary, Table, MetaData, Index
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from datetime import datetime
+from sqlalchemy.pool import QueuePool
+from datetime import datetime, timedelta
 import logging
+from impact_factors import IMPACT_FACTORS
+from block_storage import encode_blocks, decode_blocks
+from instrumentation import instrument, register_collector
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -16,13 +27,118 @@ engine = None
 session = None
 metadata = None
 environmental_metrics = None
+environmental_metrics_daily = None
+metric_sketches = None
+resource_ledger = None
+ledger_factors = None
+partition_sequence = None
+metric_quality_flags = None
+metric_revisions = None
+metric_blocks = None
 
-SQLITE_URL = "sqlite:///agricultural_metrics.db"
+SQLITE_URL = os.environ.get("METRICS_DB_URL", "sqlite:///agricultural_metrics.db")
 logger.info(f"Setting up SQLite database at {SQLITE_URL}")
 
+METRIC_COLUMNS = ['temperature', 'humidity', 'soil_moisture', 'water_usage', 'energy_consumption']
+
+# Valid (min, max) for each reading, shared by the sidebar form and the ingestion service.
+METRIC_RANGES = {
+    'temperature': (-10.0, 50.0),
+    'humidity': (0.0, 100.0),
+    'soil_moisture': (0.0, 100.0),
+    'water_usage': (0.0, 100.0),
+    'energy_consumption': (0.0, 100.0),
+}
+
+# Raw readings older than this many days are rolled up into daily aggregates.
+# 0 keeps every raw row forever.
+RETENTION_DAYS = int(os.environ.get("METRICS_RETENTION_DAYS", "0"))
+RETENTION_BATCH_SIZE = int(os.environ.get("METRICS_RETENTION_BATCH_SIZE", "5000"))
+RETENTION_CHECK_INTERVAL = int(os.environ.get("METRICS_RETENTION_CHECK_INTERVAL", "3600"))
+INCREMENTAL_VACUUM_PAGES = 2000
+
+_last_retention_run = 0.0
+
+# Process-wide LRU cache of query results shared by every dashboard session.
+QUERY_CACHE_SIZE = int(os.environ.get("METRICS_QUERY_CACHE_SIZE", "32"))
+
+_query_cache = OrderedDict()
+_query_cache_lock = threading.Lock()
+_query_cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+# Optional in-memory copy of the database that serves raw-reading reads; see read_engine().
+READ_REPLICA = os.environ.get("METRICS_READ_REPLICA", "0") == "1"
+
+_replica_state = {'engine': None, 'keeper': None, 'watch': None, 'data_version': None, 'failed': False}
+# Held to change the replica; readers only hold it to register in _replica_readers,
+# then read on their own connections alongside each other.
+_replica_lock = threading.RLock()
+_replica_idle = threading.Condition(_replica_lock)
+_replica_readers = 0
+
+LEDGER_QUANTITIES = ['readings', 'water', 'energy', 'cost', 'co2']
+
+# Optional time partitioning of raw readings: '' keeps everything in the main
+# database, 'year' or 'month' writes each period to its own SQLite shard.
+PARTITION_GRANULARITY = os.environ.get("METRICS_PARTITION_BY", "")
+PARTITION_DIR = os.environ.get("METRICS_PARTITION_DIR", "metric_partitions")
+PARTITION_READ_WORKERS = int(os.environ.get("METRICS_PARTITION_READ_WORKERS", "4"))
+
+# Sealed shards can be stored as compressed blocks of readings (see block_storage.py)
+# instead of one SQLite row per reading.
+BLOCK_STORAGE = os.environ.get("METRICS_BLOCK_STORAGE", "0") == "1"
+
+_partition_engines = {}
+_partition_lock = threading.Lock()
+_sealed_partition_cache = {}
+_block_shard_cache = {}
+
+_ledger_checked = False
+_ledger_lock = threading.Lock()
+
+# Callbacks notified with (start, end) after every committed write.
+_write_listeners = []
+
+# Rows per transaction for upserts; a failed replay can simply be run again.
+UPSERT_BATCH_SIZE = int(os.environ.get("METRICS_UPSERT_BATCH_SIZE", "5000"))
+READING_IDENTITY_INDEX = 'ux_environmental_metrics_date_source'
+
+def _ensure_reading_identity(target_engine):
+    # Databases created before readings had an identity get the source column,
+    # lose repeated (date, source) rows (the first one is kept) and get the unique index.
+    with target_engine.begin() as conn:
+        has_index = conn.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :name"),
+                                 {'name': READING_IDENTITY_INDEX}).scalar()
+        if has_index:
+            return 0
+
+        columns = [row[1] for row in conn.execute(text("PRAGMA table_info(environmental_metrics)"))]
+        if 'source' not in columns:
+            conn.execute(text("ALTER TABLE environmental_metrics ADD COLUMN source VARCHAR NOT NULL DEFAULT ''"))
+        removed = conn.execute(text(
+            "DELETE FROM environmental_metrics WHERE id NOT IN "
+            "(SELECT MIN(id) FROM environmental_metrics GROUP BY date, source)"
+        )).rowcount
+        conn.execute(text(f"CREATE UNIQUE INDEX {READING_IDENTITY_INDEX} ON environmental_metrics (date, source)"))
+
+    if removed:
+        logger.info(f"Removed {removed} duplicate readings while adding the (date, source) key")
+        # Forces _ensure_ledger to rebuild the totals without the removed rows.
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM ledger_factors"))
+    return removed
+
 try:
     engine = create_engine(SQLITE_URL)
 
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        # Only takes effect on a fresh database file; existing files are
+        # switched over by the one-off VACUUM in compact_storage(full=True).
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        cursor.close()
+
     Session = sessionmaker(bind=engine)
     session = Session()
 
@@ -38,9 +154,90 @@ try:
         Column('soil_moisture', Float, nullable=False),
         Column('water_usage', Float, nullable=False),
         Column('energy_consumption', Float, nullable=False),
+        # Gateway or import the reading came from; '' for readings entered in the dashboard.
+        Column('source', String, nullable=False, server_default=''),
+        Index(READING_IDENTITY_INDEX, 'date', 'source', unique=True),
+    )
+
+    environmental_metrics_daily = Table(
+        'environmental_metrics_daily',
+        metadata,
+        Column('day', String, primary_key=True),
+        Column('sample_count', Integer, nullable=False),
+        *[Column(f'{metric}_{agg}', Float, nullable=False)
+          for metric in METRIC_COLUMNS for agg in ('sum', 'min', 'max')],
+    )
+
+    # Serialized per-day quantile sketches, see quantile_sketch.py.
+    metric_sketches = Table(
+        'metric_sketches',
+        metadata,
+        Column('day', String, primary_key=True),
+        Column('metric', String, primary_key=True),
+        Column('sample_count', Integer, nullable=False),
+        Column('payload', LargeBinary, nullable=False),
+    )
+
+    # Per-day resource totals plus running totals, maintained at insert time so
+    # any range total is the difference of two cumulative rows.
+    resource_ledger = Table(
+        'resource_ledger',
+        metadata,
+        Column('day', String, primary_key=True),
+        *[Column(quantity, Float, nullable=False) for quantity in LEDGER_QUANTITIES],
+        *[Column(f'cum_{quantity}', Float, nullable=False) for quantity in LEDGER_QUANTITIES],
+    )
+
+    # Factor set the ledger was computed with; a mismatch triggers a rebuild.
+    ledger_factors = Table(
+        'ledger_factors',
+        metadata,
+        Column('name', String, primary_key=True),
+        Column('value', Float, nullable=False),
+    )
+
+    # Data-quality bitmask per raw reading id, see data_quality.py.
+    metric_quality_flags = Table(
+        'metric_quality_flags',
+        metadata,
+        Column('id', Integer, primary_key=True),
+        Column('flags', Integer, nullable=False),
+    )
+
+    # Next id to hand out when raw readings are written to partition shards.
+    partition_sequence = Table(
+        'partition_sequence',
+        metadata,
+        Column('name', String, primary_key=True),
+        Column('next_id', Integer, nullable=False),
+    )
+
+    # Bumped when upserts change stored readings, which row counts and ids cannot show.
+    metric_revisions = Table(
+        'metric_revisions',
+        metadata,
+        Column('name', String, primary_key=True),
+        Column('revision', Integer, nullable=False),
+    )
+
+    # Only ever created in block-format sealed shards, so it has its own metadata.
+    metric_blocks = Table(
+        'metric_blocks',
+        MetaData(),
+        Column('id', Integer, primary_key=True),
+        Column('start_us', Integer, nullable=False),
+        Column('end_us', Integer, nullable=False),
+        Column('max_id', Integer, nullable=False),
+        Column('row_count', Integer, nullable=False),
+        Column('dates', LargeBinary, nullable=False),
+        Column('ids', LargeBinary, nullable=False),
+        Column('sources', String, nullable=False),
+        Column('source_codes', LargeBinary, nullable=False),
+        *[Column(metric, LargeBinary, nullable=False) for metric in METRIC_COLUMNS],
     )
 
     metadata.create_all(engine)
+    _ensure_reading_identity(engine)
 
     db_available = True
     logger.info("Successfully set up SQLite database")
@@ -49,6 +246,250 @@ except Exception as e:
     logger.error(f"Database setup error: {e}")
     logger.info("Falling back to sample data")
 
+def _query_cache_key(sql, params=None):
+    normalized_sql = ' '.join(str(sql).split())
+    normalized_params = tuple(sorted((params or {}).items()))
+    return normalized_sql, normalized_params
+
+def _query_cache_get(key, version):
+    with _query_cache_lock:
+        entry = _query_cache.get(key)
+        if entry is not None and (version is None or entry['version'] != version):
+            # Another process (the ingest service, an import) wrote since the entry was stored.
+            del _query_cache[key]
+            _query_cache_stats['invalidations'] += 1
+            entry = None
+        if entry is None:
+            _query_cache_stats['misses'] += 1
+            return None
+        _query_cache.move_to_end(key)
+        _query_cache_stats['hits'] += 1
+    # Callers get their own copy so they can't corrupt the shared entry.
+    return entry['frame'].copy()
+
+def _query_cache_put(key, frame, version, start=None, end=None):
+    # version must be read before the query, so a write racing it only makes the entry look stale.
+    if QUERY_CACHE_SIZE <= 0 or version is None:
+        return
+
+    entry = {
+        'frame': frame.copy(),
+        'version': version,
+        'start': None if start is None else pd.Timestamp(start),
+        'end': None if end is None else pd.Timestamp(end),
+    }
+    with _query_cache_lock:
+        _query_cache[key] = entry
+        _query_cache.move_to_end(key)
+        while len(_query_cache) > QUERY_CACHE_SIZE:
+            _query_cache.popitem(last=False)
+            _query_cache_stats['evictions'] += 1
+
+def invalidate_query_cache(start=None, end=None):
+    # Drops only the entries whose date range overlaps the written [start, end] span.
+    start = None if start is None else pd.Timestamp(start)
+    end = None if end is None else pd.Timestamp(end)
+
+    with _query_cache_lock:
+        stale = [
+            key for key, entry in _query_cache.items()
+            if (start is None or entry['end'] is None or entry['end'] >= start)
+            and (end is None or entry['start'] is None or entry['start'] <= end)
+        ]
+        for key in stale:
+            del _query_cache[key]
+        _query_cache_stats['invalidations'] += len(stale)
+
+    return len(stale)
+
+def clear_query_cache():
+    with _query_cache_lock:
+        _query_cache.clear()
+
+def _read_sql(query, params=None):
+    with read_engine() as source:
+        return pd.read_sql(query, source, params=params)
+
+def get_query_cache_stats():
+    with _query_cache_lock:
+        stats = dict(_query_cache_stats)
+        stats['size'] = len(_query_cache)
+        stats['max_size'] = QUERY_CACHE_SIZE
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+    return stats
+
+def _collect_cache_metrics():
+    stats = get_query_cache_stats()
+    return [
+        ('query_cache_hits_total', 'counter', 'Query cache hits', stats['hits']),
+        ('query_cache_misses_total', 'counter', 'Query cache misses', stats['misses']),
+        ('query_cache_hit_ratio', 'gauge', 'Share of query cache lookups that hit', stats['hit_rate']),
+        ('query_cache_entries', 'gauge', 'Frames held in the query cache', stats['size']),
+    ]
+
+register_collector(_collect_cache_metrics)
+
+def _wait_for_replica_readers():
+    # Called with _replica_lock held, which keeps new readers out meanwhile.
+    while _replica_readers:
+        _replica_idle.wait()
+
+def _replica_backup():
+    # SQLite's online backup API copies every page under one read lock, so the
+    # replica starts from a consistent snapshot even while writers are active.
+    _wait_for_replica_readers()
+    source = engine.raw_connection()
+    target = _replica_state['engine'].raw_connection()
+    try:
+        source.driver_connection.backup(target.driver_connection)
+    finally:
+        target.close()
+        source.close()
+
+def _replica_set_revision(conn, revision):
+    conn.execute(text(
+        "INSERT INTO metric_revisions (name, revision) VALUES ('environmental_metrics', :revision) "
+        "ON CONFLICT (name) DO UPDATE SET revision = excluded.revision"
+    ), {'revision': revision})
+
+def _replica_sync():
+    # PRAGMA data_version on a connection that never writes changes whenever any
+    # other connection commits, so an unchanged database costs one cheap check.
+    data_version = _replica_state['watch'].execute("PRAGMA data_version").fetchone()[0]
+    if data_version == _replica_state['data_version']:
+        return
+
+    replica = _replica_state['engine']
+    with engine.connect() as conn:
+        count, revision = conn.execute(text("SELECT COUNT(*) FROM environmental_metrics")).scalar(), _metric_revision(conn)
+    with replica.connect() as conn:
+        replica_count, replica_max_id = conn.execute(text("SELECT COUNT(*), MAX(id) FROM environmental_metrics")).one()
+        replica_revision = _metric_revision(conn)
+
+    new_rows = None
+    if revision == replica_revision:
+        new_rows = pd.read_sql(text("SELECT * FROM environmental_metrics WHERE id > :last_id"), engine,
+                               params={'last_id': int(replica_max_id or 0)})
+
+    # Pure appends (including other processes') are copied by id; anything else reloads the replica.
+    if new_rows is not None and count - replica_count == len(new_rows):
+        if len(new_rows):
+            _wait_for_replica_readers()
+            with replica.begin() as conn:
+                new_rows.to_sql('environmental_metrics', conn, if_exists='append', index=False)
+    else:
+        _replica_backup()
+        logger.info(f"Reloaded read replica with {count} records")
+    _replica_state['data_version'] = data_version
+
+def _replica_apply(start, end):
+    # Our own writes replace the written date range in the replica, which also
+    # covers updated rows without a full reload.
+    if _replica_state['engine'] is None or start is None or end is None:
+        return
+
+    params = {'start': _sql_timestamp(start), 'end': _sql_timestamp(end)}
+    try:
+        with _replica_lock:
+            # The revision is read first: an update committed after it forces a reload on the next sync.
+            with engine.connect() as conn:
+                revision = _metric_revision(conn)
+            rows = pd.read_sql(text("SELECT * FROM environmental_metrics WHERE date >= :start AND date <= :end"),
+                               engine, params=params)
+            _wait_for_replica_readers()
+            with _replica_state['engine'].begin() as conn:
+                conn.execute(text("DELETE FROM environmental_metrics WHERE date >= :start AND date <= :end"), params)
+                rows.to_sql('environmental_metrics', conn, if_exists='append', index=False)
+                _replica_set_revision(conn, revision)
+    except Exception as e:
+        logger.error(f"Error applying writes to read replica: {e}")
+        _replica_state['data_version'] = None
+
+def start_read_replica():
+    if not db_available or PARTITION_GRANULARITY or not engine.url.database or engine.url.database == ':memory:':
+        return False
+
+    with _replica_lock:
+        if _replica_state['engine'] is not None:
+            return True
+        try:
+            # A named shared-cache database, so every reader gets its own pooled
+            # connection to the same pages. The keeper connection holds it in
+            # memory while the pool has none open.
+            replica_url = f"file:metrics_replica_{os.getpid()}_{id(_replica_state)}?mode=memory&cache=shared"
+            _replica_state['keeper'] = sqlite3.connect(replica_url, uri=True, check_same_thread=False)
+            _replica_state['engine'] = create_engine(f"sqlite:///{replica_url}&uri=true", poolclass=QueuePool,
+                                                     connect_args={'check_same_thread': False})
+            _replica_state['watch'] = sqlite3.connect(engine.url.database, check_same_thread=False)
+            _replica_state['data_version'] = _replica_state['watch'].execute("PRAGMA data_version").fetchone()[0]
+            _replica_backup()
+            logger.info(f"Started in-memory read replica of {engine.url.database}")
+            return True
+        except Exception as e:
+            logger.error(f"Error starting read replica: {e}")
+            if _replica_state['keeper'] is not None:
+                _replica_state['keeper'].close()
+            _replica_state['engine'] = _replica_state['keeper'] = None
+            _replica_state['failed'] = True
+            return False
+
+def _replica_enabled():
+    if READ_REPLICA and _replica_state['engine'] is None and not _replica_state['failed']:
+        start_read_replica()
+    return _replica_state['engine'] is not None
+
+@contextmanager
+def read_engine():
+    # Engine for reads of raw readings: the in-memory replica, brought up to
+    # date first, when METRICS_READ_REPLICA is on, otherwise the database itself.
+    # Reads from different sessions run concurrently; a sync or an applied
+    # write waits for them to finish and holds new ones back until it's done.
+    global _replica_readers
+    if not _replica_enabled():
+        yield engine
+        return
+
+    with _replica_lock:
+        _replica_sync()
+        _replica_readers += 1
+    try:
+        yield _replica_state['engine']
+    finally:
+        with _replica_lock:
+            _replica_readers -= 1
+            _replica_idle.notify_all()
+
+def verify_read_replica():
+    # Consistency check for tests and diagnostics: compares every raw reading
+    # in the replica with the database after a sync.
+    if not _replica_enabled():
+        return None
+
+    query = text("SELECT * FROM environmental_metrics ORDER BY id")
+    with _replica_lock:
+        _replica_sync()
+        expected = pd.read_sql(query, engine)
+        actual = pd.read_sql(query, _replica_state['engine'])
+        with engine.connect() as conn:
+            revision = _metric_revision(conn)
+        with _replica_state['engine'].connect() as conn:
+            replica_revision = _metric_revision(conn)
+
+    merged = expected.merge(actual, on='id', how='outer', suffixes=('', '_replica'), indicator=True)
+    mismatched = merged['_merge'] != 'both'
+    for column in expected.columns.drop('id'):
+        mismatched |= merged[column].astype(str) != merged[f'{column}_replica'].astype(str)
+    return {
+        'consistent': not mismatched.any() and revision == replica_revision,
+        'rows': len(expected),
+        'replica_rows': len(actual),
+        'revision': revision,
+        'replica_revision': replica_revision,
+        'mismatched_ids': merged.loc[mismatched, 'id'].astype(int).tolist()[:100],
+    }
+
+@instrument('load_data_from_db')
 def load_data_from_db():
     if not db_available:
         logger.info("Database not available, using sample data")
@@ -57,21 +498,29 @@ def load_data_from_db():
 
     try:
         query = "SELECT * FROM environmental_metrics ORDER BY date"
-        df = pd.read_sql(query, engine)
+        cache_key = _query_cache_key(query)
+        version = get_data_version()
+        cached = _query_cache_get(cache_key, version)
+        if cached is not None:
+            return cached
+
+        df = load_partitioned() if PARTITION_GRANULARITY else _read_sql(query)
 
-        if len(df) == 0:
+        if len(df) == 0 and not _has_rolled_up_history():
             logger.info("No data in database, initializing with sample data")
             from data.sample_data import get_environmental_data
             sample_data = get_environmental_data()
 
             insert_data(sample_data)
 
-            df = pd.read_sql(query, engine)
+            version = get_data_version()
+            df = load_partitioned() if PARTITION_GRANULARITY else _read_sql(query)
 
         if 'date' in df.columns:
             df['date'] = pd.to_datetime(df['date'])
             logger.info("Converted date column to datetime")
 
+        _query_cache_put(cache_key, df, version)
         return df
     except Exception as e:
         logger.error(f"Error loading data from database: {e}")
@@ -79,22 +528,182 @@ def load_data_from_db():
         from data.sample_data import get_environmental_data
         return get_environmental_data()
 
+def _has_rolled_up_history():
+    # Retention can leave the raw table empty while the daily rollups and the
+    # ledger still hold every reading, which must not be mistaken for a new database.
+    with engine.connect() as conn:
+        return bool(conn.execute(text(
+            "SELECT EXISTS (SELECT 1 FROM environmental_metrics_daily) OR EXISTS (SELECT 1 FROM resource_ledger)"
+        )).scalar())
+
+@instrument('insert_data')
 def insert_data(df):
     if not db_available:
         logger.warning("Database not available, cannot insert data")
         return
 
+    # Appends go through the upsert path, so a replayed batch cannot duplicate rows.
+    upsert_data(df)
+
+def insert_records(records):
+    if not db_available:
+        logger.warning("Database not available, cannot insert records")
+        return 0
+    if not records:
+        return 0
+
+    result = upsert_records(records)
+    return len(records) if result is not None else 0
+
+def _upsert_statement():
+    statement = sqlite_insert(environmental_metrics)
+    return statement.on_conflict_do_update(
+        index_elements=['date', 'source'],
+        set_={metric: statement.excluded[metric] for metric in METRIC_COLUMNS},
+    )
+
+def _upsert_batch(conn, ledger_conn, batch, allocate_ids=False):
+    # One range read finds the stored versions of the batch's readings, so
+    # unchanged rows are skipped and the ledger gets exact deltas.
+    keys = batch['date'].map(_sql_timestamp)
+    stored = pd.read_sql(
+        text(f"SELECT id, date, source, {', '.join(METRIC_COLUMNS)} FROM environmental_metrics "
+             "WHERE date >= :start AND date <= :end"),
+        conn, params={'start': keys.min(), 'end': keys.max()},
+    )
+    merged = batch.assign(key=keys.to_numpy()).merge(
+        stored.rename(columns={'date': 'key', **{metric: f'{metric}_stored' for metric in METRIC_COLUMNS}}),
+        on=['key', 'source'], how='left',
+    )
+
+    is_new = merged['id'].isna().to_numpy()
+    changed = is_new.copy()
+    for metric in METRIC_COLUMNS:
+        changed |= (merged[metric] != merged[f'{metric}_stored']).to_numpy()
+    merged = merged[changed]
+    is_new = is_new[changed]
+    if len(merged) == 0:
+        return 0, 0
+
+    rows = merged[['date', 'source'] + METRIC_COLUMNS].copy()
+    if allocate_ids:
+        # Partition shards take their ids from the shared counter in the main database.
+        ids = merged['id'].to_numpy(dtype=float, copy=True)
+        first_id = _allocate_partition_ids(ledger_conn, int(is_new.sum()))
+        ids[is_new] = range(first_id, first_id + int(is_new.sum()))
+        rows['id'] = ids.astype(int)
+    records = rows.to_dict('records')
+    for record in records:
+        record['date'] = record['date'].to_pydatetime()
+    conn.execute(_upsert_statement(), records)
+
+    replaced = merged[~is_new]
+    _update_ledger(
+        ledger_conn,
+        pd.concat([merged['date'], replaced['date']]),
+        pd.concat([merged['water_usage'], -replaced['water_usage_stored']]),
+        pd.concat([merged['energy_consumption'], -replaced['energy_consumption_stored']]),
+        readings=[1] * len(merged) + [-1] * len(replaced),
+    )
+    if len(replaced):
+        ledger_conn.execute(text(
+            "INSERT INTO metric_revisions (name, revision) VALUES ('environmental_metrics', 1) "
+            "ON CONFLICT (name) DO UPDATE SET revision = revision + 1"
+        ))
+        # Changed readings have to be judged again by the data-quality stage.
+        ledger_conn.execute(text(f"DELETE FROM metric_quality_flags WHERE id IN ({', '.join(str(int(row_id)) for row_id in replaced['id'])})"))
+    return int(is_new.sum()), len(replaced)
+
+@instrument('upsert_data')
+def upsert_data(df, batch_size=None):
+    if not db_available:
+        logger.warning("Database not available, cannot upsert data")
+        return None
+    if len(df) == 0:
+        return {'inserted': 0, 'updated': 0, 'unchanged': 0}
+
+    try:
+        df = df.copy()
+        df['date'] = pd.to_datetime(df['date'])
+        df['source'] = df['source'].fillna('').astype(str) if 'source' in df.columns else ''
+        # A key repeated within the input ends with its last values, as row-by-row upserts would.
+        df = df.drop_duplicates(['date', 'source'], keep='last').sort_values('date')
+    except Exception as e:
+        logger.error(f"Error preparing data for upsert: {e}")
+        return None
+
+    batch_size = batch_size or UPSERT_BATCH_SIZE
+    inserted = updated = 0
     try:
-        df_copy = df.copy()
+        _ensure_ledger()
+        for start in range(0, len(df), batch_size):
+            batch = df.iloc[start:start + batch_size]
+            with engine.begin() as conn:
+                # pysqlite only starts the transaction at the first write, after
+                # _upsert_batch has read the stored rows; taking the write lock up
+                # front makes concurrent retries see each other's rows.
+                conn.exec_driver_sql("BEGIN IMMEDIATE")
+                if PARTITION_GRANULARITY:
+                    for key, rows in batch.groupby(batch['date'].map(_partition_key)):
+                        if is_partition_sealed(key):
+                            raise ValueError(f"Partition {key} is sealed and read-only")
+                        with _partition_engine(key).begin() as shard_conn:
+                            shard_conn.exec_driver_sql("BEGIN IMMEDIATE")
+                            batch_inserted, batch_updated = _upsert_batch(shard_conn, conn, rows, allocate_ids=True)
+                        inserted += batch_inserted
+                        updated += batch_updated
+                else:
+                    batch_inserted, batch_updated = _upsert_batch(conn, conn, batch)
+                    inserted += batch_inserted
+                    updated += batch_updated
+        logger.info(f"Upserted {len(df)} records: {inserted} inserted, {updated} updated")
+    except Exception as e:
+        logger.error(f"Error upserting data into database: {e}")
+        return None
+    finally:
+        # Batches committed before a failure are already visible.
+        _on_rows_written(df['date'].min(), df['date'].max())
+
+    _maybe_apply_retention()
+    return {'inserted': inserted, 'updated': updated, 'unchanged': len(df) - inserted - updated}
+
+def upsert_records(records, batch_size=None):
+    if not records:
+        return {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    return upsert_data(pd.DataFrame(records), batch_size)
+
+def _on_rows_written(start, end):
+    _replica_apply(start, end)
+    invalidate_query_cache(start, end)
+    invalidate_metric_sketches(start, end)
+    for listener in list(_write_listeners):
+        try:
+            listener(start, end)
+        except Exception as e:
+            logger.error(f"Error in write listener: {e}")
+
+def add_write_listener(callback):
+    if callback not in _write_listeners:
+        _write_listeners.append(callback)
 
-        if 'date' in df_copy.columns:
-            df_copy['date'] = pd.to_datetime(df_copy['date'])
+def invalidate_metric_sketches(start=None, end=None):
+    conditions = []
+    params = {}
+    if start is not None:
+        conditions.append("day >= :start_day")
+        params['start_day'] = pd.Timestamp(start).strftime('%Y-%m-%d')
+    if end is not None:
+        conditions.append("day <= :end_day")
+        params['end_day'] = pd.Timestamp(end).strftime('%Y-%m-%d')
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
 
-        df_copy.to_sql('environmental_metrics', engine, if_exists='append', index=False)
-        logger.info(f"Inserted {len(df_copy)} records into database")
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(f"DELETE FROM metric_sketches {where}"), params)
     except Exception as e:
-        logger.error(f"Error inserting data into database: {e}")
+        logger.error(f"Error invalidating metric sketches: {e}")
 
+@instrument('add_metrics_record')
 def add_metrics_record(temperature, humidity, soil_moisture, water_usage, energy_consumption):
     if not db_available:
         logger.warning("Database not available, cannot add new metrics record")
@@ -111,20 +720,967 @@ def add_metrics_record(temperature, humidity, soil_moisture, water_usage, energy
         }
 
         df = pd.DataFrame([new_record])
-        insert_data(df)
+        if upsert_data(df) is None:
+            return False
         logger.info("Added new metrics record successfully")
         return True
     except Exception as e:
         logger.error(f"Error adding new metrics record: {e}")
         return False
 
+@instrument('check_connection')
 def check_connection():
     if not db_available or engine is None:
         return False
 
     try:
-        with engine.connect() as conn:
+        with read_engine() as source, source.connect() as conn:
             return True
     except Exception as e:
         logger.error(f"Database connection check failed: {e}")
         return False
+
+def _metric_revision(conn):
+    revision = conn.execute(text("SELECT revision FROM metric_revisions WHERE name = 'environmental_metrics'")).scalar()
+    return int(revision or 0)
+
+def get_data_version():
+    # (row count, highest id, revision): changes on every append, deletion and upserted update.
+    if not db_available:
+        return None
+
+    try:
+        if PARTITION_GRANULARITY:
+            versions = [_partition_version(key) for key in list_partitions()]
+            with engine.connect() as conn:
+                revision = _metric_revision(conn)
+            return sum(count for count, _ in versions), max([max_id for _, max_id in versions], default=0), revision
+        with read_engine() as source, source.connect() as conn:
+            return _raw_version(conn)
+    except Exception as e:
+        logger.error(f"Error reading data version: {e}")
+        return None
+
+def _raw_version(conn):
+    count, max_id = conn.execute(text("SELECT COUNT(*), MAX(id) FROM environmental_metrics")).one()
+    return int(count), int(max_id or 0), _metric_revision(conn)
+
+@instrument('load_data_with_version')
+def load_data_with_version():
+    # Uncached read of every raw reading together with the data version it was
+    # read at, for callers that persist results tagged with that version.
+    # Returns (frame, None) if the version can't be pinned down.
+    if not db_available:
+        return pd.DataFrame(), None
+
+    query = "SELECT * FROM environmental_metrics ORDER BY date"
+    try:
+        if PARTITION_GRANULARITY:
+            # Shards can't share a transaction, so the load only counts if no write landed during it.
+            version = get_data_version()
+            df = load_partitioned()
+            if get_data_version() != version:
+                version = None
+        else:
+            with read_engine() as source, source.connect() as conn:
+                # One read transaction, so the version and the rows come from the same snapshot.
+                conn.exec_driver_sql("BEGIN")
+                version = _raw_version(conn)
+                df = pd.read_sql(text(query), conn)
+    except Exception as e:
+        logger.error(f"Error loading versioned data: {e}")
+        return pd.DataFrame(), None
+
+    df['date'] = pd.to_datetime(df['date'])
+    # Also a fresh entry for load_data_from_db, unless the table is empty: that
+    # call has to miss the cache to seed a new database.
+    if len(df) > 0:
+        _query_cache_put(_query_cache_key(query), df, version)
+    return df, version
+
+def _empty_metrics_frame():
+    # Same columns a query on an empty table returns, for reads that find no shards.
+    return pd.DataFrame(columns=[column.name for column in environmental_metrics.columns])
+
+@instrument('load_rows_after')
+def load_rows_after(last_id, limit=None):
+    if not db_available:
+        return pd.DataFrame()
+
+    query = "SELECT * FROM environmental_metrics WHERE id > :last_id ORDER BY id"
+    params = {'last_id': int(last_id)}
+    if limit is not None:
+        query += " LIMIT :limit"
+        params['limit'] = int(limit)
+
+    try:
+        if PARTITION_GRANULARITY:
+            # Partition ids are globally increasing, so only recent shards return rows.
+            frames = [_block_rows_after(key, last_id, limit) if _is_block_shard(key)
+                      else pd.read_sql(text(query), _partition_engine(key), params=params)
+                      for key in list_partitions()]
+            df = pd.concat(frames, ignore_index=True).sort_values('id') if frames else _empty_metrics_frame()
+            if limit is not None:
+                df = df.head(limit)
+        else:
+            df = _read_sql(text(query), params)
+    except Exception as e:
+        logger.error(f"Error loading new rows: {e}")
+        return pd.DataFrame()
+
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+def _block_rows_after(key, last_id, limit=None):
+    frame = _sealed_frame(key)
+    rows = frame[frame['id'] > last_id].sort_values('id')
+    return rows if limit is None else rows.head(limit)
+
+@instrument('load_latest_rows')
+def load_latest_rows(limit):
+    # The newest readings by date, oldest first. A backdated reading with a
+    # high id is only included if its date is recent enough.
+    if not db_available:
+        return pd.DataFrame()
+
+    query = text("SELECT * FROM environmental_metrics ORDER BY date DESC, id DESC LIMIT :limit")
+    params = {'limit': int(limit)}
+
+    try:
+        if PARTITION_GRANULARITY:
+            # Walk shards newest first and stop once enough rows are collected.
+            frames = []
+            collected = 0
+            for key in reversed(list_partitions()):
+                if _is_block_shard(key):
+                    frame = _sealed_frame(key).sort_values(['date', 'id'], ascending=False).head(limit)
+                else:
+                    frame = pd.read_sql(query, _partition_engine(key), params=params)
+                frames.append(frame)
+                collected += len(frame)
+                if collected >= limit:
+                    break
+            # Shards cover consecutive periods, so newest-first shard order is also date order.
+            df = pd.concat(frames, ignore_index=True).head(limit) if frames else _empty_metrics_frame()
+        else:
+            df = _read_sql(query, params)
+    except Exception as e:
+        logger.error(f"Error loading latest rows: {e}")
+        return pd.DataFrame()
+
+    df = df.iloc[::-1].reset_index(drop=True)
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+def _sql_timestamp(value):
+    # Matches the text format SQLAlchemy's DateTime type writes to SQLite, so
+    # plain string comparison on the date column orders correctly.
+    return pd.Timestamp(value).strftime('%Y-%m-%d %H:%M:%S.%f')
+
+def _date_bounds(start_date, end_date):
+    # Plain dates cover the whole day, same as filter_data_by_date.
+    if start_date is not None and not isinstance(start_date, datetime):
+        start_date = datetime.combine(start_date, datetime.min.time())
+    if end_date is not None and not isinstance(end_date, datetime):
+        end_date = datetime.combine(end_date, datetime.max.time())
+    return start_date, end_date
+
+def _rollup_columns():
+    columns = ['day', 'sample_count']
+    updates = ['sample_count = sample_count + excluded.sample_count']
+    for metric in METRIC_COLUMNS:
+        columns += [f'{metric}_sum', f'{metric}_min', f'{metric}_max']
+        updates += [
+            f'{metric}_sum = {metric}_sum + excluded.{metric}_sum',
+            f'{metric}_min = MIN({metric}_min, excluded.{metric}_min)',
+            f'{metric}_max = MAX({metric}_max, excluded.{metric}_max)',
+        ]
+    return columns, updates
+
+def _rollup_statement(table='environmental_metrics'):
+    columns, updates = _rollup_columns()
+    selects = ['date(date) AS day', 'COUNT(*)']
+    for metric in METRIC_COLUMNS:
+        selects += [f'SUM({metric})', f'MIN({metric})', f'MAX({metric})']
+
+    # "WHERE true" avoids SQLite's INSERT ... SELECT ... ON CONFLICT parse ambiguity.
+    return text(f"""
+        INSERT INTO environmental_metrics_daily ({', '.join(columns)})
+        SELECT {', '.join(selects)}
+        FROM (
+            SELECT * FROM {table}
+            WHERE date < :cutoff
+            ORDER BY date, id
+            LIMIT :batch_size
+        )
+        WHERE true
+        GROUP BY day
+        ON CONFLICT(day) DO UPDATE SET {', '.join(updates)}
+    """)
+
+def _retention_flags_statement(table='environmental_metrics'):
+    # Quality flags of the batch _retention_delete_statement removes next.
+    return text(f"""
+        DELETE FROM metric_quality_flags WHERE id IN (
+            SELECT id FROM {table}
+            WHERE date < :cutoff
+            ORDER BY date, id
+            LIMIT :batch_size
+        )
+    """)
+
+def _retention_delete_statement(table='environmental_metrics'):
+    return text(f"""
+        DELETE FROM {table} WHERE id IN (
+            SELECT id FROM {table}
+            WHERE date < :cutoff
+            ORDER BY date, id
+            LIMIT :batch_size
+        )
+    """)
+
+def _rollup_frame(conn, frame):
+    # Same daily aggregates as _rollup_statement, for readings already in memory.
+    columns, updates = _rollup_columns()
+    grouped = frame.groupby(pd.to_datetime(frame['date']).dt.strftime('%Y-%m-%d').rename('day'))
+    days = grouped.size().rename('sample_count').to_frame()
+    for metric in METRIC_COLUMNS:
+        days[f'{metric}_sum'] = grouped[metric].sum()
+        days[f'{metric}_min'] = grouped[metric].min()
+        days[f'{metric}_max'] = grouped[metric].max()
+    conn.execute(text(f"""
+        INSERT INTO environmental_metrics_daily ({', '.join(columns)})
+        VALUES ({', '.join(f':{column}' for column in columns)})
+        ON CONFLICT(day) DO UPDATE SET {', '.join(updates)}
+    """), days.reset_index()[columns].to_dict('records'))
+
+def _rollup_in_batches(conn, table, params):
+    removed_total = 0
+    rollup = _rollup_statement(table)
+    delete_flags = _retention_flags_statement(table)
+    delete = _retention_delete_statement(table)
+    while True:
+        with conn.begin():
+            conn.execute(rollup, params)
+            conn.execute(delete_flags, params)
+            removed = conn.execute(delete, params).rowcount
+        removed_total += removed
+        if removed < params['batch_size']:
+            return removed_total
+
+def _apply_partition_retention(cutoff, params):
+    removed_total = 0
+    for key in list_partitions():
+        shard_start, shard_end = _partition_bounds(key)
+        if shard_start >= cutoff:
+            continue
+
+        if is_partition_sealed(key):
+            # Sealed shards are read-only, so they are rolled up and dropped
+            # whole once their entire period is past the cutoff.
+            if shard_end > cutoff:
+                continue
+            frame = _sealed_frame(key)
+            if len(frame):
+                with engine.begin() as conn:
+                    _rollup_frame(conn, frame)
+                    conn.execute(text("DELETE FROM metric_quality_flags WHERE id = :id"),
+                                 [{'id': int(row_id)} for row_id in frame['id']])
+            _drop_partition(key)
+            removed_total += len(frame)
+            continue
+
+        # Attaching the shard keeps the rollup and the delete in one transaction.
+        with engine.connect() as conn:
+            conn.exec_driver_sql("ATTACH DATABASE ? AS shard", (os.path.abspath(_partition_path(key)),))
+            conn.commit()
+            try:
+                removed_total += _rollup_in_batches(conn, 'shard.environmental_metrics', params)
+            finally:
+                conn.rollback()
+                conn.exec_driver_sql("DETACH DATABASE shard")
+                conn.commit()
+    return removed_total
+
+def _raw_days_before(cutoff):
+    # Days that still have raw readings older than cutoff, in every store.
+    query = text("SELECT DISTINCT date(date) FROM environmental_metrics WHERE date < :cutoff")
+    params = {'cutoff': _sql_timestamp(cutoff)}
+    sources = [engine] + [_partition_engine(key) for key in list_partitions()
+                          if _partition_bounds(key)[0] < cutoff and not is_partition_sealed(key)]
+    days = set()
+    for source in sources:
+        with source.connect() as conn:
+            days.update(day for (day,) in conn.execute(query, params))
+    for key in list_partitions():
+        shard_start, shard_end = _partition_bounds(key)
+        if is_partition_sealed(key) and shard_end <= cutoff:
+            days.update(_sealed_frame(key)['date'].dt.strftime('%Y-%m-%d'))
+    return sorted(days)
+
+def apply_retention_policy(retention_days=None, batch_size=None):
+    if not db_available:
+        logger.warning("Database not available, cannot apply retention policy")
+        return 0
+
+    retention_days = RETENTION_DAYS if retention_days is None else retention_days
+    batch_size = batch_size or RETENTION_BATCH_SIZE
+    if retention_days <= 0:
+        return 0
+
+    # Only whole days are rolled up so a daily aggregate never mixes with raw rows.
+    cutoff = datetime.combine((datetime.now() - timedelta(days=retention_days)).date(), datetime.min.time())
+    params = {'cutoff': _sql_timestamp(cutoff), 'batch_size': batch_size}
+
+    total_removed = 0
+    try:
+        # Quantile sketches can only be built from raw readings, so every day
+        # about to be rolled up gets its sketch first.
+        from quantile_sketch import persist_daily_sketches
+        persist_daily_sketches(_raw_days_before(cutoff))
+
+        with engine.connect() as conn:
+            total_removed += _rollup_in_batches(conn, 'environmental_metrics', params)
+        if PARTITION_GRANULARITY:
+            total_removed += _apply_partition_retention(cutoff, params)
+
+        if total_removed:
+            logger.info(f"Rolled up {total_removed} raw records older than {cutoff:%Y-%m-%d}")
+            invalidate_query_cache(None, cutoff)
+            compact_storage()
+    except Exception as e:
+        logger.error(f"Error applying retention policy: {e}")
+
+    return total_removed
+
+def compact_storage(pages=INCREMENTAL_VACUUM_PAGES, full=False):
+    # Retention calls this on the write path, where only the bounded incremental
+    # vacuum runs. full=True is for maintenance windows: it rebuilds files
+    # created before incremental vacuum was enabled and refreshes statistics.
+    if not db_available:
+        return
+
+    try:
+        with engine.connect() as conn:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            incremental = conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2
+            if full:
+                if not incremental:
+                    conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+                    conn.exec_driver_sql("VACUUM")
+                else:
+                    conn.exec_driver_sql(f"PRAGMA incremental_vacuum({int(pages)})")
+                conn.exec_driver_sql("ANALYZE")
+            elif incremental:
+                conn.exec_driver_sql(f"PRAGMA incremental_vacuum({int(pages)})")
+                conn.exec_driver_sql("PRAGMA optimize")
+            else:
+                logger.info("Database needs compact_storage(full=True) before freed pages can be reclaimed")
+                return
+        logger.info("Compacted database storage")
+    except Exception as e:
+        logger.error(f"Error compacting database storage: {e}")
+
+def _maybe_apply_retention():
+    global _last_retention_run
+
+    if RETENTION_DAYS <= 0:
+        return
+
+    now = time.monotonic()
+    if _last_retention_run and now - _last_retention_run < RETENTION_CHECK_INTERVAL:
+        return
+
+    _last_retention_run = now
+    apply_retention_policy()
+
+def load_daily_rollups(start_date=None, end_date=None):
+    if not db_available:
+        return pd.DataFrame()
+
+    conditions = []
+    params = {}
+    if start_date is not None:
+        conditions.append("day >= :start")
+        params['start'] = pd.Timestamp(start_date).strftime('%Y-%m-%d')
+    if end_date is not None:
+        conditions.append("day <= :end")
+        params['end'] = pd.Timestamp(end_date).strftime('%Y-%m-%d')
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    try:
+        df = pd.read_sql(text(f"SELECT * FROM environmental_metrics_daily {where} ORDER BY day"), engine, params=params)
+    except Exception as e:
+        logger.error(f"Error loading daily rollups: {e}")
+        return pd.DataFrame()
+
+    result = pd.DataFrame({'date': pd.to_datetime(df['day']), 'sample_count': df['sample_count']})
+    for metric in METRIC_COLUMNS:
+        result[metric] = df[f'{metric}_sum'] / df['sample_count']
+        result[f'{metric}_min'] = df[f'{metric}_min']
+        result[f'{metric}_max'] = df[f'{metric}_max']
+    return result
+
+RESAMPLE_BUCKETS = {
+    'H': "strftime('%Y-%m-%d %H:00:00', date)",
+    'D': "strftime('%Y-%m-%d', date)",
+    'W': "strftime('%Y-%m-%d', date, 'weekday 0', '-6 days')",
+    'M': "strftime('%Y-%m-01', date)",
+}
+RESAMPLE_AGGREGATES = ('mean', 'min', 'max', 'sum')
+
+@instrument('load_resampled')
+def load_resampled(start_date=None, end_date=None, freq='D', aggs=('mean',)):
+    if freq not in RESAMPLE_BUCKETS:
+        raise ValueError(f"Unsupported resample frequency {freq!r}, expected one of {list(RESAMPLE_BUCKETS)}")
+    unknown = [agg for agg in aggs if agg not in RESAMPLE_AGGREGATES]
+    if unknown:
+        raise ValueError(f"Unsupported aggregates {unknown}, expected any of {list(RESAMPLE_AGGREGATES)}")
+
+    if not db_available:
+        logger.warning("Database not available, cannot load resampled data")
+        return pd.DataFrame()
+
+    start_date, end_date = _date_bounds(start_date, end_date)
+
+    raw_conditions = []
+    daily_conditions = []
+    params = {}
+    if start_date is not None:
+        raw_conditions.append("date >= :start")
+        daily_conditions.append("day >= :start_day")
+        params['start'] = _sql_timestamp(start_date)
+        params['start_day'] = pd.Timestamp(start_date).strftime('%Y-%m-%d')
+    if end_date is not None:
+        raw_conditions.append("date <= :end")
+        daily_conditions.append("day <= :end_day")
+        params['end'] = _sql_timestamp(end_date)
+        params['end_day'] = pd.Timestamp(end_date).strftime('%Y-%m-%d')
+
+    raw_columns = ', '.join(
+        f'{metric} AS {metric}_sum, {metric} AS {metric}_min, {metric} AS {metric}_max'
+        for metric in METRIC_COLUMNS
+    )
+    daily_columns = ', '.join(
+        f'{metric}_sum, {metric}_min, {metric}_max' for metric in METRIC_COLUMNS
+    )
+    sources = [
+        f"SELECT date, 1 AS n, {raw_columns} FROM environmental_metrics "
+        f"{'WHERE ' + ' AND '.join(raw_conditions) if raw_conditions else ''}"
+    ]
+    # Daily rollups cannot be split into hours, so they only feed daily or coarser buckets.
+    if freq != 'H':
+        sources.append(
+            f"SELECT day AS date, sample_count AS n, {daily_columns} FROM environmental_metrics_daily "
+            f"{'WHERE ' + ' AND '.join(daily_conditions) if daily_conditions else ''}"
+        )
+    rollup_source = sources[1] if len(sources) > 1 else None
+
+    selects = [f"{RESAMPLE_BUCKETS[freq]} AS bucket", "SUM(n) AS sample_count"]
+    for metric in METRIC_COLUMNS:
+        for agg in aggs:
+            if agg == 'mean':
+                selects.append(f"SUM({metric}_sum) / SUM(n) AS {metric}")
+            else:
+                selects.append(f"{agg.upper()}({metric}_{agg}) AS {metric}_{agg}")
+
+    query = f"""
+        SELECT {', '.join(selects)}
+        FROM ({' UNION ALL '.join(sources)})
+        GROUP BY bucket
+        ORDER BY bucket
+    """
+    cache_key = _query_cache_key(query, params)
+    version = get_data_version()
+    cached = _query_cache_get(cache_key, version)
+    if cached is not None:
+        return cached
+
+    try:
+        if PARTITION_GRANULARITY:
+            df = _resample_partitioned(start_date, end_date, freq, aggs, rollup_source, params)
+        else:
+            df = pd.read_sql(text(query), engine, params=params)
+    except Exception as e:
+        logger.error(f"Error loading resampled data: {e}")
+        return pd.DataFrame()
+
+    df = df.rename(columns={'bucket': 'date'})
+    df['date'] = pd.to_datetime(df['date'])
+    _query_cache_put(cache_key, df, version, start_date, end_date)
+    return df
+
+def _resample_partitioned(start_date, end_date, freq, aggs, rollup_source, params):
+    # Shards are separate files, so their readings are bucketed here, with the
+    # same partial sums, counts and extremes the SQL union feeds on.
+    raw = load_partitioned(start_date, end_date)
+    parts = pd.DataFrame({'date': pd.to_datetime(raw['date']), 'n': 1})
+    for metric in METRIC_COLUMNS:
+        for agg in ('sum', 'min', 'max'):
+            parts[f'{metric}_{agg}'] = raw[metric].astype(float)
+    if rollup_source is not None:
+        daily = pd.read_sql(text(rollup_source), engine, params=params)
+        daily['date'] = pd.to_datetime(daily['date'])
+        if len(daily):
+            parts = pd.concat([parts, daily], ignore_index=True) if len(parts) else daily
+
+    dates = parts['date']
+    if freq == 'H':
+        buckets = dates.dt.floor('h')
+    elif freq == 'W':
+        buckets = dates.dt.normalize() - pd.to_timedelta(dates.dt.weekday, unit='D')
+    elif freq == 'M':
+        buckets = dates.dt.to_period('M').dt.start_time
+    else:
+        buckets = dates.dt.normalize()
+
+    grouped = parts.groupby(buckets.rename('bucket'))
+    df = pd.DataFrame({'sample_count': grouped['n'].sum()})
+    for metric in METRIC_COLUMNS:
+        for agg in aggs:
+            if agg == 'mean':
+                df[metric] = grouped[f'{metric}_sum'].sum() / df['sample_count']
+            else:
+                df[f'{metric}_{agg}'] = getattr(grouped[f'{metric}_{agg}'], agg)()
+    return df.reset_index()
+
+EXPORT_CHUNK_SIZE = 10000
+
+def iter_metrics_chunks(start_date=None, end_date=None, chunksize=EXPORT_CHUNK_SIZE):
+    if not db_available:
+        logger.warning("Database not available, cannot stream metrics")
+        return
+
+    start_date, end_date = _date_bounds(start_date, end_date)
+    conditions = []
+    params = {}
+    if start_date is not None:
+        conditions.append("date >= :start")
+        params['start'] = _sql_timestamp(start_date)
+    if end_date is not None:
+        conditions.append("date <= :end")
+        params['end'] = _sql_timestamp(end_date)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = text(f"SELECT * FROM environmental_metrics {where} ORDER BY date, id")
+
+    if not PARTITION_GRANULARITY:
+        yield from _stream_chunks(engine, query, params, chunksize)
+        return
+
+    # Shards cover consecutive periods, so streaming them in key order keeps date order.
+    start_date = None if start_date is None else pd.Timestamp(start_date)
+    end_date = None if end_date is None else pd.Timestamp(end_date)
+    for key in _partition_keys(start_date, end_date):
+        if is_partition_sealed(key):
+            frame = _read_partition(key, start_date, end_date)
+            for start in range(0, len(frame), chunksize):
+                yield frame.iloc[start:start + chunksize].reset_index(drop=True)
+        else:
+            yield from _stream_chunks(_partition_engine(key), query, params, chunksize)
+
+def _stream_chunks(source, query, params, chunksize):
+    # stream_results keeps a server-side cursor open instead of buffering the result set.
+    with source.connect().execution_options(stream_results=True) as conn:
+        for chunk in pd.read_sql(query, conn, params=params, chunksize=chunksize):
+            chunk['date'] = pd.to_datetime(chunk['date'])
+            yield chunk
+
+def _ledger_frame(days, readings, water, energy):
+    ledger = pd.DataFrame({'day': days, 'readings': readings, 'water': water, 'energy': energy})
+    ledger = ledger.groupby('day', as_index=False).sum().sort_values('day')
+    ledger['cost'] = (ledger['water'] * IMPACT_FACTORS['water_cost_per_liter'] +
+                      ledger['energy'] * IMPACT_FACTORS['energy_cost_per_kwh'])
+    ledger['co2'] = (ledger['water'] * IMPACT_FACTORS['carbon_per_liter'] +
+                     ledger['energy'] * IMPACT_FACTORS['carbon_per_kwh'])
+    return ledger
+
+def _update_ledger(conn, dates, water, energy, readings=1):
+    # readings (and negative amounts) let upserts take replaced values back out.
+    days = pd.to_datetime(pd.Series(list(dates))).dt.strftime('%Y-%m-%d').to_numpy()
+    deltas = _ledger_frame(days, readings, list(water), list(energy))
+    if len(deltas) == 0:
+        return
+
+    cumulative = [f'cum_{quantity}' for quantity in LEDGER_QUANTITIES]
+    create_day = text(f"""
+        INSERT OR IGNORE INTO resource_ledger (day, {', '.join(LEDGER_QUANTITIES + cumulative)})
+        VALUES (:day, {', '.join('0' for _ in LEDGER_QUANTITIES + cumulative)})
+    """)
+    add_daily = text(f"""
+        UPDATE resource_ledger SET {', '.join(f'{quantity} = {quantity} + :{quantity}' for quantity in LEDGER_QUANTITIES)}
+        WHERE day = :day
+    """)
+    conn.execute(create_day, [{'day': day} for day in deltas['day']])
+    conn.execute(add_daily, deltas.to_dict('records'))
+
+    # Running totals are recomputed once from the first touched day on, so a
+    # backfill over many days costs one pass over the later days.
+    first_day = deltas['day'].iloc[0]
+    base = conn.execute(text(
+        f"SELECT {', '.join(cumulative)} FROM resource_ledger WHERE day < :day ORDER BY day DESC LIMIT 1"
+    ), {'day': first_day}).one_or_none()
+    later = pd.read_sql(text(f"SELECT day, {', '.join(LEDGER_QUANTITIES)} FROM resource_ledger WHERE day >= :day ORDER BY day"),
+                        conn, params={'day': first_day})
+    for position, quantity in enumerate(LEDGER_QUANTITIES):
+        later[f'cum_{quantity}'] = later[quantity].cumsum() + (base[position] if base is not None else 0)
+    conn.execute(text(f"""
+        UPDATE resource_ledger SET {', '.join(f'{column} = :{column}' for column in cumulative)}
+        WHERE day = :day
+    """), later[['day'] + cumulative].to_dict('records'))
+
+def _daily_totals(frame):
+    # Same columns as the per-day raw query in rebuild_ledger.
+    return frame.groupby(pd.to_datetime(frame['date']).dt.strftime('%Y-%m-%d').rename('day')).agg(
+        readings=('id', 'size'), water=('water_usage', 'sum'), energy=('energy_consumption', 'sum'),
+    ).reset_index()
+
+def _daily_block_totals(key):
+    return _daily_totals(_sealed_frame(key))
+
+def rebuild_ledger():
+    if not db_available:
+        return
+
+    raw_query = text("""
+        SELECT date(date) AS day, COUNT(*) AS readings, SUM(water_usage) AS water, SUM(energy_consumption) AS energy
+        FROM environmental_metrics GROUP BY day
+    """)
+    rollup_query = text("""
+        SELECT day, sample_count AS readings, water_usage_sum AS water, energy_consumption_sum AS energy
+        FROM environmental_metrics_daily
+    """)
+
+    try:
+        with engine.begin() as conn:
+            totals = pd.concat([
+                pd.read_sql(raw_query, conn),
+                pd.read_sql(rollup_query, conn),
+                *[_daily_block_totals(key) if _is_block_shard(key) else pd.read_sql(raw_query, _partition_engine(key))
+                  for key in list_partitions()],
+            ])
+            ledger = _ledger_frame(totals['day'], totals['readings'], totals['water'], totals['energy'])
+            for quantity in LEDGER_QUANTITIES:
+                ledger[f'cum_{quantity}'] = ledger[quantity].cumsum()
+
+            conn.execute(resource_ledger.delete())
+            if len(ledger) > 0:
+                conn.execute(resource_ledger.insert(), ledger.to_dict('records'))
+            conn.execute(ledger_factors.delete())
+            conn.execute(ledger_factors.insert(), [{'name': name, 'value': value} for name, value in IMPACT_FACTORS.items()])
+        logger.info(f"Rebuilt resource ledger for {len(ledger)} days")
+    except Exception as e:
+        logger.error(f"Error rebuilding resource ledger: {e}")
+
+def _ensure_ledger():
+    global _ledger_checked
+
+    if _ledger_checked or not db_available:
+        return
+
+    with _ledger_lock:
+        if _ledger_checked:
+            return
+
+        try:
+            with engine.connect() as conn:
+                stored_factors = dict(conn.execute(text("SELECT name, value FROM ledger_factors")).fetchall())
+                ledger_days = conn.execute(text("SELECT COUNT(*) FROM resource_ledger")).scalar()
+                has_data = conn.execute(text(
+                    "SELECT EXISTS (SELECT 1 FROM environmental_metrics) OR EXISTS (SELECT 1 FROM environmental_metrics_daily)"
+                )).scalar()
+        except Exception as e:
+            logger.error(f"Error checking resource ledger: {e}")
+            return
+
+        if stored_factors != IMPACT_FACTORS or (has_data and not ledger_days):
+            logger.info("Resource ledger is missing or uses other factors, rebuilding")
+            rebuild_ledger()
+
+        _ledger_checked = True
+
+def _raw_ledger_totals(ranges):
+    # Ledger quantities summed straight from the raw readings in each (start, end) range.
+    query = text("""
+        SELECT date(date) AS day, COUNT(*) AS readings, SUM(water_usage) AS water, SUM(energy_consumption) AS energy
+        FROM environmental_metrics WHERE date >= :start AND date <= :end GROUP BY day
+    """)
+    frames = []
+    for start, end in ranges:
+        frames.append(pd.read_sql(query, engine, params={'start': _sql_timestamp(start), 'end': _sql_timestamp(end)}))
+        if PARTITION_GRANULARITY:
+            frames.append(_daily_totals(load_partitioned(start, end)))
+    totals = pd.concat(frames, ignore_index=True)
+    ledger = _ledger_frame(totals['day'], totals['readings'], totals['water'], totals['energy'])
+    return {quantity: float(ledger[quantity].sum()) for quantity in LEDGER_QUANTITIES}
+
+@instrument('get_ledger_totals')
+def get_ledger_totals(start_date=None, end_date=None):
+    # Whole days come from two indexed lookups in the ledger. When a datetime
+    # bound falls inside a day, that day's readings on the range's side of it
+    # are summed from the raw table instead. Days rolled up by retention no
+    # longer have raw readings, so they only count when fully inside the range.
+    if not db_available:
+        return None
+
+    _ensure_ledger()
+    start_date, end_date = _date_bounds(start_date, end_date)
+    start = None if start_date is None else pd.Timestamp(start_date)
+    end = None if end_date is None else pd.Timestamp(end_date)
+    first_day = None if start is None else start.normalize()
+    last_day = None if end is None else end.normalize()
+
+    edges = []
+    if start is not None and start > first_day:
+        first_day += pd.Timedelta(days=1)
+        edges.append((start, first_day - pd.Timedelta(microseconds=1)))
+    if end is not None and end < last_day + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1):
+        edges.append((last_day, end))
+        last_day -= pd.Timedelta(days=1)
+    whole_days = first_day is None or last_day is None or first_day <= last_day
+    if not whole_days:
+        edges = [(start, end)]
+
+    columns = ', '.join(f'cum_{quantity}' for quantity in LEDGER_QUANTITIES)
+    params = {
+        'start_day': first_day.strftime('%Y-%m-%d') if first_day is not None else '',
+        'end_day': last_day.strftime('%Y-%m-%d') if last_day is not None else '9999-12-31',
+    }
+
+    upper = lower = None
+    try:
+        if whole_days:
+            with engine.connect() as conn:
+                upper = conn.execute(text(
+                    f"SELECT {columns} FROM resource_ledger WHERE day <= :end_day ORDER BY day DESC LIMIT 1"
+                ), params).fetchone()
+                lower = conn.execute(text(
+                    f"SELECT {columns} FROM resource_ledger WHERE day < :start_day ORDER BY day DESC LIMIT 1"
+                ), params).fetchone()
+        partial = _raw_ledger_totals(edges) if edges else None
+    except Exception as e:
+        logger.error(f"Error reading resource ledger: {e}")
+        return None
+
+    upper = upper or (0,) * len(LEDGER_QUANTITIES)
+    lower = lower or (0,) * len(LEDGER_QUANTITIES)
+    totals = {quantity: hi - lo for quantity, hi, lo in zip(LEDGER_QUANTITIES, upper, lower)}
+    if partial:
+        totals = {quantity: totals[quantity] + partial[quantity] for quantity in LEDGER_QUANTITIES}
+    return totals
+
+def _partition_key(value):
+    timestamp = pd.Timestamp(value)
+    return timestamp.strftime('%Y') if PARTITION_GRANULARITY == 'year' else timestamp.strftime('%Y-%m')
+
+def _partition_bounds(key):
+    start = pd.Timestamp(key + ('-01-01' if PARTITION_GRANULARITY == 'year' else '-01'))
+    end = start + (pd.DateOffset(years=1) if PARTITION_GRANULARITY == 'year' else pd.DateOffset(months=1))
+    return start, end
+
+def _partition_path(key, sealed=False):
+    return os.path.join(PARTITION_DIR, f"metrics_{key}{'.sealed' if sealed else ''}.db")
+
+def is_partition_sealed(key):
+    return os.path.exists(_partition_path(key, sealed=True))
+
+def list_partitions():
+    if not PARTITION_GRANULARITY or not os.path.isdir(PARTITION_DIR):
+        return []
+
+    keys = set()
+    for name in os.listdir(PARTITION_DIR):
+        if name.startswith('metrics_') and name.endswith('.db'):
+            keys.add(name[len('metrics_'):-len('.db')].replace('.sealed', ''))
+    return sorted(keys)
+
+def _partition_engine(key):
+    with _partition_lock:
+        shard_engine = _partition_engines.get(key)
+        if shard_engine is not None:
+            return shard_engine
+
+        if is_partition_sealed(key):
+            path = os.path.abspath(_partition_path(key, sealed=True))
+            shard_engine = create_engine(f"sqlite:///file:{path}?mode=ro&uri=true")
+        else:
+            os.makedirs(PARTITION_DIR, exist_ok=True)
+            shard_engine = create_engine(f"sqlite:///{_partition_path(key)}")
+            metadata.create_all(shard_engine, tables=[environmental_metrics])
+            _ensure_reading_identity(shard_engine)
+        _partition_engines[key] = shard_engine
+        return shard_engine
+
+def _partition_version(key):
+    if _is_block_shard(key):
+        query = text("SELECT COALESCE(SUM(row_count), 0), MAX(max_id) FROM metric_blocks")
+    else:
+        query = text("SELECT COUNT(*), MAX(id) FROM environmental_metrics")
+    with _partition_engine(key).connect() as conn:
+        count, max_id = conn.execute(query).one()
+    return int(count), int(max_id or 0)
+
+def _is_block_shard(key):
+    if not is_partition_sealed(key):
+        return False
+    # Sealed shards never change format while open, so the answer is cached.
+    if key not in _block_shard_cache:
+        with _partition_engine(key).connect() as conn:
+            _block_shard_cache[key] = bool(conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'metric_blocks'")).scalar())
+    return _block_shard_cache[key]
+
+def _read_blocks(key):
+    with _partition_engine(key).connect() as conn:
+        blocks = conn.execute(metric_blocks.select().order_by(metric_blocks.c.id)).mappings().all()
+    frame = decode_blocks(blocks, METRIC_COLUMNS)
+    return frame[[column.name for column in environmental_metrics.columns]]
+
+def _sealed_frame(key):
+    # Sealed shards never change: read each one once, then slice in memory.
+    frame = _sealed_partition_cache.get(key)
+    if frame is None:
+        if _is_block_shard(key):
+            frame = _read_blocks(key)
+        else:
+            frame = pd.read_sql(text("SELECT * FROM environmental_metrics ORDER BY date"), _partition_engine(key))
+            frame['date'] = pd.to_datetime(frame['date'])
+        _sealed_partition_cache[key] = frame
+    return frame
+
+def _allocate_partition_ids(conn, count):
+    # The counter lives in the main database and is bumped inside the caller's
+    # transaction, so concurrent writers (even in other processes) never share ids.
+    exists = conn.execute(text("SELECT 1 FROM partition_sequence WHERE name = 'environmental_metrics'")).scalar()
+    if not exists:
+        highest_id = max([_partition_version(key)[1] for key in list_partitions()], default=0)
+        conn.execute(text("INSERT INTO partition_sequence (name, next_id) VALUES ('environmental_metrics', :next_id)"),
+                     {'next_id': highest_id + 1})
+    conn.execute(text("UPDATE partition_sequence SET next_id = next_id + :count WHERE name = 'environmental_metrics'"),
+                 {'count': count})
+    next_id = conn.execute(text("SELECT next_id FROM partition_sequence WHERE name = 'environmental_metrics'")).scalar()
+    return next_id - count
+
+def _read_partition(key, start_date, end_date):
+    if is_partition_sealed(key):
+        frame = _sealed_frame(key)
+        start_index = 0 if start_date is None else frame['date'].searchsorted(start_date, side='left')
+        end_index = len(frame) if end_date is None else frame['date'].searchsorted(end_date, side='right')
+        return frame.iloc[start_index:end_index]
+
+    conditions = []
+    params = {}
+    if start_date is not None:
+        conditions.append("date >= :start")
+        params['start'] = _sql_timestamp(start_date)
+    if end_date is not None:
+        conditions.append("date <= :end")
+        params['end'] = _sql_timestamp(end_date)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    return pd.read_sql(text(f"SELECT * FROM environmental_metrics {where} ORDER BY date"),
+                       _partition_engine(key), params=params)
+
+def _partition_keys(start_date=None, end_date=None):
+    # Shards whose period overlaps [start_date, end_date], oldest first.
+    keys = []
+    for key in list_partitions():
+        shard_start, shard_end = _partition_bounds(key)
+        if (start_date is None or start_date < shard_end) and (end_date is None or end_date >= shard_start):
+            keys.append(key)
+    return keys
+
+@instrument('load_partitioned')
+def load_partitioned(start_date=None, end_date=None):
+    start_date, end_date = _date_bounds(start_date, end_date)
+    start_date = None if start_date is None else pd.Timestamp(start_date)
+    end_date = None if end_date is None else pd.Timestamp(end_date)
+
+    keys = _partition_keys(start_date, end_date)
+    if not keys:
+        return _empty_metrics_frame()
+
+    # SQLite releases the GIL while it reads, so shards are scanned concurrently.
+    with ThreadPoolExecutor(max_workers=max(1, min(PARTITION_READ_WORKERS, len(keys)))) as executor:
+        frames = list(executor.map(lambda key: _read_partition(key, start_date, end_date), keys))
+
+    # Shards cover consecutive periods, so key order is also date order.
+    df = pd.concat(frames, ignore_index=True)
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+def _write_block_shard(frame, path):
+    if os.path.exists(path):
+        os.remove(path)
+    block_engine = create_engine(f"sqlite:///{path}")
+    try:
+        blocks = encode_blocks(frame, METRIC_COLUMNS)
+        with block_engine.begin() as conn:
+            metric_blocks.create(conn)
+            if blocks:
+                conn.execute(metric_blocks.insert(), blocks)
+    finally:
+        block_engine.dispose()
+    return len(blocks)
+
+def _replace_sealed_shard(key, path):
+    with _partition_lock:
+        shard_engine = _partition_engines.pop(key, None)
+        if shard_engine is not None:
+            shard_engine.dispose()
+        sealed_path = _partition_path(key, sealed=True)
+        os.replace(path, sealed_path)
+        os.chmod(sealed_path, 0o444)
+        _sealed_partition_cache.pop(key, None)
+        _block_shard_cache.pop(key, None)
+
+def _drop_partition(key):
+    with _partition_lock:
+        shard_engine = _partition_engines.pop(key, None)
+        if shard_engine is not None:
+            shard_engine.dispose()
+        os.remove(_partition_path(key, sealed=True))
+        _sealed_partition_cache.pop(key, None)
+        _block_shard_cache.pop(key, None)
+
+def seal_partition(key):
+    if is_partition_sealed(key):
+        return
+
+    shard_engine = _partition_engine(key)
+    if BLOCK_STORAGE:
+        frame = pd.read_sql(text("SELECT * FROM environmental_metrics ORDER BY date, id"), shard_engine)
+        staging = f"{_partition_path(key)}.blocks"
+        block_count = _write_block_shard(frame, staging)
+        _replace_sealed_shard(key, staging)
+        os.remove(_partition_path(key))
+        logger.info(f"Sealed partition {key} as {block_count} compressed blocks")
+        return
+
+    with shard_engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        conn.exec_driver_sql("VACUUM")
+        conn.exec_driver_sql("ANALYZE")
+
+    _replace_sealed_shard(key, _partition_path(key))
+    logger.info(f"Sealed partition {key}")
+
+def compress_sealed_partitions():
+    # Converts shards sealed before METRICS_BLOCK_STORAGE was turned on.
+    converted = 0
+    for key in list_partitions():
+        if not is_partition_sealed(key) or _is_block_shard(key):
+            continue
+        frame = pd.read_sql(text("SELECT * FROM environmental_metrics ORDER BY date, id"), _partition_engine(key))
+        staging = f"{_partition_path(key)}.blocks"
+        _write_block_shard(frame, staging)
+        _replace_sealed_shard(key, staging)
+        converted += 1
+        logger.info(f"Compressed sealed partition {key}")
+    return converted
+
+def seal_old_partitions(keep_open=1):
+    # Leaves the newest keep_open periods writable.
+    current_key = _partition_key(datetime.now())
+    open_keys = [key for key in list_partitions() if not is_partition_sealed(key) and key < current_key]
+    for key in open_keys[:max(0, len(open_keys) - (keep_open - 1))]:
+        seal_partition(key)
@@ -2,6 +2,8 @@
 
 import pandas as pd
 import numpy as np
+from impact_factors import CARBON_PER_KWH, CARBON_PER_LITER
+from instrumentation import instrument
 
 def get_region_data():
     regions = [
@@ -26,12 +28,18 @@ def get_region_data():
     
     return pd.DataFrame(regions)
 
-def calculate_regional_comparison(current_data, selected_region):
+@instrument('calculate_regional_comparison', 'analytics')
+def calculate_regional_comparison(current_data, selected_region, totals=None):
     regions_df = get_region_data()
     region_data = regions_df[regions_df["name"] == selected_region].iloc[0]
     
-    current_water = current_data["water_usage"].mean()
-    current_energy = current_data["energy_consumption"].mean()
+    if totals and totals["readings"]:
+        current_water = totals["water"] / totals["readings"]
+        current_energy = totals["energy"] / totals["readings"]
+    else:
+        current_water = current_data["water_usage"].mean()
+        current_energy = current_data["energy_consumption"].mean()
+    current_carbon = (current_water * CARBON_PER_LITER) + (current_energy * CARBON_PER_KWH)
     
     comparison = {
         "region_name": region_data["name"],
@@ -47,9 +55,9 @@ def calculate_regional_comparison(current_data, selected_region):
         "energy_consumption_region": region_data["energy_consumption"],
         "energy_consumption_diff_percent": ((current_energy - region_data["energy_consumption"]) / region_data["energy_consumption"]) * 100,
         
-        "estimated_carbon_footprint": (current_water * 0.005) + (current_energy * 0.4),
+        "estimated_carbon_footprint": current_carbon,
         "region_carbon_footprint": region_data["carbon_footprint"],
-        "carbon_footprint_diff_percent": (((current_water * 0.005 + current_energy * 0.4) - region_data["carbon_footprint"]) / region_data["carbon_footprint"]) * 100
+        "carbon_footprint_diff_percent": ((current_carbon - region_data["carbon_footprint"]) / region_data["carbon_footprint"]) * 100
     }
     
     return comparison
@@ -0,0 +1,122 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import argparse
+import logging
+from datetime import date
+
+import pandas as pd
+
+import db
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ['csv', 'parquet']
+
+
+def parquet_available():
+    return pq is not None
+
+
+def export_metrics(output, start_date=None, end_date=None, fmt='csv', chunksize=db.EXPORT_CHUNK_SIZE):
+    """
+    Stream environmental metrics for a date range into a CSV or Parquet file.
+
+    Rows are read from SQLite in chunks and written as they arrive, so memory
+    use depends on the chunk size rather than on the size of the export.
+
+    Args:
+        output: File path or writable binary file object
+        start_date: Start of the range (inclusive), or None for no lower bound
+        end_date: End of the range (inclusive), or None for no upper bound
+        fmt: 'csv' or 'parquet'
+        chunksize: Number of rows read and written per chunk
+
+    Returns:
+        int: Number of rows exported
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format {fmt!r}, expected one of {EXPORT_FORMATS}")
+    if fmt == 'parquet' and not parquet_available():
+        raise RuntimeError("Parquet export requires the pyarrow package")
+
+    chunks = db.iter_metrics_chunks(start_date, end_date, chunksize=chunksize)
+    if fmt == 'csv':
+        rows = _write_csv(output, chunks)
+    else:
+        rows = _write_parquet(output, chunks)
+
+    logger.info(f"Exported {rows} records as {fmt}")
+    return rows
+
+
+def _empty_chunk():
+    # Columns and dtypes of a chunk from db.iter_metrics_chunks, so an export
+    # without rows still carries the header or schema.
+    dtypes = {'id': 'int64', 'date': 'datetime64[us]', 'source': 'str'}
+    columns = ['id', 'date'] + db.METRIC_COLUMNS + ['source']
+    return pd.DataFrame({column: pd.Series(dtype=dtypes.get(column, 'float64')) for column in columns})
+
+
+def _write_csv(output, chunks):
+    rows = 0
+    wrote_header = False
+    handle = open(output, 'w', newline='') if isinstance(output, str) else output
+    try:
+        for chunk in chunks:
+            csv_text = chunk.to_csv(header=not wrote_header, index=False)
+            handle.write(csv_text if isinstance(output, str) else csv_text.encode('utf-8'))
+            wrote_header = True
+            rows += len(chunk)
+        if not wrote_header:
+            csv_text = _empty_chunk().to_csv(index=False)
+            handle.write(csv_text if isinstance(output, str) else csv_text.encode('utf-8'))
+    finally:
+        if isinstance(output, str):
+            handle.close()
+    return rows
+
+
+def _write_parquet(output, chunks):
+    rows = 0
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(output, table.schema)
+            # Each chunk becomes its own row group.
+            writer.write_table(table)
+            rows += len(chunk)
+        if writer is None:
+            # A Parquet file needs its footer, and with it the schema, even with no rows.
+            writer = pq.ParquetWriter(output, pa.Table.from_pandas(_empty_chunk(), preserve_index=False).schema)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export environmental metrics to CSV or Parquet.")
+    parser.add_argument("output", help="Output file path")
+    parser.add_argument("--start", type=date.fromisoformat, default=None, help="Start date (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, default=None, help="End date (YYYY-MM-DD)")
+    parser.add_argument("--format", dest="fmt", choices=EXPORT_FORMATS, default=None,
+                        help="Output format (defaults to the output file extension)")
+    parser.add_argument("--chunksize", type=int, default=db.EXPORT_CHUNK_SIZE, help="Rows per chunk")
+    args = parser.parse_args()
+
+    fmt = args.fmt or ('parquet' if args.output.endswith('.parquet') else 'csv')
+    export_metrics(args.output, args.start, args.end, fmt=fmt, chunksize=args.chunksize)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,179 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import threading
+import logging
+
+import pandas as pd
+import numpy as np
+
+import db
+from instrumentation import instrument
+
+logger = logging.getLogger(__name__)
+
+FORECAST_METRICS = ['water_usage', 'energy_consumption', 'soil_moisture']
+FORECAST_HORIZON = 7
+FIT_WINDOW = 2000
+ALPHA_GRID = np.array([0.1, 0.2, 0.3, 0.5, 0.7])
+BETA_GRID = np.array([0.01, 0.05, 0.1, 0.2])
+INTERVAL_Z = 1.96
+
+
+class HoltForecaster:
+    """
+    Holt's linear exponential smoothing with state that can be updated in place.
+
+    Smoothing parameters are chosen once on the initial fit; after that each
+    new observation updates level, trend and error variance in O(1).
+    """
+
+    def __init__(self):
+        self.alpha = None
+        self.beta = None
+        self.level = None
+        self.trend = 0.0
+        self.error_variance = 0.0
+        self.observations = 0
+
+    def fit(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[-FIT_WINDOW:]
+        if len(values) < 2:
+            self.alpha, self.beta = ALPHA_GRID[2], BETA_GRID[1]
+            self.level = float(values[-1]) if len(values) else None
+            self.trend = 0.0
+            self.observations = len(values)
+            return self
+
+        # Run every (alpha, beta) pair side by side and keep the one with the
+        # lowest one-step squared error.
+        alphas, betas = np.meshgrid(ALPHA_GRID, BETA_GRID, indexing='ij')
+        alphas, betas = alphas.ravel(), betas.ravel()
+        level = np.full(alphas.shape, values[0])
+        trend = np.full(alphas.shape, values[1] - values[0])
+        squared_error = np.zeros(alphas.shape)
+        for value in values[1:]:
+            predicted = level + trend
+            squared_error += (value - predicted) ** 2
+            new_level = alphas * value + (1 - alphas) * predicted
+            trend = betas * (new_level - level) + (1 - betas) * trend
+            level = new_level
+
+        best = int(np.argmin(squared_error))
+        self.alpha, self.beta = float(alphas[best]), float(betas[best])
+        self.level, self.trend = float(level[best]), float(trend[best])
+        self.error_variance = float(squared_error[best] / (len(values) - 1))
+        self.observations = len(values)
+        return self
+
+    def update(self, values):
+        if self.level is None:
+            return self.fit(values)
+
+        for value in np.asarray(values, dtype=float):
+            predicted = self.level + self.trend
+            error = value - predicted
+            # Exponentially weighted so the interval width tracks recent accuracy.
+            self.error_variance = 0.95 * self.error_variance + 0.05 * error ** 2
+            new_level = self.alpha * value + (1 - self.alpha) * predicted
+            self.trend = self.beta * (new_level - self.level) + (1 - self.beta) * self.trend
+            self.level = new_level
+            self.observations += 1
+        return self
+
+    def forecast(self, steps):
+        steps_ahead = np.arange(1, steps + 1)
+        mean = self.level + steps_ahead * self.trend
+        # Standard h-step variance for Holt's method.
+        weights = (self.alpha * (1 + np.arange(steps) * self.beta)) ** 2
+        weights[0] = 0.0
+        spread = INTERVAL_Z * np.sqrt(self.error_variance * (1 + np.cumsum(weights)))
+        return mean, mean - spread, mean + spread
+
+
+_forecast_state = {
+    'version': None,
+    'last_id': 0,
+    'last_date': None,
+    'interval': pd.Timedelta(days=1),
+    'models': {},
+}
+_forecast_lock = threading.Lock()
+
+
+def _median_interval(dates):
+    if len(dates) < 2:
+        return pd.Timedelta(days=1)
+    interval = pd.Series(dates).diff().median()
+    return interval if interval > pd.Timedelta(0) else pd.Timedelta(days=1)
+
+
+def _refit(data):
+    data = data.sort_values('date')
+    _forecast_state['models'] = {metric: HoltForecaster().fit(data[metric].to_numpy()) for metric in FORECAST_METRICS}
+    _forecast_state['last_id'] = int(data['id'].max()) if 'id' in data.columns and len(data) else 0
+    _forecast_state['last_date'] = data['date'].iloc[-1] if len(data) else None
+    _forecast_state['interval'] = _median_interval(data['date'].iloc[-FIT_WINDOW:])
+
+
+def _sync_with_database():
+    version = db.get_data_version()
+    if version is None or version == _forecast_state['version']:
+        return
+
+    previous = _forecast_state['version']
+    new_rows = db.load_rows_after(_forecast_state['last_id']) if previous else None
+
+    # Pure appends can be folded in; anything else (retention, deletes, updates) needs a refit.
+    if (previous and new_rows is not None and version[2] == previous[2]
+            and version[0] - previous[0] == len(new_rows)):
+        new_rows = new_rows.sort_values('date')
+        for metric in FORECAST_METRICS:
+            _forecast_state['models'][metric].update(new_rows[metric].to_numpy())
+        if len(new_rows):
+            _forecast_state['last_id'] = int(new_rows['id'].max())
+            _forecast_state['last_date'] = new_rows['date'].iloc[-1]
+        logger.info(f"Updated forecasts with {len(new_rows)} new records")
+    else:
+        _refit(db.load_data_from_db())
+        logger.info("Refitted forecasts from full history")
+
+    _forecast_state['version'] = version
+
+
+@instrument('get_forecast', 'analytics')
+def get_forecast(data=None, horizon=FORECAST_HORIZON):
+    """
+    Forecast water usage, energy consumption and soil moisture.
+
+    When the database is available the fitted state is kept per data version
+    and only newly appended rows are folded in. Otherwise the models are fit
+    on the given data.
+
+    Args:
+        data: Fallback DataFrame used when the database is not available
+        horizon: Number of future readings to forecast
+
+    Returns:
+        DataFrame: Forecast date plus mean, lower and upper bound per metric
+    """
+    with _forecast_lock:
+        if db.db_available:
+            _sync_with_database()
+        elif data is not None and len(data) > 0:
+            _refit(data)
+            _forecast_state['version'] = None
+
+        models = _forecast_state['models']
+        if not models or _forecast_state['last_date'] is None:
+            return pd.DataFrame()
+
+        dates = [_forecast_state['last_date'] + _forecast_state['interval'] * step for step in range(1, horizon + 1)]
+        forecast = pd.DataFrame({'date': dates})
+        for metric in FORECAST_METRICS:
+            mean, lower, upper = models[metric].forecast(horizon)
+            forecast[metric] = mean
+            forecast[f'{metric}_lower'] = lower
+            forecast[f'{metric}_upper'] = upper
+
+    return forecast
@@ -0,0 +1,18 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import os
+
+# Single factor set used by the resource ledger, the savings/impact
+# calculations and the regional comparison. Override with environment
+# variables; the ledger is rebuilt automatically when these change.
+WATER_COST_PER_LITER = float(os.environ.get("WATER_COST_PER_LITER", "0.002"))
+ENERGY_COST_PER_KWH = float(os.environ.get("ENERGY_COST_PER_KWH", "0.15"))
+CARBON_PER_KWH = float(os.environ.get("CARBON_PER_KWH", "0.4"))
+CARBON_PER_LITER = float(os.environ.get("CARBON_PER_LITER", "0.003"))
+
+IMPACT_FACTORS = {
+    'water_cost_per_liter': WATER_COST_PER_LITER,
+    'energy_cost_per_kwh': ENERGY_COST_PER_KWH,
+    'carbon_per_kwh': CARBON_PER_KWH,
+    'carbon_per_liter': CARBON_PER_LITER,
+}
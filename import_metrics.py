@@ -0,0 +1,76 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import argparse
+import logging
+
+import pandas as pd
+
+import db
+from export import EXPORT_FORMATS, parquet_available, pq
+
+logger = logging.getLogger(__name__)
+
+
+def _read_chunks(path, fmt, chunksize):
+    if fmt == 'csv':
+        yield from pd.read_csv(path, chunksize=chunksize, keep_default_na=False, na_values=[''])
+    else:
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+
+
+def import_metrics(path, fmt='csv', source=None, chunksize=db.UPSERT_BATCH_SIZE):
+    """
+    Replay a CSV or Parquet file of readings into the database.
+
+    Rows are upserted on (date, source), so importing the same file twice,
+    or resuming an import that stopped halfway, leaves one copy of each
+    reading. Files written by export.py can be imported as they are.
+
+    Args:
+        path: File path
+        fmt: 'csv' or 'parquet'
+        source: Source for rows without one (None keeps the file's value or '')
+        chunksize: Number of rows read and upserted per chunk
+
+    Returns:
+        dict: Counts of inserted, updated and unchanged rows, or None if a chunk failed
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported import format {fmt!r}, expected one of {EXPORT_FORMATS}")
+    if fmt == 'parquet' and not parquet_available():
+        raise RuntimeError("Parquet import requires the pyarrow package")
+
+    totals = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    for chunk in _read_chunks(path, fmt, chunksize):
+        chunk = chunk[['date'] + db.METRIC_COLUMNS + (['source'] if 'source' in chunk.columns else [])]
+        if source is not None:
+            chunk = chunk.assign(source=chunk['source'].fillna(source) if 'source' in chunk.columns else source)
+        result = db.upsert_data(chunk, batch_size=chunksize)
+        if result is None:
+            logger.error(f"Import of {path} stopped after {sum(totals.values())} records")
+            return None
+        for key in totals:
+            totals[key] += result[key]
+
+    logger.info(f"Imported {path}: {totals['inserted']} inserted, {totals['updated']} updated, "
+                f"{totals['unchanged']} unchanged")
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import environmental metrics from CSV or Parquet.")
+    parser.add_argument("input", help="Input file path")
+    parser.add_argument("--format", dest="fmt", choices=EXPORT_FORMATS, default=None,
+                        help="Input format (defaults to the input file extension)")
+    parser.add_argument("--source", default=None, help="Source for rows that do not name one")
+    parser.add_argument("--chunksize", type=int, default=db.UPSERT_BATCH_SIZE, help="Rows per chunk")
+    args = parser.parse_args()
+
+    fmt = args.fmt or ('parquet' if args.input.endswith('.parquet') else 'csv')
+    import_metrics(args.input, fmt=fmt, source=args.source, chunksize=args.chunksize)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,106 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import json
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+from urllib import request
+from urllib.error import HTTPError
+
+from ingest_server import DEFAULT_HOST, DEFAULT_PORT
+
+
+class IngestClient:
+    """
+    Minimal client for the local ingestion service, used for testing gateways.
+    """
+
+    def __init__(self, base_url=f"http://{DEFAULT_HOST}:{DEFAULT_PORT}", timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def health(self):
+        return self._request('GET', '/health')
+
+    def send_json(self, readings):
+        body = json.dumps({'readings': readings}, default=str).encode('utf-8')
+        return self._request('POST', '/ingest', body, 'application/json')
+
+    def send_line_protocol(self, readings, measurement='environmental_metrics'):
+        lines = []
+        for reading in readings:
+            fields = ','.join(f"{key}={value}" for key, value in reading.items() if key != 'date')
+            line = f"{measurement} {fields}"
+            if 'date' in reading:
+                line += f" {int(reading['date'].timestamp() * 1e9)}"
+            lines.append(line)
+        return self._request('POST', '/ingest', '\n'.join(lines).encode('utf-8'), 'text/plain')
+
+    def _request(self, method, path, body=None, content_type=None):
+        req = request.Request(self.base_url + path, data=body, method=method)
+        if content_type:
+            req.add_header('Content-Type', content_type)
+        try:
+            with request.urlopen(req, timeout=self.timeout) as response:
+                return response.status, json.loads(response.read())
+        except HTTPError as e:
+            return e.code, json.loads(e.read() or b'{}')
+
+
+def generate_readings(count, start=None, interval=timedelta(minutes=1), seed=0):
+    """
+    Generate synthetic readings that fall inside the accepted metric ranges.
+
+    Args:
+        count: Number of readings
+        start: Timestamp of the first reading (defaults to count intervals ago)
+        interval: Spacing between readings
+        seed: Random seed
+
+    Returns:
+        list: Reading dicts with a date and every metric
+    """
+    rng = random.Random(seed)
+    start = start or datetime.now() - interval * count
+    return [
+        {
+            'date': start + interval * i,
+            'temperature': round(rng.uniform(15, 30), 2),
+            'humidity': round(rng.uniform(40, 80), 2),
+            'soil_moisture': round(rng.uniform(40, 90), 2),
+            'water_usage': round(rng.uniform(5, 20), 2),
+            'energy_consumption': round(rng.uniform(8, 25), 2),
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send synthetic batches to the ingestion service.")
+    parser.add_argument("--url", default=f"http://{DEFAULT_HOST}:{DEFAULT_PORT}")
+    parser.add_argument("--batches", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--format", choices=['json', 'line'], default='json')
+    args = parser.parse_args()
+
+    client = IngestClient(args.url)
+    print("Health:", client.health())
+
+    readings = generate_readings(args.batches * args.batch_size)
+    accepted = 0
+    started = time.perf_counter()
+    for i in range(args.batches):
+        batch = readings[i * args.batch_size:(i + 1) * args.batch_size]
+        send = client.send_json if args.format == 'json' else client.send_line_protocol
+        status, result = send(batch)
+        if status != 200:
+            print(f"Batch {i} failed with {status}: {result}")
+        accepted += result.get('accepted', 0)
+    elapsed = time.perf_counter() - started
+
+    print(f"Accepted {accepted} readings in {elapsed:.2f}s ({accepted / elapsed:.0f} readings/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import json
+import math
+import argparse
+import logging
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import db
+from instrumentation import METRICS_ENABLED, render_metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 16 * 1024 * 1024
+MAX_REPORTED_ERRORS = 20
+
+
+def _parse_timestamp(value, epoch_divisor=1):
+    # Readings are stored as naive local time, like the dashboard's own entries.
+    if value is None:
+        return datetime.now()
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / epoch_divisor)
+    parsed = datetime.fromisoformat(str(value))
+    if parsed.tzinfo is not None:
+        # An offset is converted rather than dropped, so "+02:00" lands on the right local time.
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def parse_json_payload(body):
+    """
+    Parse a JSON batch into raw reading dicts.
+
+    Accepts either a list of readings or an object with a "readings" list.
+    Each reading may carry a "date" (ISO 8601 string or epoch seconds) and a
+    "source" naming the gateway; an object-level "source" applies to every reading.
+
+    Args:
+        body: Request body as bytes or str
+
+    Returns:
+        list: Raw reading dicts, not yet validated
+    """
+    payload = json.loads(body)
+    source = None
+    if isinstance(payload, dict):
+        source = payload.get('source')
+        payload = payload.get('readings', [])
+    if not isinstance(payload, list):
+        raise ValueError("Expected a list of readings or an object with a 'readings' list")
+    if source is not None:
+        payload = [{'source': source, **raw} if isinstance(raw, dict) else raw for raw in payload]
+    return payload
+
+
+def parse_line_protocol(body):
+    """
+    Parse line-protocol readings into raw reading dicts.
+
+    Each line looks like ``measurement[,tag=value] field=value,... [timestamp_ns]``.
+    A ``source`` tag names the gateway, other tags are ignored; the optional
+    timestamp is in nanoseconds since the epoch.
+
+    Args:
+        body: Request body as bytes or str
+
+    Returns:
+        list: Raw reading dicts, not yet validated
+    """
+    if isinstance(body, bytes):
+        body = body.decode('utf-8')
+
+    readings = []
+    for line in body.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+
+        parts = line.split(' ')
+        if len(parts) not in (2, 3):
+            readings.append({'_error': f"Malformed line: {line[:80]}"})
+            continue
+
+        reading = {}
+        for tag in parts[0].split(',')[1:]:
+            key, _, value = tag.partition('=')
+            if key == 'source':
+                reading['source'] = value
+        for field in parts[1].split(','):
+            key, _, value = field.partition('=')
+            reading[key] = value.rstrip('i')
+        if len(parts) == 3:
+            reading['date'] = int(parts[2])
+            reading['_epoch_divisor'] = 1e9
+        readings.append(reading)
+    return readings
+
+
+def validate_readings(raw_readings):
+    """
+    Validate raw readings against the same bounds as the sidebar form.
+
+    Args:
+        raw_readings: List of raw reading dicts
+
+    Returns:
+        tuple: (valid records ready for db.upsert_records, list of error strings)
+    """
+    records = []
+    errors = []
+
+    for index, raw in enumerate(raw_readings):
+        if not isinstance(raw, dict):
+            errors.append(f"Reading {index}: expected an object")
+            continue
+        if '_error' in raw:
+            errors.append(f"Reading {index}: {raw['_error']}")
+            continue
+
+        try:
+            record = {'date': _parse_timestamp(raw.get('date', raw.get('timestamp')), raw.get('_epoch_divisor', 1))}
+        except (TypeError, ValueError, OverflowError, OSError) as e:
+            errors.append(f"Reading {index}: invalid date ({e})")
+            continue
+        # (date, source) identifies a reading, so a resent batch replaces instead of duplicating.
+        record['source'] = str(raw.get('source') or '')
+
+        problem = None
+        for metric in db.METRIC_COLUMNS:
+            min_value, max_value = db.METRIC_RANGES[metric]
+            try:
+                value = float(raw[metric])
+            except KeyError:
+                problem = f"missing {metric}"
+                break
+            except (TypeError, ValueError):
+                problem = f"{metric} is not a number"
+                break
+            if math.isnan(value) or not min_value <= value <= max_value:
+                problem = f"{metric}={value} outside [{min_value}, {max_value}]"
+                break
+            record[metric] = value
+
+        if problem:
+            errors.append(f"Reading {index}: {problem}")
+        else:
+            records.append(record)
+
+    return records, errors
+
+
+class IngestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok', 'database': db.check_connection()})
+        elif self.path == '/metrics' and METRICS_ENABLED:
+            body = render_metrics().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        if self.path != '/ingest':
+            self._send_json(404, {'error': 'Not found'})
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        if length <= 0 or length > MAX_BODY_BYTES:
+            self._send_json(413 if length > MAX_BODY_BYTES else 400, {'error': 'Invalid body size'})
+            return
+        body = self.rfile.read(length)
+
+        content_type = self.headers.get('Content-Type', 'application/json').split(';')[0].strip()
+        try:
+            if content_type == 'application/json':
+                raw_readings = parse_json_payload(body)
+            else:
+                raw_readings = parse_line_protocol(body)
+        except (ValueError, UnicodeDecodeError) as e:
+            self._send_json(400, {'error': f"Could not parse payload: {e}"})
+            return
+
+        records, errors = validate_readings(raw_readings)
+        result = db.upsert_records(records)
+        if result is None:
+            self._send_json(503, {'error': 'Database insert failed', 'rejected': len(errors)})
+            return
+
+        accepted = len(records)
+        self._send_json(200 if accepted or not errors else 400, {
+            'accepted': accepted,
+            'inserted': result['inserted'],
+            'updated': result['updated'],
+            'rejected': len(errors),
+            'errors': errors[:MAX_REPORTED_ERRORS],
+        })
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def create_server(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    return ThreadingHTTPServer((host, port), IngestHandler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local batched ingestion service for sensor gateways.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port)
+    logger.info(f"Ingestion service listening on http://{args.host}:{server.server_port}/ingest")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,230 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import os
+import time
+import bisect
+import functools
+import threading
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# '' disables instrumentation, 'http' serves /metrics, 'file' rewrites a text file periodically.
+METRICS_EXPORTER = os.environ.get("METRICS_EXPORTER", "").lower()
+METRICS_ENABLED = METRICS_EXPORTER in ('http', 'file')
+METRICS_PORT = int(os.environ.get("METRICS_EXPORTER_PORT", "9464"))
+METRICS_HOST = os.environ.get("METRICS_EXPORTER_HOST", "127.0.0.1")
+METRICS_FILE = os.environ.get("METRICS_EXPORTER_FILE", "dashboard_metrics.prom")
+METRICS_FILE_INTERVAL = float(os.environ.get("METRICS_EXPORTER_INTERVAL", "15"))
+METRICS_PREFIX = "ecoimpact_"
+
+# Prometheus' default latency buckets, in seconds.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_metrics_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_help = {}
+_collectors = []
+_exporter_state = {'server': None, 'thread': None}
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def inc_counter(name, value=1, help_text="", **labels):
+    if not METRICS_ENABLED:
+        return
+    with _metrics_lock:
+        _help.setdefault(name, ('counter', help_text))
+        key = (name, _label_key(labels))
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, help_text="", **labels):
+    if not METRICS_ENABLED:
+        return
+    with _metrics_lock:
+        _help.setdefault(name, ('histogram', help_text))
+        key = (name, _label_key(labels))
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {'buckets': [0] * len(LATENCY_BUCKETS), 'sum': 0.0, 'count': 0}
+        # Buckets are stored non-cumulatively and summed when rendered.
+        index = bisect.bisect_left(LATENCY_BUCKETS, value)
+        if index < len(LATENCY_BUCKETS):
+            histogram['buckets'][index] += 1
+        histogram['sum'] += value
+        histogram['count'] += 1
+
+
+def register_collector(callback):
+    """
+    Register a callback that reports current values when metrics are rendered.
+
+    Args:
+        callback: Function returning (name, type, help, value) tuples, where
+            type is 'gauge' or 'counter'
+    """
+    if callback not in _collectors:
+        _collectors.append(callback)
+
+
+def instrument(name, kind='db'):
+    """
+    Decorator recording call counts, errors, durations and returned rows.
+
+    When instrumentation is disabled the function is returned unchanged, so
+    there is no per-call cost at all.
+
+    Args:
+        name: Value of the 'call' (db) or 'function' (analytics) label
+        kind: 'db' for database calls, 'analytics' for analytics functions
+
+    Returns:
+        Callable: Decorator
+    """
+    def decorate(func):
+        if not METRICS_ENABLED:
+            return func
+
+        label = 'call' if kind == 'db' else 'function'
+        described = 'database' if kind == 'db' else 'analytics function'
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                inc_counter(f"{kind}_errors_total", help_text=f"Failed {described} calls", **{label: name})
+                raise
+            finally:
+                observe(f"{kind}_duration_seconds", time.perf_counter() - started,
+                        help_text=f"Duration of {described} calls", **{label: name})
+                inc_counter(f"{kind}_calls_total", help_text=f"Number of {described} calls", **{label: name})
+            if kind == 'db' and hasattr(result, 'shape'):
+                inc_counter("db_rows_returned_total", len(result), help_text="Rows returned by database calls", call=name)
+            return result
+
+        return wrapper
+
+    return decorate
+
+
+def _format_labels(key, extra=()):
+    labels = list(key) + list(extra)
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in labels) + "}"
+
+
+def render_metrics():
+    """
+    Render every metric in the Prometheus text exposition format.
+
+    Returns:
+        str: Exposition text
+    """
+    lines = []
+    with _metrics_lock:
+        counters = dict(_counters)
+        histograms = {key: {**value, 'buckets': list(value['buckets'])} for key, value in _histograms.items()}
+        helps = dict(_help)
+
+    for name in sorted(helps):
+        metric_type, help_text = helps[name]
+        full_name = METRICS_PREFIX + name
+        lines.append(f"# HELP {full_name} {help_text}")
+        lines.append(f"# TYPE {full_name} {metric_type}")
+        if metric_type == 'counter':
+            for (counter_name, labels), value in sorted(counters.items()):
+                if counter_name == name:
+                    lines.append(f"{full_name}{_format_labels(labels)} {value}")
+            continue
+
+        for (histogram_name, labels), histogram in sorted(histograms.items()):
+            if histogram_name != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, histogram['buckets']):
+                cumulative += count
+                lines.append(f"{full_name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{full_name}_bucket{_format_labels(labels, [('le', '+Inf')])} {histogram['count']}")
+            lines.append(f"{full_name}_sum{_format_labels(labels)} {histogram['sum']}")
+            lines.append(f"{full_name}_count{_format_labels(labels)} {histogram['count']}")
+
+    for callback in list(_collectors):
+        try:
+            for name, metric_type, help_text, value in callback():
+                full_name = METRICS_PREFIX + name
+                lines.extend([f"# HELP {full_name} {help_text}", f"# TYPE {full_name} {metric_type}", f"{full_name} {value}"])
+        except Exception as e:
+            logger.error(f"Error in metrics collector: {e}")
+
+    return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+        body = render_metrics().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def write_metrics_file(path=METRICS_FILE):
+    # Written to a temporary file and renamed, so scrapers never see half a file.
+    staging = f"{path}.tmp-{os.getpid()}"
+    with open(staging, 'w') as handle:
+        handle.write(render_metrics())
+    os.replace(staging, path)
+
+
+def _write_periodically():
+    while True:
+        try:
+            write_metrics_file()
+        except Exception as e:
+            logger.error(f"Error writing metrics file: {e}")
+        time.sleep(METRICS_FILE_INTERVAL)
+
+
+def start_exporter():
+    """
+    Start the configured exporter, once per process.
+
+    Returns:
+        bool: True if an exporter is running
+    """
+    if not METRICS_ENABLED:
+        return False
+
+    with _metrics_lock:
+        if _exporter_state['thread'] is not None:
+            return True
+        try:
+            if METRICS_EXPORTER == 'http':
+                server = ThreadingHTTPServer((METRICS_HOST, METRICS_PORT), MetricsHandler)
+                thread = threading.Thread(target=server.serve_forever, name="metrics-exporter", daemon=True)
+                _exporter_state['server'] = server
+                logger.info(f"Serving metrics on http://{METRICS_HOST}:{server.server_port}/metrics")
+            else:
+                thread = threading.Thread(target=_write_periodically, name="metrics-exporter", daemon=True)
+                logger.info(f"Writing metrics to {METRICS_FILE} every {METRICS_FILE_INTERVAL:g}s")
+        except OSError as e:
+            logger.error(f"Could not start metrics exporter: {e}")
+            return False
+        _exporter_state['thread'] = thread
+        thread.start()
+    return True
@@ -0,0 +1,181 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import os
+import threading
+import logging
+
+import numpy as np
+import pandas as pd
+
+import db
+
+logger = logging.getLogger(__name__)
+
+LIVE_TAIL_SIZE = int(os.environ.get("METRICS_LIVE_TAIL_SIZE", "500"))
+LIVE_REFRESH_SECONDS = int(os.environ.get("METRICS_LIVE_REFRESH_SECONDS", "5"))
+
+
+class RingBuffer:
+    """
+    Fixed-size buffer of the most recent readings, stored column-wise in NumPy arrays.
+
+    Appending overwrites the oldest readings in place, so memory never grows
+    past the capacity given at construction.
+    """
+
+    def __init__(self, capacity, columns=db.METRIC_COLUMNS):
+        self.capacity = capacity
+        self.columns = list(columns)
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.dates = np.zeros(capacity, dtype='datetime64[ns]')
+        self.values = np.zeros((capacity, len(self.columns)), dtype=float)
+        self.size = 0
+        self.start = 0
+
+    def clear(self):
+        self.size = 0
+        self.start = 0
+
+    def extend(self, ids, dates, values):
+        count = len(ids)
+        if count == 0:
+            return
+        if count >= self.capacity:
+            ids, dates, values = ids[-self.capacity:], dates[-self.capacity:], values[-self.capacity:]
+            count = self.capacity
+
+        # Write positions wrap around the end of the arrays.
+        positions = (self.start + self.size + np.arange(count)) % self.capacity
+        self.ids[positions] = ids
+        self.dates[positions] = dates
+        self.values[positions] = values
+
+        overflow = max(0, self.size + count - self.capacity)
+        self.start = (self.start + overflow) % self.capacity
+        self.size = min(self.capacity, self.size + count)
+
+    @property
+    def last_id(self):
+        if self.size == 0:
+            return 0
+        return int(self.ids[(self.start + self.size - 1) % self.capacity])
+
+    @property
+    def last_date(self):
+        if self.size == 0:
+            return None
+        return self.dates[(self.start + self.size - 1) % self.capacity]
+
+    def contains(self, ids):
+        # Membership of each id among the buffered readings.
+        order = (self.start + np.arange(self.size)) % self.capacity
+        return np.isin(ids, self.ids[order])
+
+    def to_frame(self):
+        order = (self.start + np.arange(self.size)) % self.capacity
+        frame = pd.DataFrame(self.values[order], columns=self.columns)
+        frame.insert(0, 'date', self.dates[order])
+        frame.insert(0, 'id', self.ids[order])
+        return frame
+
+
+class LiveTail:
+    """
+    Most recent readings, kept current by polling only for rows with a higher id.
+
+    One instance is shared by every session in the process, so the polling
+    cost per tick does not grow with the number of viewers. The buffer stays
+    in date order: an upsert that changes stored readings or a backdated
+    reading triggers a reseed instead of an append.
+    """
+
+    def __init__(self, capacity=LIVE_TAIL_SIZE):
+        self.buffer = RingBuffer(capacity)
+        self._lock = threading.Lock()
+        self._seeded = False
+        self._last_id = 0
+        self._revision = None
+
+    def _append(self, rows):
+        if len(rows) == 0:
+            return
+        self.buffer.extend(
+            rows['id'].to_numpy(dtype=np.int64),
+            rows['date'].to_numpy(dtype='datetime64[ns]'),
+            rows[self.buffer.columns].to_numpy(dtype=float),
+        )
+
+    def _seed(self, version):
+        rows = db.load_latest_rows(self.buffer.capacity)
+        self.buffer.clear()
+        self._append(rows)
+        self._seeded = True
+        # Rows read after the version was taken are skipped by the next poll's id check.
+        self._last_id = max(version[1], int(rows['id'].max()) if len(rows) else 0)
+        self._revision = version[2]
+        logger.info(f"Seeded live tail with {len(rows)} records")
+        return len(rows)
+
+    def poll(self):
+        """
+        Fetch readings added since the last poll.
+
+        Returns:
+            int: Number of new readings
+        """
+        with self._lock:
+            version = db.get_data_version()
+            if version is None:
+                return 0
+            # Updated readings keep their ids, so only a changed revision shows them.
+            if not self._seeded or version[2] != self._revision:
+                return self._seed(version)
+
+            capacity = self.buffer.capacity
+            rows = db.load_rows_after(self._last_id, limit=capacity)
+            # A backlog larger than the buffer is replaced by the newest rows
+            # instead of being paged through.
+            if len(rows) >= capacity:
+                return self._seed(version)
+            if len(rows) == 0:
+                return 0
+
+            self._last_id = int(rows['id'].max())
+            rows = rows[~self.buffer.contains(rows['id'].to_numpy(dtype=np.int64))]
+            rows = rows.sort_values(['date', 'id'], kind='stable')
+            last_date = self.buffer.last_date
+            # A backdated reading belongs among the buffered ones, which only a reseed can do.
+            if len(rows) and last_date is not None and rows['date'].iloc[0].to_datetime64() < last_date:
+                return self._seed(version)
+
+            self._append(rows)
+            return len(rows)
+
+    def to_frame(self):
+        with self._lock:
+            return self.buffer.to_frame()
+
+
+_live_tail = None
+_live_tail_lock = threading.Lock()
+
+
+def get_live_tail():
+    global _live_tail
+    with _live_tail_lock:
+        if _live_tail is None:
+            _live_tail = LiveTail()
+        return _live_tail
+
+
+def poll_live_tail():
+    """
+    Poll the shared live tail and return its readings.
+
+    Returns:
+        DataFrame: Up to LIVE_TAIL_SIZE most recent readings, oldest first
+    """
+    tail = get_live_tail()
+    if db.db_available:
+        tail.poll()
+    return tail.to_frame()
@@ -0,0 +1,183 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import os
+import json
+import time
+import random
+import argparse
+import logging
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+BASELINE_WRITES = 20
+
+
+def _random_reading(rng):
+    return {
+        'temperature': round(rng.uniform(15, 30), 1),
+        'humidity': round(rng.uniform(40, 80), 1),
+        'soil_moisture': round(rng.uniform(40, 90), 1),
+        'water_usage': round(rng.uniform(5, 20), 1),
+        'energy_consumption': round(rng.uniform(8, 25), 1),
+    }
+
+
+def _percentiles(values):
+    if not values:
+        return {'count': 0}
+    arr = np.asarray(values) * 1000.0
+    return {
+        'count': len(values),
+        'p50_ms': float(np.percentile(arr, 50)),
+        'p90_ms': float(np.percentile(arr, 90)),
+        'p99_ms': float(np.percentile(arr, 99)),
+        'max_ms': float(arr.max()),
+    }
+
+
+def _session_worker(stop_event, latencies, errors, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    # Every session finishes at least one rerun, so a run shorter than the
+    # app's cold start still reports a latency instead of none.
+    while True:
+        started = time.perf_counter()
+        try:
+            at.run()
+        except Exception as e:
+            errors.append(str(e))
+        else:
+            latencies.append(time.perf_counter() - started)
+            if at.exception:
+                errors.append(str(at.exception[0].value))
+        if stop_event.is_set():
+            break
+
+
+def _writer_worker(db, stop_event, latencies, failures, seed, write_interval):
+    rng = random.Random(seed)
+    while not stop_event.is_set():
+        started = time.perf_counter()
+        ok = db.add_metrics_record(**_random_reading(rng))
+        latencies.append(time.perf_counter() - started)
+        if not ok:
+            failures.append(1)
+        if write_interval:
+            time.sleep(write_interval)
+
+
+def run_load_test(db_path, sessions=4, writers=2, duration=30.0, write_interval=0.0, timeout=120):
+    """
+    Drive concurrent dashboard sessions and sensor writers against one SQLite file.
+
+    Lock wait is estimated per write as its latency above the median latency
+    of uncontended writes measured before the load starts.
+
+    Args:
+        db_path: SQLite file used for the run
+        sessions: Number of simulated dashboard sessions
+        writers: Number of writer threads calling db.add_metrics_record
+        duration: Length of the measured run in seconds
+        write_interval: Pause between writes per writer (0 writes flat out)
+        timeout: Per-rerun timeout for each session in seconds
+
+    Returns:
+        dict: Rerun latency percentiles, write throughput and lock wait summary
+    """
+    # db reads its URL at import time, so this has to happen before anything imports it.
+    os.environ["METRICS_DB_URL"] = f"sqlite:///{os.path.abspath(db_path)}"
+    import db
+
+    if not db.db_available:
+        raise RuntimeError(f"Could not open database at {db_path}")
+
+    db.load_data_from_db()
+
+    rng = random.Random(0)
+    baseline = []
+    for _ in range(BASELINE_WRITES):
+        started = time.perf_counter()
+        db.add_metrics_record(**_random_reading(rng))
+        baseline.append(time.perf_counter() - started)
+    baseline_write = float(np.median(baseline))
+
+    stop_event = threading.Event()
+    rerun_latencies = []
+    session_errors = []
+    write_latencies = []
+    write_failures = []
+
+    threads = [
+        threading.Thread(target=_session_worker, args=(stop_event, rerun_latencies, session_errors, timeout), daemon=True)
+        for _ in range(sessions)
+    ]
+    threads += [
+        threading.Thread(target=_writer_worker, args=(db, stop_event, write_latencies, write_failures, seed, write_interval), daemon=True)
+        for seed in range(1, writers + 1)
+    ]
+
+    logger.info(f"Running {sessions} sessions and {writers} writers for {duration:.0f}s against {db_path}")
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop_event.set()
+    for thread in threads:
+        thread.join(timeout=timeout)
+    elapsed = time.perf_counter() - started
+
+    lock_waits = [max(0.0, latency - baseline_write) for latency in write_latencies]
+
+    return {
+        'sessions': sessions,
+        'writers': writers,
+        'elapsed_s': elapsed,
+        'rerun_latency': _percentiles(rerun_latencies),
+        'reruns_per_s': len(rerun_latencies) / elapsed,
+        'session_errors': len(session_errors),
+        'write_latency': _percentiles(write_latencies),
+        'writes_per_s': (len(write_latencies) - len(write_failures)) / elapsed,
+        'write_failures': len(write_failures),
+        'baseline_write_ms': baseline_write * 1000.0,
+        'lock_wait': dict(_percentiles(lock_waits), total_s=float(sum(lock_waits))),
+    }
+
+
+def _format_report(report):
+    lines = [
+        f"Sessions: {report['sessions']}  Writers: {report['writers']}  Elapsed: {report['elapsed_s']:.1f}s",
+        f"Reruns: {report['rerun_latency']['count']} ({report['reruns_per_s']:.2f}/s), errors: {report['session_errors']}",
+    ]
+    if report['rerun_latency']['count']:
+        lines.append("Rerun latency ms: p50 {p50_ms:.0f}  p90 {p90_ms:.0f}  p99 {p99_ms:.0f}  max {max_ms:.0f}".format(**report['rerun_latency']))
+    lines.append(f"Writes: {report['write_latency']['count']} ({report['writes_per_s']:.1f}/s), failures: {report['write_failures']}")
+    if report['write_latency']['count']:
+        lines.append("Write latency ms: p50 {p50_ms:.1f}  p90 {p90_ms:.1f}  p99 {p99_ms:.1f}  max {max_ms:.1f}".format(**report['write_latency']))
+        lines.append("Lock wait ms: p50 {p50_ms:.1f}  p99 {p99_ms:.1f}  total {total_s:.2f}s".format(**report['lock_wait'])
+                     + f" (uncontended write {report['baseline_write_ms']:.1f}ms)")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the dashboard with concurrent sessions and writers.")
+    parser.add_argument("--db", default="load_test.db", help="SQLite file to run against")
+    parser.add_argument("--sessions", type=int, default=4, help="Number of simulated dashboard sessions")
+    parser.add_argument("--writers", type=int, default=2, help="Number of writer threads")
+    parser.add_argument("--duration", type=float, default=30.0, help="Run length in seconds")
+    parser.add_argument("--write-interval", type=float, default=0.0, help="Seconds between writes per writer")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = run_load_test(args.db, sessions=args.sessions, writers=args.writers,
+                           duration=args.duration, write_interval=args.write_interval)
+    print(json.dumps(report, indent=2) if args.json else _format_report(report))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    main()
@@ -0,0 +1,213 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import os
+import time
+import threading
+import logging
+from datetime import datetime, timedelta
+
+import db
+from data_processor import filter_data_by_date, calculate_statistics, calculate_resource_efficiency
+from recommendation_engine import generate_recommendations, calculate_potential_savings, calculate_environmental_impact
+from eco_impact import calculate_regional_comparison, get_all_regions
+from forecasting import get_forecast
+from data_quality import clean_data
+
+logger = logging.getLogger(__name__)
+
+PRECOMPUTE_WINDOWS = [7, 30, 90, 365]
+# Windows roll forward with the clock, so results are refreshed at least this often
+# even without writes. Writes from other processes are caught by the version check
+# in get_precomputed and recomputed on the next pass.
+PRECOMPUTE_INTERVAL = int(os.environ.get("METRICS_PRECOMPUTE_INTERVAL", "300"))
+# Quiet period after a write so a burst of inserts triggers a single recompute.
+PRECOMPUTE_DEBOUNCE = float(os.environ.get("METRICS_PRECOMPUTE_DEBOUNCE", "2"))
+
+_precompute_state = {
+    'version': None,
+    'computed_at': 0.0,
+    'stale': True,
+    'results': {},
+    'thread': None,
+}
+_precompute_lock = threading.Lock()
+_wake_event = threading.Event()
+_stop_event = threading.Event()
+
+
+def compute_window(data, days, regions=None, now=None):
+    """
+    Compute the dashboard aggregates for the trailing window of a given length.
+
+    Args:
+        data: DataFrame with environmental metrics, sorted by date
+        days: Window length in days
+        regions: Regions for the eco-impact comparison (defaults to all regions)
+        now: End of the window (defaults to the current time)
+
+    Returns:
+        dict: Statistics, efficiency, recommendations, savings, impact and a
+        regional comparison per region, or None if the window has no data
+    """
+    now = now or datetime.now()
+    start = now - timedelta(days=days)
+    window_data = filter_data_by_date(data, start, now)
+    if len(window_data) == 0:
+        return None
+
+    ledger_totals = db.get_ledger_totals(start, now)
+    stats = calculate_statistics(window_data)
+    savings = calculate_potential_savings(window_data, ledger_totals)
+
+    return {
+        'days': days,
+        'start': start,
+        'end': now,
+        'records': len(window_data),
+        'statistics': stats,
+        'efficiency': calculate_resource_efficiency(window_data),
+        'recommendations': generate_recommendations(window_data, stats, get_forecast(data)),
+        'savings': savings,
+        'impact': calculate_environmental_impact(window_data, savings, ledger_totals),
+        'ledger_totals': ledger_totals,
+        'regional': {
+            region: calculate_regional_comparison(window_data, region, ledger_totals)
+            for region in (regions or get_all_regions())
+        },
+    }
+
+
+def refresh_precomputed(force=False):
+    """
+    Recompute every window if the data changed or the results are too old.
+
+    Args:
+        force: Recompute even if the data version is unchanged
+
+    Returns:
+        bool: True if new results were published
+    """
+    version = db.get_data_version()
+    if version is None:
+        return False
+
+    with _precompute_lock:
+        current = (
+            not _precompute_state['stale']
+            and _precompute_state['version'] == version
+            and time.time() - _precompute_state['computed_at'] < PRECOMPUTE_INTERVAL
+        )
+    if current and not force:
+        return False
+
+    started = time.perf_counter()
+    data = clean_data(db.load_data_from_db())
+    now = datetime.now()
+    results = {}
+    for days in PRECOMPUTE_WINDOWS:
+        try:
+            results[days] = compute_window(data, days, now=now)
+        except Exception as e:
+            logger.error(f"Error precomputing {days}-day window: {e}")
+
+    # A write that lands during the computation leaves the results stale;
+    # the listener has already set the wake event for another pass.
+    with _precompute_lock:
+        if db.get_data_version() != version:
+            return False
+        _precompute_state['results'] = results
+        _precompute_state['version'] = version
+        _precompute_state['computed_at'] = time.time()
+        _precompute_state['stale'] = False
+
+    logger.info(f"Precomputed {len(results)} dashboard windows in {time.perf_counter() - started:.2f}s")
+    return True
+
+
+def _on_rows_written(start, end):
+    with _precompute_lock:
+        _precompute_state['stale'] = True
+    _wake_event.set()
+
+
+def _run():
+    while not _stop_event.is_set():
+        try:
+            refresh_precomputed()
+        except Exception as e:
+            logger.error(f"Error in precompute worker: {e}")
+
+        if _wake_event.wait(PRECOMPUTE_INTERVAL):
+            # Let the rest of a write batch land before recomputing.
+            _stop_event.wait(PRECOMPUTE_DEBOUNCE)
+        _wake_event.clear()
+
+
+def start_precompute_worker():
+    """
+    Start the background thread that keeps the common windows precomputed.
+
+    Safe to call on every rerun: only one worker runs per process.
+
+    Returns:
+        bool: True if the worker is running
+    """
+    if not db.db_available:
+        return False
+
+    with _precompute_lock:
+        thread = _precompute_state['thread']
+        if thread is not None and thread.is_alive():
+            return True
+
+        db.add_write_listener(_on_rows_written)
+        _stop_event.clear()
+        thread = threading.Thread(target=_run, name="dashboard-precompute", daemon=True)
+        _precompute_state['thread'] = thread
+        thread.start()
+
+    logger.info("Started dashboard precompute worker")
+    return True
+
+
+def stop_precompute_worker(timeout=None):
+    _stop_event.set()
+    _wake_event.set()
+    thread = _precompute_state['thread']
+    if thread is not None:
+        thread.join(timeout)
+
+
+def get_precomputed(days, region=None):
+    """
+    Finished aggregates for a common window, if they are up to date.
+
+    Args:
+        days: Window length in days (one of PRECOMPUTE_WINDOWS)
+        region: If given, the regional comparison for this region is included
+            as 'regional_comparison'
+
+    Returns:
+        dict: Precomputed results, or None if missing or stale
+    """
+    with _precompute_lock:
+        if _precompute_state['stale']:
+            return None
+        result = _precompute_state['results'].get(days)
+        version = _precompute_state['version']
+
+    if result is None:
+        return None
+    # The write listener only sees this process's writes; the ingest service
+    # and imports write from others, which only the data version reveals.
+    if db.get_data_version() != version:
+        with _precompute_lock:
+            if _precompute_state['version'] == version:
+                _precompute_state['stale'] = True
+        _wake_event.set()
+        return None
+    if region is not None:
+        if region not in result['regional']:
+            return None
+        result = {**result, 'regional_comparison': result['regional'][region]}
+    return result
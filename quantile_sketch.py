@@ -0,0 +1,273 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import logging
+from datetime import datetime, timedelta
+
+import pandas as pd
+import numpy as np
+from sqlalchemy import text
+
+import db
+
+logger = logging.getLogger(__name__)
+
+SKETCH_METRICS = ['temperature', 'humidity', 'soil_moisture']
+DEFAULT_QUANTILES = (0.05, 0.5, 0.95)
+DEFAULT_COMPRESSION = 200
+# Days of raw readings loaded at once when sketches are built ahead of retention.
+SKETCH_BUILD_DAYS = 31
+# Builds of a chunk that a concurrent write kept from being stored are retried this often.
+SKETCH_BUILD_ATTEMPTS = 3
+
+
+class TDigest:
+    """
+    Mergeable t-digest for approximate quantiles.
+
+    Centroids are kept sorted by mean. Compression buckets them on the k1
+    scale function, so clusters are small in the tails (where p5/p95 live)
+    and large around the median. Merging two digests is just concatenating
+    their centroids and compressing again.
+    """
+
+    def __init__(self, means=None, weights=None, minimum=np.inf, maximum=-np.inf, compression=DEFAULT_COMPRESSION):
+        self.means = np.asarray(means if means is not None else [], dtype=float)
+        self.weights = np.asarray(weights if weights is not None else [], dtype=float)
+        self.minimum = float(minimum)
+        self.maximum = float(maximum)
+        self.compression = compression
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    @classmethod
+    def from_values(cls, values, compression=DEFAULT_COMPRESSION):
+        values = np.sort(np.asarray(values, dtype=float))
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return cls(compression=compression)
+        digest = cls(values, np.ones(len(values)), values[0], values[-1], compression)
+        return digest._compress()
+
+    @classmethod
+    def merge(cls, digests, compression=DEFAULT_COMPRESSION):
+        digests = [digest for digest in digests if len(digest.means)]
+        if not digests:
+            return cls(compression=compression)
+
+        means = np.concatenate([digest.means for digest in digests])
+        weights = np.concatenate([digest.weights for digest in digests])
+        order = np.argsort(means, kind='mergesort')
+        merged = cls(means[order], weights[order],
+                     min(digest.minimum for digest in digests),
+                     max(digest.maximum for digest in digests),
+                     compression)
+        return merged._compress()
+
+    def _compress(self):
+        total = self.weights.sum()
+        if len(self.means) <= 1 or total == 0:
+            return self
+
+        # k1 scale: clusters whose left edge falls in the same unit of k merge.
+        q_left = (np.cumsum(self.weights) - self.weights) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q_left - 1)
+        cluster = np.floor(k - k[0]).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, np.diff(cluster) != 0])
+
+        weights = np.add.reduceat(self.weights, starts)
+        means = np.add.reduceat(self.means * self.weights, starts) / weights
+        self.means, self.weights = means, weights
+        return self
+
+    def quantile(self, quantiles):
+        quantiles = np.atleast_1d(np.asarray(quantiles, dtype=float))
+        if len(self.means) == 0:
+            return np.full(len(quantiles), np.nan)
+
+        total = self.weights.sum()
+        centers = np.cumsum(self.weights) - self.weights / 2
+        positions = np.r_[0.0, centers, total]
+        values = np.r_[self.minimum, self.means, self.maximum]
+        return np.interp(quantiles * total, positions, values)
+
+    def to_bytes(self):
+        header = np.array([self.compression, self.minimum, self.maximum], dtype=float)
+        return np.concatenate([header, self.means, self.weights]).tobytes()
+
+    @classmethod
+    def from_bytes(cls, payload):
+        values = np.frombuffer(payload, dtype=float)
+        compression, minimum, maximum = values[:3]
+        size = (len(values) - 3) // 2
+        return cls(values[3:3 + size].copy(), values[3 + size:].copy(), minimum, maximum, int(compression))
+
+
+def _day_strings(start_day, end_day):
+    days = pd.date_range(start_day, end_day, freq='D')
+    return [day.strftime('%Y-%m-%d') for day in days]
+
+
+def _load_stored_sketches(start_day, end_day, metrics):
+    query = text("""
+        SELECT day, metric, payload FROM metric_sketches
+        WHERE day >= :start_day AND day <= :end_day
+    """)
+    with db.engine.connect() as conn:
+        rows = conn.execute(query, {'start_day': start_day, 'end_day': end_day}).fetchall()
+    return {(day, metric): TDigest.from_bytes(payload) for day, metric, payload in rows if metric in metrics}
+
+
+def _days_version(conn, params):
+    # Count and highest id of the raw readings in the range, in the main table
+    # and every overlapping shard, plus the revision that upserted updates bump.
+    count, max_id = conn.execute(text(
+        "SELECT COUNT(*), MAX(id) FROM environmental_metrics WHERE date >= :start AND date < :end"
+    ), params).one()
+    version = [(count, max_id), db._metric_revision(conn)]
+    if db.PARTITION_GRANULARITY:
+        keys = db._partition_keys(pd.Timestamp(params['start']), pd.Timestamp(params['end']))
+        version += [db._partition_version(key) for key in keys]
+    return version
+
+
+def _build_daily_sketches(days):
+    """
+    Build and store sketches for the given days from raw readings.
+
+    Days without raw readings get empty sketches so they aren't rescanned,
+    unless they were rolled up: those can't be rebuilt, and an empty sketch
+    would report them as having no readings. Sketches are only stored if no
+    reading in the range changed while they were built.
+    """
+    query = text(f"""
+        SELECT date, {', '.join(SKETCH_METRICS)} FROM environmental_metrics
+        WHERE date >= :start AND date < :end
+    """)
+    params = {
+        'start': days[0] + ' 00:00:00',
+        'end': (datetime.strptime(days[-1], '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d'),
+    }
+    # A write that commits after this is caught before the sketches are stored;
+    # its own invalidation may already have run by then.
+    with db.engine.connect() as conn:
+        version = _days_version(conn, params)
+    if db.PARTITION_GRANULARITY:
+        # Readings written since partitioning was turned on live in the shards.
+        raw = pd.concat([
+            pd.read_sql(query, db.engine, params=params),
+            db.load_partitioned(pd.Timestamp(days[0]).date(), pd.Timestamp(days[-1]).date())[['date'] + SKETCH_METRICS],
+        ], ignore_index=True)
+    else:
+        raw = pd.read_sql(query, db.engine, params=params)
+    raw['day'] = raw['date'].astype(str).str.slice(0, 10)
+    grouped = dict(tuple(raw.groupby('day')))
+    with db.engine.connect() as conn:
+        rolled_up = {day for (day,) in conn.execute(
+            text("SELECT day FROM environmental_metrics_daily WHERE day >= :start_day AND day <= :end_day"),
+            {'start_day': days[0], 'end_day': days[-1]},
+        )}
+
+    sketches = {}
+    rows = []
+    for day in days:
+        day_rows = grouped.get(day)
+        if day_rows is None and day in rolled_up:
+            continue
+        for metric in SKETCH_METRICS:
+            values = day_rows[metric].to_numpy() if day_rows is not None else []
+            digest = TDigest.from_values(values)
+            sketches[(day, metric)] = digest
+            rows.append({'day': day, 'metric': metric, 'sample_count': len(values), 'payload': digest.to_bytes()})
+
+    if rows:
+        with db.engine.begin() as conn:
+            # Writers take the same lock, so none can commit between the check and the insert.
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            if _days_version(conn, params) == version:
+                conn.execute(db.metric_sketches.insert().prefix_with("OR REPLACE"), rows)
+            else:
+                logger.info(f"Readings changed while sketches for {days[0]}..{days[-1]} were built; not storing them")
+
+    logger.info(f"Built quantile sketches for {len(days)} days")
+    return sketches
+
+
+def persist_daily_sketches(days, chunk_days=SKETCH_BUILD_DAYS):
+    """
+    Make sure the given days have stored sketches.
+
+    db.apply_retention_policy calls this before rolling raw readings up,
+    since sketches can't be built from daily rollups.
+
+    Args:
+        days: Day strings (YYYY-MM-DD), sorted
+        chunk_days: Maximum number of days read from the database at once
+
+    Returns:
+        int: Number of days whose sketches were built
+    """
+    if not days:
+        return 0
+
+    stored = _load_stored_sketches(days[0], days[-1], SKETCH_METRICS)
+    missing = [day for day in days if any((day, metric) not in stored for metric in SKETCH_METRICS)]
+    for start in range(0, len(missing), chunk_days):
+        chunk = missing[start:start + chunk_days]
+        for _ in range(SKETCH_BUILD_ATTEMPTS):
+            _build_daily_sketches(chunk)
+            stored = _load_stored_sketches(chunk[0], chunk[-1], SKETCH_METRICS)
+            chunk = [day for day in chunk if any((day, metric) not in stored for metric in SKETCH_METRICS)]
+            if not chunk:
+                break
+    return len(missing)
+
+
+def get_range_quantiles(start_date, end_date, metrics=SKETCH_METRICS, quantiles=DEFAULT_QUANTILES, data=None):
+    """
+    Approximate quantiles of metrics over a date range by merging daily sketches.
+
+    The range is widened to whole days. Missing sketches are built once from
+    the raw rows and stored; writes drop the sketches of the days they touch.
+
+    Args:
+        start_date: Start of the range
+        end_date: End of the range
+        metrics: Metrics to summarize (subset of SKETCH_METRICS)
+        quantiles: Quantiles to report, between 0 and 1
+        data: Fallback DataFrame used when the database is not available
+
+    Returns:
+        DataFrame: One row per metric with a column per quantile and the sample count
+    """
+    columns = [f'p{q * 100:g}' for q in quantiles]
+
+    if not db.db_available:
+        if data is None or len(data) == 0:
+            return pd.DataFrame(columns=columns + ['count'])
+        result = pd.DataFrame(
+            [np.quantile(data[metric].to_numpy(), quantiles) for metric in metrics],
+            index=metrics, columns=columns,
+        )
+        result['count'] = len(data)
+        return result
+
+    start_day = pd.Timestamp(start_date).strftime('%Y-%m-%d')
+    end_day = pd.Timestamp(end_date).strftime('%Y-%m-%d')
+    days = _day_strings(start_day, end_day)
+
+    try:
+        sketches = _load_stored_sketches(start_day, end_day, SKETCH_METRICS)
+        missing_days = [day for day in days if any((day, metric) not in sketches for metric in SKETCH_METRICS)]
+        if missing_days:
+            sketches.update(_build_daily_sketches(missing_days))
+    except Exception as e:
+        logger.error(f"Error loading quantile sketches: {e}")
+        return pd.DataFrame(columns=columns + ['count'])
+
+    rows = []
+    for metric in metrics:
+        merged = TDigest.merge([sketches[(day, metric)] for day in days if (day, metric) in sketches])
+        rows.append(list(merged.quantile(quantiles)) + [int(merged.count)])
+    return pd.DataFrame(rows, index=list(metrics), columns=columns + ['count'])
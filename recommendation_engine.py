@@ -4,8 +4,14 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
+from impact_factors import WATER_COST_PER_LITER, ENERGY_COST_PER_KWH, CARBON_PER_KWH, CARBON_PER_LITER
+from instrumentation import instrument
 
-def generate_recommendations(data, stats):
+WATER_REDUCTION_PERCENT = 25.0
+ENERGY_REDUCTION_PERCENT = 30.0
+
+@instrument('generate_recommendations', 'analytics')
+def generate_recommendations(data, stats, forecast=None):
     recommendations = []
 
     if stats['current_soil_moisture'] > 80:
@@ -35,6 +41,40 @@ def generate_recommendations(data, stats):
             'priority': 'Medium'
         })
 
+    if forecast is not None and len(forecast) > 0:
+        forecast_moisture_low = forecast['soil_moisture'].min()
+        forecast_moisture_high = forecast['soil_moisture'].max()
+        if 50 <= stats['current_soil_moisture'] and forecast_moisture_low < 50:
+            recommendations.append({
+                'title': 'Plan irrigation ahead of forecast dry-down',
+                'description':
+                f'Soil moisture is forecast to fall to {forecast_moisture_low:.1f}% over the coming readings. Schedule irrigation for early morning before levels drop below the optimal range.',
+                'impact':
+                'Avoids plant stress and emergency watering, which typically uses 10-20% more water.',
+                'priority': 'High'
+            })
+        elif stats['current_soil_moisture'] <= 80 and forecast_moisture_high > 80:
+            recommendations.append({
+                'title': 'Hold back upcoming irrigation',
+                'description':
+                f'Soil moisture is forecast to rise to {forecast_moisture_high:.1f}%. Skip or shorten the next scheduled irrigation cycle.',
+                'impact':
+                'Prevents waterlogging and saves the water of one irrigation cycle.',
+                'priority': 'Medium'
+            })
+
+        recent_water = data['water_usage'].iloc[-7:].mean()
+        forecast_water = forecast['water_usage'].mean()
+        if recent_water > 0 and forecast_water > recent_water * 1.1:
+            recommendations.append({
+                'title': 'Prepare for rising water demand',
+                'description':
+                f'Water usage is forecast to average {forecast_water:.1f}L per reading, {(forecast_water / recent_water - 1) * 100:.0f}% above the last week. Check for leaks and tune irrigation timers before demand peaks.',
+                'impact':
+                'Keeps water usage near recent levels instead of following the upward trend.',
+                'priority': 'Medium'
+            })
+
     if stats['temp_status'] == 'critical':
         if stats['current_temp'] > 28:
             recommendations.append({
@@ -56,6 +96,9 @@ def generate_recommendations(data, stats):
             })
 
     avg_daily_energy = data['energy_consumption'].mean()
+    if forecast is not None and len(forecast) > 0:
+        # Act on where consumption is heading, not only where it has been.
+        avg_daily_energy = max(avg_daily_energy, forecast['energy_consumption'].mean())
     if avg_daily_energy > 15:
         recommendations.append({
             'title': 'Implement energy efficiency measures',
@@ -107,45 +150,44 @@ def generate_recommendations(data, stats):
     return recommendations
 
 
-def calculate_potential_savings(data):
+@instrument('calculate_potential_savings', 'analytics')
+def calculate_potential_savings(data, totals=None):
     savings = {}
 
-    total_water_usage = data['water_usage'].sum()
+    total_water_usage = totals['water'] if totals else data['water_usage'].sum()
     avg_water_daily = data['water_usage'].mean()
 
-    savings['water_savings'] = total_water_usage * 0.25
-    savings['water_savings_percent'] = 25.0
+    savings['water_savings'] = total_water_usage * WATER_REDUCTION_PERCENT / 100
+    savings['water_savings_percent'] = WATER_REDUCTION_PERCENT
 
-    total_energy_usage = data['energy_consumption'].sum()
+    total_energy_usage = totals['energy'] if totals else data['energy_consumption'].sum()
     avg_energy_daily = data['energy_consumption'].mean()
 
-    savings['energy_savings'] = total_energy_usage * 0.30
-    savings['energy_savings_percent'] = 30.0
-
-    water_cost_per_liter = 0.002
-    energy_cost_per_kwh = 0.15
+    savings['energy_savings'] = total_energy_usage * ENERGY_REDUCTION_PERCENT / 100
+    savings['energy_savings_percent'] = ENERGY_REDUCTION_PERCENT
 
     savings[
-        'water_cost_savings'] = savings['water_savings'] * water_cost_per_liter
+        'water_cost_savings'] = savings['water_savings'] * WATER_COST_PER_LITER
     savings['energy_cost_savings'] = savings[
-        'energy_savings'] * energy_cost_per_kwh
+        'energy_savings'] * ENERGY_COST_PER_KWH
     savings['cost_savings'] = savings['water_cost_savings'] + savings[
         'energy_cost_savings']
 
     return savings
 
 
-def calculate_environmental_impact(data, savings):
+@instrument('calculate_environmental_impact', 'analytics')
+def calculate_environmental_impact(data, savings, totals=None):
     impact = {}
 
-    carbon_per_kwh = 0.5
-    carbon_per_liter = 0.003
-
-    total_carbon_current = (data['energy_consumption'].sum() * carbon_per_kwh +
-                            data['water_usage'].sum() * carbon_per_liter)
+    if totals:
+        total_carbon_current = totals['co2']
+    else:
+        total_carbon_current = (data['energy_consumption'].sum() * CARBON_PER_KWH +
+                                data['water_usage'].sum() * CARBON_PER_LITER)
 
-    carbon_savings = (savings['energy_savings'] * carbon_per_kwh +
-                      savings['water_savings'] * carbon_per_liter)
+    carbon_savings = (savings['energy_savings'] * CARBON_PER_KWH +
+                      savings['water_savings'] * CARBON_PER_LITER)
 
     impact['carbon_reduction'] = carbon_savings
     impact['carbon_reduction_percent'] = (carbon_savings /
@@ -0,0 +1,171 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import pandas as pd
+import numpy as np
+
+from impact_factors import WATER_COST_PER_LITER, ENERGY_COST_PER_KWH, CARBON_PER_KWH, CARBON_PER_LITER
+from recommendation_engine import WATER_REDUCTION_PERCENT, ENERGY_REDUCTION_PERCENT
+
+SCENARIO_PARAMETERS = [
+    'water_reduction_percent',
+    'energy_reduction_percent',
+    'water_cost_per_liter',
+    'energy_cost_per_kwh',
+    'carbon_per_kwh',
+    'carbon_per_liter',
+]
+
+DEFAULT_SCENARIO = {
+    'water_reduction_percent': WATER_REDUCTION_PERCENT,
+    'energy_reduction_percent': ENERGY_REDUCTION_PERCENT,
+    'water_cost_per_liter': WATER_COST_PER_LITER,
+    'energy_cost_per_kwh': ENERGY_COST_PER_KWH,
+    'carbon_per_kwh': CARBON_PER_KWH,
+    'carbon_per_liter': CARBON_PER_LITER,
+}
+
+DEFAULT_RANGES = {
+    'water_reduction_percent': (10.0, 40.0),
+    'energy_reduction_percent': (10.0, 45.0),
+    'water_cost_per_liter': (0.001, 0.004),
+    'energy_cost_per_kwh': (0.10, 0.25),
+    'carbon_per_kwh': (0.3, 0.7),
+    'carbon_per_liter': (0.002, 0.005),
+}
+
+SCENARIO_OUTCOMES = ['water_savings', 'energy_savings', 'cost_savings', 'carbon_reduction', 'carbon_reduction_percent']
+
+
+def _usage_totals(data):
+    # Every outcome is linear in total usage, so one pass over the data is enough.
+    return float(data['water_usage'].sum()), float(data['energy_consumption'].sum())
+
+
+def _evaluate(total_water, total_energy, params):
+    water_savings = total_water * params['water_reduction_percent'] / 100
+    energy_savings = total_energy * params['energy_reduction_percent'] / 100
+    cost_savings = water_savings * params['water_cost_per_liter'] + energy_savings * params['energy_cost_per_kwh']
+    carbon_current = total_energy * params['carbon_per_kwh'] + total_water * params['carbon_per_liter']
+    carbon_reduction = energy_savings * params['carbon_per_kwh'] + water_savings * params['carbon_per_liter']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        carbon_reduction_percent = np.where(carbon_current > 0, carbon_reduction / carbon_current * 100, 0.0)
+
+    return {
+        'water_savings': water_savings,
+        'energy_savings': energy_savings,
+        'cost_savings': cost_savings,
+        'carbon_reduction': carbon_reduction,
+        'carbon_reduction_percent': carbon_reduction_percent,
+    }
+
+
+def simulate_scenario_grid(data, **grid):
+    """
+    Evaluate every combination of scenario parameters in one broadcast computation.
+
+    Args:
+        data: DataFrame with environmental metrics (usually the filtered range)
+        **grid: Values for any of SCENARIO_PARAMETERS, each a scalar or 1-D sequence.
+            Parameters that are not given use DEFAULT_SCENARIO.
+
+    Returns:
+        DataFrame: One row per parameter combination with all outcomes
+    """
+    unknown = set(grid) - set(SCENARIO_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown scenario parameters: {sorted(unknown)}")
+
+    axes = [np.atleast_1d(np.asarray(grid.get(name, DEFAULT_SCENARIO[name]), dtype=float))
+            for name in SCENARIO_PARAMETERS]
+    # Each parameter gets its own axis so the outcome arrays cover the full grid.
+    params = dict(zip(SCENARIO_PARAMETERS, np.ix_(*axes)))
+    total_water, total_energy = _usage_totals(data)
+    outcomes = _evaluate(total_water, total_energy, params)
+
+    shape = tuple(len(axis) for axis in axes)
+    result = {name: np.broadcast_to(params[name], shape).ravel() for name in SCENARIO_PARAMETERS}
+    result.update({name: np.broadcast_to(outcomes[name], shape).ravel() for name in SCENARIO_OUTCOMES})
+    return pd.DataFrame(result)
+
+
+def sample_scenarios(data, n=10000, ranges=None, seed=None):
+    """
+    Monte Carlo sample of scenarios with parameters drawn uniformly from ranges.
+
+    Args:
+        data: DataFrame with environmental metrics
+        n: Number of samples
+        ranges: Dict of parameter -> (low, high); missing parameters use DEFAULT_RANGES
+        seed: Random seed for reproducible samples
+
+    Returns:
+        DataFrame: One row per sample with parameters and outcomes
+    """
+    ranges = {**DEFAULT_RANGES, **(ranges or {})}
+    rng = np.random.default_rng(seed)
+    params = {name: rng.uniform(*ranges[name], size=n) for name in SCENARIO_PARAMETERS}
+    total_water, total_energy = _usage_totals(data)
+    outcomes = _evaluate(total_water, total_energy, params)
+    return pd.DataFrame({**params, **outcomes})
+
+
+def summarize_distribution(scenarios, percentiles=(5, 50, 95)):
+    """
+    Summarize the outcome distribution of sampled scenarios.
+
+    Args:
+        scenarios: DataFrame returned by sample_scenarios or simulate_scenario_grid
+        percentiles: Percentiles to report
+
+    Returns:
+        DataFrame: One row per outcome with mean and the requested percentiles
+    """
+    values = scenarios[SCENARIO_OUTCOMES].to_numpy()
+    summary = pd.DataFrame(
+        np.percentile(values, percentiles, axis=0).T,
+        index=SCENARIO_OUTCOMES,
+        columns=[f'p{p}' for p in percentiles],
+    )
+    summary.insert(0, 'mean', values.mean(axis=0))
+    return summary
+
+
+def sensitivity_table(data, ranges=None, base=None, outcome='cost_savings'):
+    """
+    One-at-a-time sensitivity of an outcome to each scenario parameter.
+
+    Every parameter is swung to the low and high end of its range while the
+    others stay at the base scenario; all swings are evaluated in one call.
+
+    Args:
+        data: DataFrame with environmental metrics
+        ranges: Dict of parameter -> (low, high); missing parameters use DEFAULT_RANGES
+        base: Dict of base parameter values; missing parameters use DEFAULT_SCENARIO
+        outcome: Outcome column to measure
+
+    Returns:
+        DataFrame: Parameters sorted by swing size, with low/high outcome values
+    """
+    ranges = {**DEFAULT_RANGES, **(ranges or {})}
+    base = {**DEFAULT_SCENARIO, **(base or {})}
+    count = len(SCENARIO_PARAMETERS)
+
+    # Row 2*i swings parameter i low, row 2*i + 1 swings it high.
+    params = {name: np.full(2 * count, base[name], dtype=float) for name in SCENARIO_PARAMETERS}
+    for i, name in enumerate(SCENARIO_PARAMETERS):
+        params[name][2 * i], params[name][2 * i + 1] = ranges[name]
+
+    total_water, total_energy = _usage_totals(data)
+    values = _evaluate(total_water, total_energy, params)[outcome]
+    base_value = float(_evaluate(total_water, total_energy, base)[outcome])
+
+    table = pd.DataFrame({
+        'parameter': SCENARIO_PARAMETERS,
+        'low_value': [ranges[name][0] for name in SCENARIO_PARAMETERS],
+        'high_value': [ranges[name][1] for name in SCENARIO_PARAMETERS],
+        f'{outcome}_at_low': values[0::2],
+        f'{outcome}_at_high': values[1::2],
+    })
+    table['swing'] = (table[f'{outcome}_at_high'] - table[f'{outcome}_at_low']).abs()
+    table['base'] = base_value
+    return table.sort_values('swing', ascending=False).reset_index(drop=True)
@@ -0,0 +1,118 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import os
+import threading
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+SECTION_WORKERS = int(os.environ.get("METRICS_SECTION_WORKERS", "4"))
+
+_section_executor = None
+_section_executor_lock = threading.Lock()
+
+
+def get_section_executor():
+    """
+    Thread pool shared by every dashboard session in the process.
+
+    Returns:
+        ThreadPoolExecutor: The shared pool, created on first use
+    """
+    global _section_executor
+    with _section_executor_lock:
+        if _section_executor is None:
+            _section_executor = ThreadPoolExecutor(max_workers=SECTION_WORKERS, thread_name_prefix="dashboard-section")
+        return _section_executor
+
+
+def _copy_outcome(source, target):
+    if source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+
+class SectionScheduler:
+    """
+    Runs the computations behind dashboard sections concurrently.
+
+    Every section is submitted up front; a section with dependencies starts
+    as soon as they finish and receives their results as extra positional
+    arguments. The page then renders top to bottom, waiting only for the
+    section it is about to draw, so the whole rerun takes about as long as
+    the slowest chain of dependent sections rather than the sum of all of them.
+    The computations must not call Streamlit, since they run outside the
+    script thread.
+    """
+
+    def __init__(self, executor=None):
+        self._executor = executor or get_section_executor()
+        self._futures = {}
+
+    def __contains__(self, name):
+        return name in self._futures
+
+    def add_result(self, name, value):
+        """
+        Register an already known result, e.g. from the precompute worker.
+
+        Args:
+            name: Section name
+            value: Result returned by result(name)
+        """
+        future = Future()
+        future.set_result(value)
+        self._futures[name] = future
+
+    def submit(self, name, func, *args, depends_on=(), **kwargs):
+        """
+        Schedule a section computation.
+
+        Args:
+            name: Section name, used by result() and depends_on
+            func: Function computing the section
+            *args: Positional arguments for func
+            depends_on: Names of sections whose results are appended to args, in order
+            **kwargs: Keyword arguments for func
+        """
+        dependencies = [self._futures[dependency] for dependency in depends_on]
+        if not dependencies:
+            self._futures[name] = self._executor.submit(func, *args, **kwargs)
+            return
+
+        # Dependents are started from the callbacks instead of blocking a worker
+        # on their inputs, so a small pool cannot deadlock.
+        future = Future()
+        remaining = [len(dependencies)]
+        remaining_lock = threading.Lock()
+
+        def start(_):
+            with remaining_lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            failed = next((dependency for dependency in dependencies if dependency.exception() is not None), None)
+            if failed is not None:
+                future.set_exception(failed.exception())
+                return
+            inner = self._executor.submit(func, *args, *[dependency.result() for dependency in dependencies], **kwargs)
+            inner.add_done_callback(lambda done: _copy_outcome(done, future))
+
+        self._futures[name] = future
+        for dependency in dependencies:
+            dependency.add_done_callback(start)
+
+    def result(self, name, timeout=None):
+        """
+        Wait for a section and return its result.
+
+        Args:
+            name: Section name
+            timeout: Seconds to wait, or None to wait indefinitely
+
+        Returns:
+            Result of the section's function; its exception is re-raised here
+        """
+        return self._futures[name].result(timeout)
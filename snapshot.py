@@ -0,0 +1,113 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import os
+import json
+import shutil
+import logging
+import threading
+
+import pandas as pd
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = os.environ.get("METRICS_SNAPSHOT_DIR", "metrics_snapshot")
+META_FILE = "meta.json"
+# Bump when the content of snapshots changes so older ones are ignored.
+SNAPSHOT_FORMAT = 3
+
+_snapshot_lock = threading.Lock()
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return str(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def save_snapshot(data, version, aggregates=None, path=SNAPSHOT_DIR):
+    """
+    Persist a loaded metrics frame and its aggregates as memory-mappable arrays.
+
+    Each column is written as its own .npy file next to a JSON manifest that
+    records the data version. Text columns such as source are stored as
+    integer codes with their labels in the manifest. The new snapshot
+    replaces the old one atomically.
+
+    Args:
+        data: DataFrame to persist
+        version: Data version the frame was loaded at (see db.get_data_version)
+        aggregates: JSON-serializable dict of precomputed results
+        path: Snapshot directory
+    """
+    staging = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    try:
+        os.makedirs(staging, exist_ok=True)
+        columns = []
+        for i, column in enumerate(data.columns):
+            values = data[column].to_numpy()
+            entry = {'name': column, 'file': f"col_{i}.npy"}
+            if values.dtype == object:
+                # Python objects can't be memory-mapped, so text is dictionary-encoded.
+                codes, labels = pd.factorize(data[column])
+                values = codes.astype(np.int32)
+                entry.update(labels=[str(label) for label in labels], dtype=str(data[column].dtype))
+            np.save(os.path.join(staging, entry['file']), values)
+            columns.append(entry)
+
+        meta = {'format': SNAPSHOT_FORMAT, 'version': list(version), 'rows': len(data), 'columns': columns, 'aggregates': aggregates or {}}
+        with open(os.path.join(staging, META_FILE), 'w') as handle:
+            json.dump(meta, handle, default=_json_default)
+
+        with _snapshot_lock:
+            previous = f"{path}.old-{os.getpid()}"
+            if os.path.isdir(path):
+                os.replace(path, previous)
+            os.replace(staging, path)
+            shutil.rmtree(previous, ignore_errors=True)
+        logger.info(f"Saved snapshot of {len(data)} records at version {version}")
+    except Exception as e:
+        logger.error(f"Error saving snapshot: {e}")
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _load_column(path, column):
+    values = np.load(os.path.join(path, column['file']), mmap_mode='r')
+    if 'labels' not in column:
+        return values
+    return pd.Categorical.from_codes(values, column['labels']).astype(column['dtype'])
+
+
+def load_snapshot(version, path=SNAPSHOT_DIR):
+    """
+    Load a snapshot if it was taken at the given data version.
+
+    Args:
+        version: Current data version
+        path: Snapshot directory
+
+    Returns:
+        tuple: (DataFrame, aggregates dict), or None if missing or stale
+    """
+    try:
+        with _snapshot_lock:
+            with open(os.path.join(path, META_FILE)) as handle:
+                meta = json.load(handle)
+            if meta.get('format') != SNAPSHOT_FORMAT:
+                return None
+            if version is None or tuple(meta['version']) != tuple(version):
+                return None
+
+            # Memory-mapped reads only page in what pandas actually touches;
+            # copy=False keeps pandas from copying the maps into its own blocks.
+            data = pd.DataFrame({column['name']: _load_column(path, column) for column in meta['columns']}, copy=False)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.error(f"Error loading snapshot: {e}")
+        return None
+
+    logger.info(f"Loaded snapshot of {meta['rows']} records at version {tuple(version)}")
+    return data, meta['aggregates']
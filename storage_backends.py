@@ -0,0 +1,258 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import os
+import logging
+import threading
+from abc import ABC, abstractmethod
+
+import pandas as pd
+
+import db
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+logger = logging.getLogger(__name__)
+
+# 'sqlite' reads straight from the metrics database, 'duckdb' from a columnar
+# mirror of it. Writes always go to SQLite, which stays the source of truth.
+ANALYTICS_BACKEND = os.environ.get("METRICS_ANALYTICS_BACKEND", "sqlite")
+COLUMNAR_PATH = os.environ.get("METRICS_COLUMNAR_PATH", "agricultural_metrics.duckdb")
+
+DUCKDB_BUCKETS = {
+    'H': "date_trunc('hour', date)",
+    'D': "date_trunc('day', date)",
+    'W': "date_trunc('week', date)",
+    'M': "date_trunc('month', date)",
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def duckdb_available():
+    return duckdb is not None
+
+
+class StorageBackend(ABC):
+    """
+    Read interface for the analytical queries the dashboard makes.
+
+    Subclasses implement range scans of raw readings and bucketed
+    aggregations that include the daily rollups left behind by retention.
+    """
+
+    name = None
+
+    @abstractmethod
+    def scan(self, start_date=None, end_date=None, columns=None):
+        """
+        Raw readings in a date range, ordered by date.
+
+        Args:
+            start_date: Start of the range (inclusive), or None
+            end_date: End of the range (inclusive), or None
+            columns: Metric columns to return (defaults to all)
+
+        Returns:
+            DataFrame: date plus the requested columns
+        """
+
+    @abstractmethod
+    def aggregate(self, start_date=None, end_date=None, freq='D', aggs=('mean',)):
+        """
+        Metrics grouped into time buckets, with the same columns as db.load_resampled.
+
+        Args:
+            start_date: Start of the range (inclusive), or None
+            end_date: End of the range (inclusive), or None
+            freq: Bucket size, one of db.RESAMPLE_BUCKETS
+            aggs: Aggregates per metric, any of db.RESAMPLE_AGGREGATES
+
+        Returns:
+            DataFrame: One row per bucket
+        """
+
+    def close(self):
+        pass
+
+
+def _check_aggregate_args(freq, aggs):
+    if freq not in db.RESAMPLE_BUCKETS:
+        raise ValueError(f"Unsupported resample frequency {freq!r}, expected one of {list(db.RESAMPLE_BUCKETS)}")
+    unknown = [agg for agg in aggs if agg not in db.RESAMPLE_AGGREGATES]
+    if unknown:
+        raise ValueError(f"Unsupported aggregates {unknown}, expected any of {list(db.RESAMPLE_AGGREGATES)}")
+
+
+class SQLiteBackend(StorageBackend):
+    """The metrics database itself: row storage, queries go through db.py."""
+
+    name = 'sqlite'
+
+    def scan(self, start_date=None, end_date=None, columns=None):
+        columns = list(columns or db.METRIC_COLUMNS)
+        frames = list(db.iter_metrics_chunks(start_date, end_date))
+        if not frames:
+            return pd.DataFrame(columns=['date'] + columns)
+        return pd.concat(frames, ignore_index=True)[['date'] + columns]
+
+    def aggregate(self, start_date=None, end_date=None, freq='D', aggs=('mean',)):
+        _check_aggregate_args(freq, aggs)
+        return db.load_resampled(start_date, end_date, freq=freq, aggs=aggs)
+
+
+class DuckDBBackend(StorageBackend):
+    """
+    Columnar mirror of the metrics tables in an embedded DuckDB file.
+
+    The mirror is brought up to date lazily before each query: appended rows
+    are copied over by id, anything else (retention, deletes, updates) reloads it.
+    """
+
+    name = 'duckdb'
+
+    def __init__(self, path=COLUMNAR_PATH):
+        if duckdb is None:
+            raise RuntimeError("The duckdb package is required for the columnar backend")
+        self.path = path
+        self._conn = duckdb.connect(path)
+        self._lock = threading.Lock()
+        self._version = None
+        self._last_id = 0
+
+    def _replace_table(self, name, frame):
+        self._conn.register('incoming', frame)
+        self._conn.execute(f"CREATE OR REPLACE TABLE {name} AS SELECT * FROM incoming")
+        self._conn.unregister('incoming')
+
+    def sync(self):
+        version = db.get_data_version()
+        with self._lock:
+            if version is None or version == self._version:
+                return
+
+            new_rows = db.load_rows_after(self._last_id) if self._version else None
+            if (self._version and new_rows is not None and version[2] == self._version[2]
+                    and version[0] - self._version[0] == len(new_rows)):
+                if len(new_rows):
+                    self._conn.register('incoming', new_rows[['id', 'date'] + db.METRIC_COLUMNS])
+                    self._conn.execute("INSERT INTO environmental_metrics SELECT * FROM incoming")
+                    self._conn.unregister('incoming')
+                logger.info(f"Appended {len(new_rows)} records to the columnar mirror")
+            else:
+                # Straight from the database: a frame from the query cache could
+                # predate the version being mirrored.
+                raw, version = db.load_data_with_version()
+                raw = raw[['id', 'date'] + db.METRIC_COLUMNS]
+                rollups = pd.read_sql("SELECT * FROM environmental_metrics_daily", db.engine)
+                rollups['day'] = pd.to_datetime(rollups['day'])
+                self._replace_table('environmental_metrics', raw.sort_values('date'))
+                self._replace_table('environmental_metrics_daily', rollups)
+                logger.info(f"Loaded {len(raw)} records into the columnar mirror at {self.path}")
+
+            # Without a version the next query reloads again.
+            self._version = version
+            self._last_id = version[1] if version else 0
+
+    def _query(self, sql, params):
+        self.sync()
+        # Cursors are per-thread handles on the same database.
+        return self._conn.cursor().execute(sql, params).df()
+
+    @staticmethod
+    def _where(column, start_date, end_date, params):
+        conditions = []
+        if start_date is not None:
+            conditions.append(f"{column} >= ?")
+            params.append(pd.Timestamp(start_date).to_pydatetime())
+        if end_date is not None:
+            conditions.append(f"{column} <= ?")
+            params.append(pd.Timestamp(end_date).to_pydatetime())
+        return f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    def scan(self, start_date=None, end_date=None, columns=None):
+        columns = list(columns or db.METRIC_COLUMNS)
+        start_date, end_date = db._date_bounds(start_date, end_date)
+        params = []
+        where = self._where('date', start_date, end_date, params)
+        return self._query(f"SELECT date, {', '.join(columns)} FROM environmental_metrics {where} ORDER BY date", params)
+
+    def aggregate(self, start_date=None, end_date=None, freq='D', aggs=('mean',)):
+        _check_aggregate_args(freq, aggs)
+        start_date, end_date = db._date_bounds(start_date, end_date)
+
+        params = []
+        raw_columns = ', '.join(
+            f'{metric} AS {metric}_sum, {metric} AS {metric}_min, {metric} AS {metric}_max'
+            for metric in db.METRIC_COLUMNS
+        )
+        sources = [f"SELECT date, 1 AS n, {raw_columns} FROM environmental_metrics "
+                   f"{self._where('date', start_date, end_date, params)}"]
+        # Same rule as db.load_resampled: rollups only feed daily or coarser buckets.
+        if freq != 'H':
+            day_start = pd.Timestamp(start_date).normalize() if start_date is not None else None
+            day_end = pd.Timestamp(end_date).normalize() if end_date is not None else None
+            daily_columns = ', '.join(f'{metric}_sum, {metric}_min, {metric}_max' for metric in db.METRIC_COLUMNS)
+            sources.append(f"SELECT day AS date, sample_count AS n, {daily_columns} FROM environmental_metrics_daily "
+                           f"{self._where('day', day_start, day_end, params)}")
+
+        selects = [f"{DUCKDB_BUCKETS[freq]} AS bucket", "SUM(n) AS sample_count"]
+        for metric in db.METRIC_COLUMNS:
+            for agg in aggs:
+                if agg == 'mean':
+                    selects.append(f"SUM({metric}_sum) / SUM(n) AS {metric}")
+                else:
+                    selects.append(f"{agg.upper()}({metric}_{agg}) AS {metric}_{agg}")
+
+        df = self._query(f"""
+            SELECT {', '.join(selects)}
+            FROM ({' UNION ALL '.join(sources)})
+            GROUP BY bucket
+            ORDER BY bucket
+        """, params)
+        df = df.rename(columns={'bucket': 'date'})
+        df['date'] = pd.to_datetime(df['date'])
+        return df
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+BACKENDS = {
+    'sqlite': SQLiteBackend,
+    'duckdb': DuckDBBackend,
+}
+
+
+def get_backend(name=None):
+    """
+    Shared instance of the configured analytics backend.
+
+    Falls back to SQLite if the columnar backend is selected but cannot be
+    opened (for example when duckdb is not installed).
+
+    Args:
+        name: Backend name, defaults to METRICS_ANALYTICS_BACKEND
+
+    Returns:
+        StorageBackend: Backend instance
+    """
+    name = name or ANALYTICS_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown analytics backend {name!r}, expected one of {list(BACKENDS)}")
+
+    with _backends_lock:
+        backend = _backends.get(name)
+        if backend is None:
+            try:
+                backend = BACKENDS[name]()
+            except Exception as e:
+                logger.error(f"Error opening {name} backend, using SQLite: {e}")
+                backend = _backends.get('sqlite') or SQLiteBackend()
+                name = 'sqlite'
+            _backends[name] = backend
+    return backend
@@ -0,0 +1,105 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import os
+import subprocess
+import sys
+import tempfile
+import types
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# db configures itself from the environment at import time, so the test
+# database has to be chosen before any test module imports it.
+TEST_DIR = tempfile.mkdtemp(prefix="metrics-tests-")
+os.environ["METRICS_DB_URL"] = f"sqlite:///{os.path.join(TEST_DIR, 'metrics.db')}"
+os.environ["METRICS_SNAPSHOT_DIR"] = os.path.join(TEST_DIR, "snapshot")
+os.environ.setdefault("METRICS_RETENTION_DAYS", "0")
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import db  # noqa: E402
+import snapshot  # noqa: E402
+
+
+def _reset_partitions():
+    with db._partition_lock:
+        for shard_engine in db._partition_engines.values():
+            shard_engine.dispose()
+        db._partition_engines.clear()
+    db._sealed_partition_cache.clear()
+    db._block_shard_cache.clear()
+
+
+@pytest.fixture
+def metrics_db():
+    """Empty database with cold caches."""
+    with db.engine.begin() as conn:
+        for table in reversed(db.metadata.sorted_tables):
+            conn.execute(table.delete())
+    db.clear_query_cache()
+    db._ledger_checked = False
+    db._last_retention_run = 0.0
+    yield db
+    db.clear_query_cache()
+
+
+@pytest.fixture
+def partitioned_db(metrics_db, tmp_path, monkeypatch):
+    """Empty database that writes raw readings to monthly shards."""
+    monkeypatch.setattr(db, 'PARTITION_GRANULARITY', 'month')
+    monkeypatch.setattr(db, 'PARTITION_DIR', str(tmp_path / 'partitions'))
+    _reset_partitions()
+    yield db
+    _reset_partitions()
+
+
+@pytest.fixture
+def make_readings():
+    """Factory for frames of evenly spaced readings."""
+    def make(start, periods, freq='h', source='', seed=0):
+        rng = np.random.default_rng(seed)
+        frame = pd.DataFrame({'date': pd.date_range(start, periods=periods, freq=freq), 'source': source})
+        for metric in db.METRIC_COLUMNS:
+            low, high = db.METRIC_RANGES[metric]
+            frame[metric] = np.round(rng.uniform(low, high, periods), 2)
+        return frame
+    return make
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path, monkeypatch):
+    """Private snapshot directory, so no test picks up another's snapshot."""
+    path = str(tmp_path / "snapshot")
+    monkeypatch.setattr(snapshot, 'SNAPSHOT_DIR', path)
+    monkeypatch.setattr(snapshot.save_snapshot, '__defaults__', (None, path))
+    monkeypatch.setattr(snapshot.load_snapshot, '__defaults__', (path,))
+    return path
+
+
+@pytest.fixture
+def sample_data(monkeypatch, make_readings):
+    """Three days of hourly readings served as data.sample_data, which first runs seed from."""
+    frame = make_readings('2025-01-01', 72)
+    module = types.ModuleType('data.sample_data')
+    module.get_environmental_data = lambda *args, **kwargs: frame.copy()
+    package = types.ModuleType('data')
+    package.__path__ = []
+    package.sample_data = module
+    monkeypatch.setitem(sys.modules, 'data', package)
+    monkeypatch.setitem(sys.modules, 'data.sample_data', module)
+    # data_processor binds the generator at import time.
+    import data_processor
+    monkeypatch.setattr(data_processor, 'get_environmental_data', module.get_environmental_data)
+    return frame
+
+
+@pytest.fixture
+def write_from_other_process():
+    """Runs a db script in a child process, like the ingest service writing next to the dashboard."""
+    def run(script):
+        # The child inherits METRICS_DB_URL, so it writes to the test database.
+        subprocess.run([sys.executable, "-c", "import pandas as pd\nimport db\n" + script],
+                       cwd=REPO_DIR, env=os.environ.copy(), check=True, capture_output=True)
+    return run
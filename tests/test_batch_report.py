@@ -0,0 +1,50 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import os
+
+import pytest
+from sqlalchemy import create_engine
+
+from eco_impact import get_all_regions
+
+pytestmark = pytest.mark.usefixtures('sample_data')
+
+
+@pytest.fixture
+def site_paths(tmp_path, make_readings):
+    paths = []
+    for site in range(3):
+        path = str(tmp_path / f"site {site}.db")
+        engine = create_engine(f"sqlite:///{path}")
+        make_readings('2025-01-01', 48 + site, seed=site).to_sql('environmental_metrics', engine, index=False)
+        engine.dispose()
+        paths.append(path)
+    return paths
+
+
+def _open_descriptors():
+    return len(os.listdir('/proc/self/fd'))
+
+
+def test_reports_every_site(site_paths, tmp_path):
+    import batch_report
+
+    missing = str(tmp_path / "mistyped.db")
+    report = batch_report.run_batch_reports(site_paths + [missing], get_all_regions()[0], max_workers=1)
+    assert report['status'].tolist() == ['ok', 'ok', 'ok', 'error']
+    assert report['records'].iloc[:3].tolist() == [48, 49, 50]
+    assert report['site'].tolist() == ['site 0', 'site 1', 'site 2', 'mistyped']
+    # Sites are opened read-only, so a wrong path is not created as an empty database.
+    assert not os.path.exists(missing)
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason="needs /proc to count descriptors")
+def test_sites_do_not_keep_connections_open(site_paths):
+    import batch_report
+
+    batch_report.generate_site_report(site_paths[0], get_all_regions()[0])
+    before = _open_descriptors()
+    for _ in range(5):
+        for path in site_paths:
+            assert batch_report.generate_site_report(path, get_all_regions()[0])['status'] == 'ok'
+    assert _open_descriptors() <= before
@@ -0,0 +1,91 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+from block_storage import decode_blocks, decode_floats, decode_integers, encode_blocks, encode_floats, encode_integers
+
+
+def test_integers_round_trip():
+    rng = np.random.default_rng(0)
+    values = np.concatenate([np.arange(0, 9000, 900), rng.integers(-2**40, 2**40, 50), [2**62, -2**62, 0]])
+    np.testing.assert_array_equal(decode_integers(encode_integers(values), len(values)), values)
+
+
+def test_floats_round_trip_bit_for_bit():
+    values = np.array([20.5, 20.5, 20.75, -0.0, 0.0, np.nan, np.inf, -np.inf, 1e-300, 123456.789])
+    decoded = decode_floats(encode_floats(values), len(values))
+    np.testing.assert_array_equal(decoded.view(np.uint64), values.view(np.uint64))
+
+
+def test_regular_series_compress_well(make_readings):
+    dates = make_readings('2025-01-01', 4096, freq='15min')['date'].to_numpy(dtype='datetime64[us]').view(np.int64)
+    assert len(encode_integers(dates)) < 100
+
+
+def test_blocks_round_trip(metrics_db, make_readings):
+    frame = make_readings('2025-01-01', 50, freq='15min')
+    frame['source'] = np.where(np.arange(50) % 3, 'gateway-a', None)
+    frame.insert(0, 'id', np.arange(1, 51) * 2)
+    blocks = encode_blocks(frame, metrics_db.METRIC_COLUMNS, block_size=7)
+    assert len(blocks) == 8
+    assert [block['row_count'] for block in blocks] == [7] * 7 + [1]
+
+    decoded = decode_blocks(blocks, metrics_db.METRIC_COLUMNS)
+    expected = frame.assign(source=frame['source'].fillna(''), date=frame['date'].astype('datetime64[us]'))
+    pd.testing.assert_frame_equal(decoded, expected[decoded.columns], check_dtype=False)
+    assert decoded['date'].dtype == 'datetime64[us]'
+
+    # Metrics that aren't asked for are left out.
+    assert list(decode_blocks(blocks, ['temperature']).columns) == ['id', 'date', 'source', 'temperature']
+
+
+def test_empty_decode_is_typed(metrics_db):
+    empty = decode_blocks([], metrics_db.METRIC_COLUMNS)
+    assert list(empty.columns) == ['id', 'date', 'source'] + metrics_db.METRIC_COLUMNS
+    assert empty['date'].dtype == 'datetime64[us]'
+    assert empty['id'].dtype == np.int64
+    assert empty['date'].searchsorted(pd.Timestamp('2025-01-01 23:59:59.999999')) == 0
+
+
+@pytest.fixture
+def block_db(partitioned_db, monkeypatch):
+    monkeypatch.setattr(partitioned_db, 'BLOCK_STORAGE', True)
+    return partitioned_db
+
+
+def test_sealed_block_shard_reads_like_the_open_one(block_db, make_readings):
+    readings = make_readings('2025-01-20', 24 * 20, source='gateway-a')
+    block_db.upsert_data(readings)
+    before = block_db.load_partitioned()
+    totals = block_db.get_ledger_totals(date(2025, 1, 25), date(2025, 2, 3))
+
+    block_db.seal_partition('2025-01')
+    assert block_db.is_partition_sealed('2025-01')
+    assert block_db._is_block_shard('2025-01')
+    block_db._sealed_partition_cache.clear()
+
+    after = block_db.load_partitioned()
+    pd.testing.assert_frame_equal(after, before, check_dtype=False)
+    assert block_db.get_ledger_totals(date(2025, 1, 25), date(2025, 2, 3)) == pytest.approx(totals)
+    assert len(block_db.load_partitioned(date(2025, 1, 25), date(2025, 1, 26))) == 48
+    assert block_db.load_rows_after(before['id'].iloc[-5])['id'].tolist() == before['id'].iloc[-4:].tolist()
+    assert block_db.load_latest_rows(3)['id'].tolist() == before['id'].iloc[-3:].tolist()
+    assert block_db.load_resampled(freq='D')['sample_count'].sum() == len(readings)
+
+
+def test_empty_block_shard(block_db, make_readings):
+    block_db.upsert_data(make_readings('2025-01-20', 48))
+    with block_db._partition_engine('2025-01').begin() as conn:
+        conn.execute(text("DELETE FROM environmental_metrics"))
+
+    block_db.seal_partition('2025-01')
+    loaded = block_db.load_partitioned()
+    assert len(loaded) == 0
+    assert pd.api.types.is_datetime64_dtype(loaded['date'])
+    assert len(block_db.load_partitioned(date(2025, 1, 1), date(2025, 1, 31))) == 0
+    assert len(block_db.load_latest_rows(5)) == 0
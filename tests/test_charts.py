@@ -0,0 +1,90 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import plotly.graph_objects as go
+import pytest
+
+import charts
+
+
+@pytest.fixture(autouse=True)
+def cold_chart_cache():
+    charts.clear_chart_cache()
+    yield
+    charts.clear_chart_cache()
+
+
+def _figure(db, metrics=("Temperature",)):
+    data = db.load_data_from_db()
+    return data, charts.build_time_series_figure(data, metrics, charts.chart_data_key(data, db.get_data_version()))
+
+
+def test_same_data_version_reuses_the_figure(metrics_db, make_readings):
+    metrics_db.upsert_data(make_readings('2025-01-01', 48))
+    _, first = _figure(metrics_db, ("Temperature", "Humidity"))
+    _, second = _figure(metrics_db, ("Humidity", "Temperature"))
+    assert second is first
+
+
+def test_appended_rows_invalidate_the_figure(metrics_db, make_readings):
+    metrics_db.upsert_data(make_readings('2025-01-01', 48))
+    _, before = _figure(metrics_db)
+    metrics_db.upsert_data(make_readings('2025-01-03', 24, seed=1))
+    data, after = _figure(metrics_db)
+
+    assert after is not before
+    assert len(after.data[0].x) == len(data) == 72
+
+
+def test_updated_rows_invalidate_the_figure(metrics_db, make_readings):
+    readings = make_readings('2025-01-01', 48)
+    metrics_db.upsert_data(readings)
+    _, before = _figure(metrics_db)
+
+    # Same row count and date range: only the data version tells the two apart.
+    corrected = readings.iloc[:1].assign(temperature=readings['temperature'].iloc[0] + 5)
+    metrics_db.upsert_data(corrected)
+    data, after = _figure(metrics_db)
+
+    assert after is not before
+    assert after.data[0].y[0] == pytest.approx(corrected['temperature'].iloc[0])
+
+
+def test_traces_are_shared_between_selections(metrics_db, make_readings, monkeypatch):
+    metrics_db.upsert_data(make_readings('2025-01-01', 48))
+    built = []
+    build_trace = charts._build_trace
+    monkeypatch.setattr(charts, '_build_trace', lambda data, metric: built.append(metric) or build_trace(data, metric))
+
+    _, both = _figure(metrics_db, ("Temperature", "Humidity"))
+    _, single = _figure(metrics_db, ("Humidity",))
+    assert single is not both
+    assert built == ["Temperature", "Humidity"]
+
+
+def test_resampling_frequency_is_part_of_the_key(make_readings):
+    data = make_readings('2025-01-01', 48)
+    assert charts.chart_data_key(data, (48, 48, 0), 'h') != charts.chart_data_key(data, (48, 48, 0), 'D')
+    assert charts.chart_data_key(data.iloc[:0], (0, 0, 0)) == ((0, 0, 0), None, 0, None, None)
+
+
+def test_without_a_key_nothing_is_cached(make_readings):
+    data = make_readings('2025-01-01', 48)
+    assert charts.build_time_series_figure(data, ("Temperature",)) is not charts.build_time_series_figure(data, ("Temperature",))
+
+
+def test_least_recently_used_figures_are_evicted(make_readings, monkeypatch):
+    monkeypatch.setattr(charts, 'FIGURE_CACHE_SIZE', 2)
+    data = make_readings('2025-01-01', 48)
+    figures = [charts.build_time_series_figure(data, ("Temperature",), ('v', n)) for n in range(3)]
+    assert charts.build_time_series_figure(data, ("Temperature",), ('v', 2)) is figures[2]
+    assert charts.build_time_series_figure(data, ("Temperature",), ('v', 0)) is not figures[0]
+
+
+def test_large_series_use_webgl_without_markers(make_readings, monkeypatch):
+    monkeypatch.setattr(charts, 'WEBGL_POINT_THRESHOLD', 100)
+    monkeypatch.setattr(charts, 'MARKER_POINT_LIMIT', 50)
+    small = charts.build_time_series_figure(make_readings('2025-01-01', 40), ("Temperature",))
+    large = charts.build_time_series_figure(make_readings('2025-01-01', 200), ("Temperature",))
+
+    assert isinstance(small.data[0], go.Scatter) and small.data[0].mode == 'lines+markers'
+    assert isinstance(large.data[0], go.Scattergl) and large.data[0].mode == 'lines'
@@ -0,0 +1,56 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from correlation import lag_profile, lagged_correlation_heatmap, rolling_correlation_matrix
+
+
+@pytest.fixture
+def values():
+    rng = np.random.default_rng(0)
+    base = rng.normal(size=(200, 3))
+    base[:, 1] += 0.8 * np.roll(base[:, 0], 3)
+    # Large offsets are where a naive cumulative-sum correlation loses precision.
+    return base + np.array([1e4, -50.0, 0.0])
+
+
+@pytest.mark.parametrize('window', [5, 14, 60])
+@pytest.mark.parametrize('lag', [0, 1, 3])
+def test_matches_pandas_rolling_corr(values, window, lag):
+    result = rolling_correlation_matrix(values, window, lag)
+    frame = pd.DataFrame(values)
+    for i in range(values.shape[1]):
+        for j in range(values.shape[1]):
+            leading = frame[i].shift(lag)
+            expected = leading.rolling(window).corr(frame[j]).iloc[lag + window - 1:].to_numpy()
+            # pandas' own rolling sums drift by about 1e-6 on the 1e4 offset.
+            np.testing.assert_allclose(result[:, i, j], expected, atol=1e-5)
+
+    exact = [np.corrcoef(values[t:t + window, 0], values[t + lag:t + lag + window, 1])[0, 1]
+             for t in range(len(values) - lag - window + 1)]
+    np.testing.assert_allclose(result[:, 0, 1], exact, atol=1e-10)
+
+
+def test_flat_window_is_nan(values):
+    values[50:80, 0] = 3.0
+    result = rolling_correlation_matrix(values, 10, 0)
+    assert np.isnan(result[50:71, 0, 1]).all()
+    assert not np.isnan(result[:41, 0, 1]).any()
+
+
+def test_lag_profile_finds_the_lead(values):
+    data = pd.DataFrame(values, columns=['water_usage', 'soil_moisture', 'temperature'])
+    profile = lag_profile(data, 'water_usage', 'soil_moisture', max_lag=6)
+    assert int(profile.abs().idxmax()) == 3
+
+    heatmap = lagged_correlation_heatmap(data.assign(date=pd.date_range('2025-01-01', periods=200, freq='h')),
+                                         'water_usage', 'soil_moisture', window=20, max_lag=6)
+    assert heatmap.shape == (7, 200 - 20 - 6 + 1)
+
+
+def test_lag_profile_of_a_constant_metric_is_all_nan(values):
+    data = pd.DataFrame(values, columns=['water_usage', 'soil_moisture', 'temperature'])
+    data['water_usage'] = 12.5
+    assert lag_profile(data, 'water_usage', 'soil_moisture', max_lag=4).dropna().empty
@@ -0,0 +1,77 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import os
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+import snapshot
+
+# data_processor imports data.sample_data, which the sample_data fixture provides.
+pytestmark = pytest.mark.usefixtures('sample_data')
+
+
+def test_fresh_database_is_seeded(metrics_db, sample_data, snapshot_dir):
+    import data_processor
+
+    data, aggregates = data_processor.load_data_and_aggregates()
+    assert len(data) == len(sample_data)
+    assert aggregates['statistics']
+    assert metrics_db.get_data_version()[0] == len(sample_data)
+    # The seeding load has no version to vouch for it, so the snapshot is only
+    # written on the next load.
+    assert not os.path.exists(os.path.join(snapshot_dir, snapshot.META_FILE))
+
+    again, _ = data_processor.load_data_and_aggregates()
+    assert len(again) == len(sample_data)
+    assert snapshot.load_snapshot(metrics_db.get_data_version()) is not None
+
+
+def test_rolled_up_history_is_not_reseeded(metrics_db, sample_data, make_readings, snapshot_dir):
+    import data_processor
+
+    metrics_db.upsert_data(make_readings('2020-01-01', 48))
+    metrics_db.apply_retention_policy(retention_days=30)
+
+    data, _ = data_processor.load_data_and_aggregates()
+    assert len(data) == 0
+    assert metrics_db.get_data_version()[0] == 0
+
+
+def _mask_filter(data, start, end):
+    start = datetime.combine(start, datetime.min.time()) if type(start) is date else start
+    end = datetime.combine(end, datetime.max.time()) if type(end) is date else end
+    return data[(data['date'] >= start) & (data['date'] <= end)]
+
+
+@pytest.mark.parametrize('unit', ['s', 'ms', 'us', 'ns'])
+@pytest.mark.parametrize('bounds', [
+    (date(2025, 1, 2), date(2025, 1, 3)),
+    (datetime(2025, 1, 1, 6, 30, 0, 500), datetime(2025, 1, 2, 12, 0, 0, 999)),
+    (date(2030, 1, 1), date(2030, 1, 2)),
+    (date(2024, 1, 3), date(2024, 1, 1)),
+])
+def test_sorted_slice_matches_the_mask(make_readings, unit, bounds):
+    import data_processor
+
+    readings = make_readings('2025-01-01', 24 * 4)
+    readings['date'] = readings['date'].astype(f'datetime64[{unit}]')
+    expected = _mask_filter(readings, *bounds)
+
+    sliced = data_processor.filter_data_by_date(readings, *bounds)
+    pd.testing.assert_frame_equal(sliced, expected)
+    # An unsorted frame takes the mask path and must agree with it.
+    shuffled = readings.sample(frac=1, random_state=0)
+    unsorted = data_processor.filter_data_by_date(shuffled, *bounds)
+    pd.testing.assert_frame_equal(unsorted.sort_values('date'), expected)
+
+
+@pytest.mark.parametrize('dtype', ['datetime64[s]', 'datetime64[us]', object])
+def test_empty_frames_filter_to_empty(dtype):
+    import data_processor
+
+    empty = pd.DataFrame({'date': pd.Series([], dtype=dtype), 'temperature': pd.Series([], dtype=float)})
+    filtered = data_processor.filter_data_by_date(empty, date(2025, 1, 1), date(2025, 1, 2))
+    assert len(filtered) == 0
+    assert list(filtered.columns) == ['date', 'temperature']
@@ -0,0 +1,95 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+import data_quality
+from data_quality import DUPLICATE_FLAG, clean_data, compute_quality_flags, hampel_outliers, metric_flag
+
+
+def _steady_readings(periods, start='2025-01-01', freq='15min', source=''):
+    frame = pd.DataFrame({'date': pd.date_range(start, periods=periods, freq=freq), 'source': source})
+    for position, metric in enumerate(data_quality.QUALITY_METRICS):
+        frame[metric] = 20.0 + position
+    return frame
+
+
+def test_flat_window_does_not_flag_small_steps():
+    values = np.full((40, 1), 20.0)
+    values[30:] = 20.1
+    assert not hampel_outliers(values, mad_floor=0.3).any()
+    # Without a floor, a window with a MAD of 0 is not judged at all.
+    assert not hampel_outliers(values).any()
+
+
+def test_spike_in_flat_window_is_flagged():
+    readings = _steady_readings(40)
+    readings.loc[30, 'temperature'] = 45.0
+    readings.loc[35, 'temperature'] = 20.1
+    flags = compute_quality_flags(readings)
+
+    flagged = np.flatnonzero(flags & metric_flag('temperature'))
+    assert flagged.tolist() == [30]
+
+
+def test_same_time_from_two_sources_is_not_a_duplicate():
+    first = _steady_readings(30, source='gateway-a')
+    second = _steady_readings(30, source='gateway-b')
+    retry = first.iloc[[10]]
+    readings = pd.concat([first, second, retry]).sort_values('date', kind='stable', ignore_index=True)
+
+    flags = compute_quality_flags(readings)
+    duplicates = readings[(flags & DUPLICATE_FLAG) != 0]
+    assert len(duplicates) == 1
+    assert duplicates.iloc[0]['source'] == 'gateway-a'
+
+    history = readings.iloc[:20]
+    later = compute_quality_flags(pd.concat([first.iloc[5:6], second.iloc[25:26]]), history)
+    assert (later & DUPLICATE_FLAG).tolist() == [DUPLICATE_FLAG, 0]
+
+    cleaned = clean_data(readings)
+    assert len(cleaned) == 60
+
+
+def test_flags_from_older_rules_are_recomputed(metrics_db):
+    metrics_db.upsert_data(_steady_readings(40, source='gateway-a'))
+    data = metrics_db.load_data_from_db()
+    assert not data_quality.get_quality_flags(data).any()
+
+    with metrics_db.engine.begin() as conn:
+        conn.execute(text("UPDATE metric_quality_flags SET flags = :flag"), {'flag': DUPLICATE_FLAG})
+        conn.execute(text("UPDATE metric_revisions SET revision = 1 WHERE name = 'quality_rules'"))
+    assert not data_quality.get_quality_flags(data).any()
+
+
+def _stored_flag_ids(db):
+    with db.engine.connect() as conn:
+        return sorted(row_id for (row_id,) in conn.execute(text("SELECT id FROM metric_quality_flags")))
+
+
+def _flag_then_expire(db, make_readings, seal=False):
+    start = pd.Timestamp.now().normalize() - pd.Timedelta(days=75)
+    db.upsert_data(make_readings(start, 24 * 70))
+    data_quality.get_quality_flags(db.load_data_from_db())
+    assert len(_stored_flag_ids(db)) == 24 * 70
+    if seal:
+        db.seal_partition(db.list_partitions()[0])
+
+    assert db.apply_retention_policy(retention_days=30) > 0
+    assert _stored_flag_ids(db) == sorted(db.load_data_from_db()['id'].astype(int))
+
+
+def test_retention_drops_flags_of_rolled_up_readings(metrics_db, make_readings):
+    _flag_then_expire(metrics_db, make_readings)
+
+
+def test_partition_retention_drops_flags(partitioned_db, make_readings):
+    _flag_then_expire(partitioned_db, make_readings, seal=True)
+
+
+def test_database_rows_are_not_checked_for_repeats(metrics_db, monkeypatch):
+    metrics_db.upsert_data(_steady_readings(40, source='gateway-a'))
+    data = metrics_db.load_data_from_db()
+    monkeypatch.setattr(data_quality, '_reading_keys', None)
+    assert not data_quality.get_quality_flags(data).any()
@@ -0,0 +1,55 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import io
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import export
+import import_metrics
+
+COLUMNS = ['id', 'date', 'temperature', 'humidity', 'soil_moisture', 'water_usage', 'energy_consumption', 'source']
+
+
+@pytest.fixture(params=['csv', 'parquet'])
+def fmt(request):
+    if request.param == 'parquet' and not export.parquet_available():
+        pytest.skip("pyarrow is not installed")
+    return request.param
+
+
+def _read(path, fmt):
+    return pd.read_csv(path) if fmt == 'csv' else pd.read_parquet(path)
+
+
+def test_export_round_trip(metrics_db, make_readings, fmt, tmp_path):
+    readings = make_readings('2025-01-01', 100, source='gateway-a')
+    metrics_db.upsert_data(readings)
+    path = str(tmp_path / f"export.{fmt}")
+
+    assert export.export_metrics(path, fmt=fmt, chunksize=30) == 100
+    exported = _read(path, fmt)
+    assert list(exported.columns) == COLUMNS
+    assert len(exported) == 100
+
+    assert import_metrics.import_metrics(path, fmt=fmt) == {'inserted': 0, 'updated': 0, 'unchanged': 100}
+
+
+def test_empty_export_is_a_valid_file(metrics_db, make_readings, fmt, tmp_path):
+    metrics_db.upsert_data(make_readings('2025-01-01', 10))
+    path = str(tmp_path / f"export.{fmt}")
+
+    assert export.export_metrics(path, date(2030, 1, 1), date(2030, 1, 2), fmt=fmt) == 0
+    exported = _read(path, fmt)
+    assert list(exported.columns) == COLUMNS
+    assert len(exported) == 0
+    assert import_metrics.import_metrics(path, fmt=fmt) == {'inserted': 0, 'updated': 0, 'unchanged': 0}
+
+
+def test_export_to_a_buffer(metrics_db, make_readings, fmt):
+    metrics_db.upsert_data(make_readings('2025-01-01', 50))
+    buffer = io.BytesIO()
+
+    assert export.export_metrics(buffer, fmt=fmt) == 50
+    assert len(_read(io.BytesIO(buffer.getvalue()), fmt)) == 50
@@ -0,0 +1,107 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import forecasting
+from forecasting import HoltForecaster
+
+
+def _series(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return 50 + 0.3 * np.arange(n) + rng.normal(0, 2, n)
+
+
+def _run_holt(values, alpha, beta):
+    level, trend = values[0], values[1] - values[0]
+    for value in values[1:]:
+        predicted = level + trend
+        new_level = alpha * value + (1 - alpha) * predicted
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        level = new_level
+    return level, trend
+
+
+def test_update_continues_the_fitted_recursion():
+    values = _series(300)
+    model = HoltForecaster().fit(values[:200]).update(values[200:])
+
+    # Folding rows in one at a time lands where a refit with the same
+    # smoothing parameters over the whole series does.
+    level, trend = _run_holt(values, model.alpha, model.beta)
+    assert model.level == pytest.approx(level)
+    assert model.trend == pytest.approx(trend)
+    assert model.observations == 300
+
+
+def test_update_stays_close_to_a_refit():
+    values = _series(600, seed=1)
+    updated = HoltForecaster().fit(values[:500]).update(values[500:])
+    refit = HoltForecaster().fit(values)
+
+    mean, lower, upper = updated.forecast(7)
+    refit_mean, _, _ = refit.forecast(7)
+    assert np.all(lower < mean) and np.all(mean < upper)
+    assert np.allclose(mean, refit_mean, rtol=0.05)
+
+
+def test_linear_series_is_extrapolated_exactly():
+    values = 10 + 2.0 * np.arange(50)
+    model = HoltForecaster().fit(values[:30]).update(values[30:])
+    mean, lower, upper = model.forecast(3)
+    assert mean == pytest.approx([110, 112, 114])
+    assert lower == pytest.approx(mean) and upper == pytest.approx(mean)
+
+
+def test_update_before_fit_fits():
+    model = HoltForecaster().update([1.0, 2.0, 3.0, 4.0])
+    assert model.alpha is not None
+    assert model.observations == 4
+
+
+@pytest.fixture
+def forecast_state(metrics_db, monkeypatch):
+    monkeypatch.setattr(forecasting, '_forecast_state', {
+        'version': None, 'last_id': 0, 'last_date': None, 'interval': pd.Timedelta(days=1), 'models': {},
+    })
+    return forecasting._forecast_state
+
+
+def test_appended_rows_are_folded_into_the_models(forecast_state, metrics_db, make_readings):
+    history = make_readings('2025-01-01', 24 * 10)
+    appended = make_readings('2025-01-11', 24, seed=1)
+    metrics_db.upsert_data(history)
+    forecasting.get_forecast()
+    models = dict(forecast_state['models'])
+
+    metrics_db.upsert_data(appended)
+    forecast = forecasting.get_forecast()
+
+    # The same model objects were updated rather than replaced by a refit.
+    assert all(forecast_state['models'][m] is models[m] for m in forecasting.FORECAST_METRICS)
+    full = pd.concat([history, appended])
+    for metric in forecasting.FORECAST_METRICS:
+        model = forecast_state['models'][metric]
+        expected = HoltForecaster().fit(history[metric].to_numpy()).update(appended[metric].to_numpy())
+        assert model.observations == len(full)
+        assert model.level == pytest.approx(expected.level)
+        assert model.trend == pytest.approx(expected.trend)
+    assert forecast['date'].iloc[0] == appended['date'].iloc[-1] + pd.Timedelta(hours=1)
+    assert forecast_state['last_id'] == len(full)
+
+
+def test_changed_rows_trigger_a_refit(forecast_state, metrics_db, make_readings):
+    history = make_readings('2025-01-01', 24 * 10)
+    metrics_db.upsert_data(history)
+    forecasting.get_forecast()
+    models = dict(forecast_state['models'])
+
+    corrected = history.iloc[:24].copy()
+    corrected['water_usage'] = corrected['water_usage'] + 1
+    metrics_db.upsert_data(corrected)
+    forecasting.get_forecast()
+
+    assert all(forecast_state['models'][m] is not models[m] for m in forecasting.FORECAST_METRICS)
+    expected = HoltForecaster().fit(pd.concat([corrected, history.iloc[24:]])['water_usage'].to_numpy())
+    assert forecast_state['models']['water_usage'].level == pytest.approx(expected.level)
@@ -0,0 +1,73 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import json
+from datetime import datetime
+
+import pytest
+
+from ingest_server import parse_json_payload, parse_line_protocol, validate_readings
+
+METRICS = {'temperature': 21.5, 'humidity': 60.0, 'soil_moisture': 70.0, 'water_usage': 12.0, 'energy_consumption': 30.0}
+
+
+def _local(text):
+    return datetime.fromisoformat(text).astimezone().replace(tzinfo=None)
+
+
+def test_json_batch_with_shared_source():
+    body = json.dumps({'source': 'gateway-a', 'readings': [
+        {'date': '2025-01-01T10:00:00', **METRICS},
+        {'date': 1735725600, 'source': 'gateway-b', **METRICS},
+    ]})
+    records, errors = validate_readings(parse_json_payload(body))
+    assert errors == []
+    assert [record['source'] for record in records] == ['gateway-a', 'gateway-b']
+    assert records[0]['date'] == datetime(2025, 1, 1, 10, 0)
+    assert records[1]['date'] == datetime.fromtimestamp(1735725600)
+
+    with pytest.raises(ValueError):
+        parse_json_payload('{"readings": {"date": "2025-01-01"}}')
+
+
+def test_line_protocol():
+    body = (b"# comment\n"
+            b"env,source=gateway-a,site=north temperature=21.5,humidity=60,soil_moisture=70i,"
+            b"water_usage=12,energy_consumption=30 1735725600000000000\n"
+            b"env temperature=21.5\n"
+            b"broken line with too many parts\n")
+    records, errors = validate_readings(parse_line_protocol(body))
+    assert len(records) == 1
+    assert records[0]['source'] == 'gateway-a'
+    assert records[0]['soil_moisture'] == 70.0
+    assert records[0]['date'] == datetime.fromtimestamp(1735725600)
+    assert errors == ["Reading 1: missing humidity", "Reading 2: Malformed line: broken line with too many parts"]
+
+
+def test_offsets_are_converted_not_dropped():
+    raw = [{'date': '2025-01-01T12:00:00+02:00', **METRICS},
+           {'date': '2025-01-01T10:00:00Z', **METRICS},
+           {'date': '2025-01-01T12:00:00', **METRICS}]
+    records, errors = validate_readings(raw)
+    assert errors == []
+    assert all(record['date'].tzinfo is None for record in records)
+    assert records[0]['date'] == records[1]['date'] == _local('2025-01-01T10:00:00+00:00')
+    assert records[2]['date'] == datetime(2025, 1, 1, 12, 0)
+
+
+def test_mixed_offsets_are_stored(metrics_db):
+    raw = [{'date': '2025-01-01T12:00:00+02:00', 'source': 'a', **METRICS},
+           {'date': '2025-01-01T12:00:00', 'source': 'b', **METRICS}]
+    records, _ = validate_readings(raw)
+    assert metrics_db.upsert_records(records) == {'inserted': 2, 'updated': 0, 'unchanged': 0}
+
+    stored = metrics_db.load_data_from_db().set_index('source')['date']
+    assert stored['a'] == _local('2025-01-01T12:00:00+02:00')
+    assert stored['b'] == datetime(2025, 1, 1, 12, 0)
+
+
+def test_out_of_range_values_are_rejected():
+    records, errors = validate_readings([{**METRICS, 'humidity': 150.0}, {**METRICS, 'date': 'yesterday'}, 'x'])
+    assert records == []
+    assert errors[0].startswith("Reading 0: humidity=150.0 outside")
+    assert errors[1].startswith("Reading 1: invalid date")
+    assert errors[2] == "Reading 2: expected an object"
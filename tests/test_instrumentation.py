@@ -0,0 +1,113 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import pandas as pd
+import pytest
+
+import instrumentation as metrics
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(metrics, 'METRICS_ENABLED', True)
+    for name in ('_counters', '_histograms', '_help'):
+        monkeypatch.setattr(metrics, name, {})
+    monkeypatch.setattr(metrics, '_collectors', [])
+    return metrics
+
+
+def _samples(text):
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name, _, value = line.rpartition(' ')
+            samples[name] = float(value)
+    return samples
+
+
+def test_counter_exposition(enabled):
+    enabled.inc_counter("ingest_total", help_text="Readings ingested", source="a")
+    enabled.inc_counter("ingest_total", 4, source="a")
+    enabled.inc_counter("ingest_total", source="b")
+
+    text = enabled.render_metrics()
+    assert text.splitlines()[:2] == ["# HELP ecoimpact_ingest_total Readings ingested",
+                                     "# TYPE ecoimpact_ingest_total counter"]
+    assert _samples(text) == {'ecoimpact_ingest_total{source="a"}': 5, 'ecoimpact_ingest_total{source="b"}': 1}
+    assert text.endswith("\n")
+
+
+def test_histogram_buckets_are_cumulative(enabled):
+    for value in (0.003, 0.02, 0.02, 0.7, 30.0):
+        enabled.observe("load_seconds", value, help_text="Load time", call="load")
+
+    text = enabled.render_metrics()
+    assert "# TYPE ecoimpact_load_seconds histogram" in text
+    samples = _samples(text)
+    bucket = 'ecoimpact_load_seconds_bucket{{call="load",le="{}"}}'.format
+    assert samples[bucket(0.005)] == 1
+    assert samples[bucket(0.01)] == 1
+    assert samples[bucket(0.025)] == 3
+    assert samples[bucket(1.0)] == 4
+    assert samples[bucket(10.0)] == 4
+    assert samples[bucket('+Inf')] == 5
+    assert samples['ecoimpact_load_seconds_count{call="load"}'] == 5
+    assert samples['ecoimpact_load_seconds_sum{call="load"}'] == pytest.approx(30.743)
+    # A value on a bucket bound counts in that bucket (le is inclusive).
+    enabled.observe("load_seconds", 0.005, call="load")
+    assert _samples(enabled.render_metrics())[bucket(0.005)] == 2
+
+
+def test_instrumented_calls_are_counted(enabled):
+    @enabled.instrument('load_rows')
+    def load_rows(n):
+        return pd.DataFrame({'x': range(n)})
+
+    @enabled.instrument('forecast', 'analytics')
+    def forecast():
+        raise ValueError("no data")
+
+    load_rows(3)
+    load_rows(4)
+    with pytest.raises(ValueError):
+        forecast()
+
+    samples = _samples(enabled.render_metrics())
+    assert samples['ecoimpact_db_calls_total{call="load_rows"}'] == 2
+    assert samples['ecoimpact_db_rows_returned_total{call="load_rows"}'] == 7
+    assert samples['ecoimpact_db_duration_seconds_count{call="load_rows"}'] == 2
+    assert samples['ecoimpact_analytics_calls_total{function="forecast"}'] == 1
+    assert samples['ecoimpact_analytics_errors_total{function="forecast"}'] == 1
+    assert 'ecoimpact_db_errors_total{call="load_rows"}' not in samples
+
+
+def test_disabled_instrumentation_leaves_functions_alone(monkeypatch):
+    monkeypatch.setattr(metrics, 'METRICS_ENABLED', False)
+
+    def load():
+        return 1
+
+    assert metrics.instrument('load')(load) is load
+
+
+def test_collectors_are_rendered_and_failures_skipped(enabled):
+    def broken():
+        raise RuntimeError("gone")
+
+    def collect():
+        return [("query_cache_entries", "gauge", "Cached query results", 3)]
+
+    enabled.register_collector(broken)
+    enabled.register_collector(collect)
+    enabled.register_collector(collect)
+
+    text = enabled.render_metrics()
+    assert text.count("# TYPE ecoimpact_query_cache_entries gauge") == 1
+    assert _samples(text) == {'ecoimpact_query_cache_entries': 3}
+
+
+def test_metrics_file_is_replaced_whole(enabled, tmp_path):
+    enabled.inc_counter("writes_total", help_text="Writes")
+    path = tmp_path / "dashboard.prom"
+    enabled.write_metrics_file(str(path))
+    assert path.read_text() == enabled.render_metrics()
+    assert [p.name for p in tmp_path.iterdir()] == ["dashboard.prom"]
@@ -0,0 +1,85 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import event
+
+from impact_factors import IMPACT_FACTORS
+
+RANGES = [
+    (date(2025, 1, 2), date(2025, 1, 3)),
+    (datetime(2025, 1, 1, 6, 30), datetime(2025, 1, 4, 12, 0)),
+    (datetime(2025, 1, 2, 0, 0), datetime(2025, 1, 2, 0, 0)),
+    (datetime(2025, 1, 3, 9, 0), datetime(2025, 1, 3, 17, 45)),
+    (datetime(2025, 1, 3, 22, 0), datetime(2025, 1, 4, 2, 0)),
+    (datetime(2025, 1, 2, 12, 0), None),
+    (None, datetime(2025, 1, 2, 12, 0)),
+    (None, None),
+]
+
+
+def _expected(readings, start, end):
+    start = datetime.combine(start, datetime.min.time()) if type(start) is date else start
+    end = datetime.combine(end, datetime.max.time()) if type(end) is date else end
+    selected = readings
+    if start is not None:
+        selected = selected[selected['date'] >= start]
+    if end is not None:
+        selected = selected[selected['date'] <= end]
+    water, energy = selected['water_usage'].sum(), selected['energy_consumption'].sum()
+    return {
+        'readings': len(selected),
+        'water': water,
+        'energy': energy,
+        'cost': water * IMPACT_FACTORS['water_cost_per_liter'] + energy * IMPACT_FACTORS['energy_cost_per_kwh'],
+    }
+
+
+def _check_ranges(db, readings):
+    for start, end in RANGES:
+        totals = db.get_ledger_totals(start, end)
+        for quantity, value in _expected(readings, start, end).items():
+            assert totals[quantity] == pytest.approx(value, abs=1e-6), (start, end, quantity)
+
+
+def test_ledger_matches_raw_readings_for_any_range(metrics_db, make_readings):
+    readings = make_readings('2025-01-01', 4 * 24 * 5, freq='15min')
+    metrics_db.upsert_data(readings)
+    _check_ranges(metrics_db, readings)
+
+
+def test_partitioned_ledger_matches_raw_readings(partitioned_db, make_readings):
+    readings = make_readings('2025-01-01', 4 * 24 * 5, freq='15min')
+    partitioned_db.upsert_data(readings)
+    _check_ranges(partitioned_db, readings)
+
+
+def _ledger_rows(db):
+    with db.engine.connect() as conn:
+        return conn.execute(db.resource_ledger.select().order_by(db.resource_ledger.c.day)).fetchall()
+
+
+def test_backfill_updates_the_ledger_in_one_pass(metrics_db, make_readings):
+    metrics_db.upsert_data(make_readings('2025-03-01', 24 * 10))
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if 'resource_ledger' in statement:
+            statements.append(statement)
+
+    event.listen(metrics_db.engine, 'before_cursor_execute', record)
+    try:
+        # Two hundred days before everything stored, in one batch.
+        metrics_db.upsert_data(make_readings('2024-08-01', 24 * 200, seed=1))
+    finally:
+        event.remove(metrics_db.engine, 'before_cursor_execute', record)
+    assert len(statements) <= 6
+
+    incremental = _ledger_rows(metrics_db)
+    metrics_db.rebuild_ledger()
+    rebuilt = _ledger_rows(metrics_db)
+    assert len(incremental) == len(rebuilt) == 210
+    for row, expected in zip(incremental, rebuilt):
+        assert row.day == expected.day
+        assert tuple(row)[1:] == pytest.approx(tuple(expected)[1:])
@@ -0,0 +1,70 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import numpy as np
+import pandas as pd
+
+from live_tail import LiveTail, RingBuffer
+
+
+def test_ring_buffer_keeps_the_newest_rows_in_order():
+    buffer = RingBuffer(5, columns=['value'])
+    dates = pd.date_range('2025-01-01', periods=12, freq='h').to_numpy()
+    buffer.extend(np.arange(1, 4), dates[:3], np.arange(3.0).reshape(-1, 1))
+    buffer.extend(np.arange(4, 8), dates[3:7], np.arange(3.0, 7.0).reshape(-1, 1))
+
+    frame = buffer.to_frame()
+    assert frame['id'].tolist() == [3, 4, 5, 6, 7]
+    assert frame['value'].tolist() == [2.0, 3.0, 4.0, 5.0, 6.0]
+    assert buffer.last_id == 7
+    assert buffer.contains(np.array([2, 3, 7])).tolist() == [False, True, True]
+
+    # A batch bigger than the buffer keeps only its tail.
+    buffer.extend(np.arange(8, 13), dates[7:12], np.arange(7.0, 12.0).reshape(-1, 1))
+    assert buffer.to_frame()['id'].tolist() == [8, 9, 10, 11, 12]
+    assert buffer.last_date == dates[11]
+
+
+def _check_tail(tail, db, capacity):
+    expected = db.load_data_from_db().sort_values(['date', 'id']).tail(capacity)
+    frame = tail.to_frame()
+    assert frame['date'].is_monotonic_increasing
+    assert frame['id'].tolist() == expected['id'].tolist()
+    np.testing.assert_allclose(frame['temperature'], expected['temperature'])
+
+
+def test_tail_follows_appends_updates_and_backdated_rows(metrics_db, make_readings):
+    tail = LiveTail(capacity=10)
+    readings = make_readings('2025-01-01', 24)
+    metrics_db.upsert_data(readings.iloc[:20])
+    assert tail.poll() == 10
+    _check_tail(tail, metrics_db, 10)
+
+    metrics_db.upsert_data(readings.iloc[20:])
+    assert tail.poll() == 4
+    assert tail.poll() == 0
+    _check_tail(tail, metrics_db, 10)
+
+    # An upsert that changes a buffered reading keeps its id.
+    changed = readings.iloc[[22]].copy()
+    changed['temperature'] = 99.0
+    metrics_db.upsert_data(changed)
+    tail.poll()
+    assert 99.0 in tail.to_frame()['temperature'].tolist()
+    _check_tail(tail, metrics_db, 10)
+
+    # A late reading from another gateway lands between buffered ones.
+    backdated = make_readings('2025-01-01 21:30', 1, source='gateway-b', seed=1)
+    metrics_db.upsert_data(backdated)
+    tail.poll()
+    _check_tail(tail, metrics_db, 10)
+
+
+def test_tail_of_an_empty_partitioned_database(partitioned_db, make_readings):
+    assert list(partitioned_db.load_rows_after(0).columns) == list(partitioned_db.load_latest_rows(5).columns)
+    assert len(partitioned_db.load_latest_rows(5)) == 0
+
+    tail = LiveTail(capacity=5)
+    assert tail.poll() == 0
+    partitioned_db.upsert_data(make_readings('2025-01-30', 72))
+    assert tail.poll() == 5
+    _check_tail(tail, partitioned_db, 5)
@@ -0,0 +1,65 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import json
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+import load_test
+from conftest import REPO_DIR
+
+
+def _recent(make_readings, days=3):
+    return make_readings(datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(days=days), 24 * days)
+
+
+def test_percentiles():
+    assert load_test._percentiles([]) == {'count': 0}
+    summary = load_test._percentiles([0.001, 0.002, 0.003, 0.004])
+    assert summary['count'] == 4
+    assert summary['p50_ms'] == pytest.approx(2.5)
+    assert summary['max_ms'] == pytest.approx(4.0)
+
+
+def test_writers_only_run_from_the_command_line(tmp_path, make_readings):
+    path = tmp_path / "load.db"
+    env = dict(os.environ, METRICS_DB_URL=f"sqlite:///{path}")
+    _recent(make_readings).to_pickle(tmp_path / "seed.pkl")
+    subprocess.run([sys.executable, "-c", f"import pandas as pd\nimport db\ndb.upsert_data(pd.read_pickle({str(tmp_path / 'seed.pkl')!r}))"],
+                   cwd=REPO_DIR, env=env, check=True, capture_output=True)
+
+    # The harness points db at --db itself, whatever the environment says.
+    env['METRICS_DB_URL'] = f"sqlite:///{tmp_path / 'other.db'}"
+    result = subprocess.run(
+        [sys.executable, "load_test.py", "--db", str(path), "--sessions", "0", "--writers", "2",
+         "--duration", "0.5", "--write-interval", "0.01", "--json"],
+        cwd=REPO_DIR, env=env, check=True, capture_output=True, text=True,
+    )
+    report = json.loads(result.stdout)
+    assert report['sessions'] == 0 and report['writers'] == 2
+    assert report['rerun_latency'] == {'count': 0}
+    assert report['write_failures'] == 0
+    assert report['write_latency']['count'] > 0
+    assert report['writes_per_s'] > 0
+    assert report['lock_wait']['count'] == report['write_latency']['count']
+    assert not (tmp_path / 'other.db').exists()
+
+
+@pytest.mark.usefixtures('sample_data')
+def test_a_session_reruns_the_dashboard(metrics_db, make_readings, monkeypatch):
+    metrics_db.upsert_data(_recent(make_readings))
+    # db is already imported here, so the run goes to the test database; the URL
+    # the harness exports is put back afterwards for child processes of later tests.
+    monkeypatch.setenv("METRICS_DB_URL", os.environ.get("METRICS_DB_URL", ""))
+    report = load_test.run_load_test("unused.db", sessions=1, writers=1, duration=0.5, write_interval=0.05)
+    assert report['session_errors'] == 0
+    assert report['rerun_latency']['count'] >= 1
+    assert report['write_failures'] == 0
+    assert report['write_latency']['count'] >= 1
+
+    text = load_test._format_report(report)
+    assert "Rerun latency ms" in text
+    assert "Lock wait ms" in text
@@ -0,0 +1,88 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import os
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import export
+import quantile_sketch
+from storage_backends import SQLiteBackend
+
+
+@pytest.fixture
+def readings(partitioned_db, make_readings):
+    # Three months of hourly readings; the oldest shard is sealed.
+    frame = make_readings('2025-01-01', 24 * 90)
+    partitioned_db.upsert_data(frame)
+    partitioned_db.seal_partition('2025-01')
+    return frame
+
+
+def test_readings_are_spread_over_shards(partitioned_db, readings):
+    assert partitioned_db.list_partitions() == ['2025-01', '2025-02', '2025-03']
+    with partitioned_db.engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT COUNT(*) FROM environmental_metrics").scalar() == 0
+
+
+def test_chunks_cover_every_shard_in_order(partitioned_db, readings):
+    chunks = list(partitioned_db.iter_metrics_chunks(chunksize=500))
+    streamed = pd.concat(chunks, ignore_index=True)
+    assert max(len(chunk) for chunk in chunks) <= 500
+    assert len(streamed) == len(readings)
+    assert streamed['date'].is_monotonic_increasing
+
+    ranged = pd.concat(partitioned_db.iter_metrics_chunks(date(2025, 1, 31), date(2025, 2, 1)), ignore_index=True)
+    assert len(ranged) == 48
+
+
+def test_export_writes_partitioned_rows(partitioned_db, readings, tmp_path):
+    path = str(tmp_path / "export.csv")
+    assert export.export_metrics(path, fmt='csv') == len(readings)
+    assert len(pd.read_csv(path)) == len(readings)
+
+
+def test_resampled_matches_the_readings(partitioned_db, readings):
+    daily = partitioned_db.load_resampled(freq='D', aggs=('mean', 'max'))
+    expected = readings.groupby(readings['date'].dt.normalize())
+    assert len(daily) == 90
+    assert daily['sample_count'].tolist() == [24] * 90
+    np.testing.assert_allclose(daily['temperature'], expected['temperature'].mean())
+    np.testing.assert_allclose(daily['humidity_max'], expected['humidity'].max())
+
+    monthly = SQLiteBackend().aggregate(date(2025, 1, 1), date(2025, 3, 31), freq='M', aggs=('sum',))
+    assert monthly['sample_count'].tolist() == [31 * 24, 28 * 24, 31 * 24]
+    np.testing.assert_allclose(monthly['water_usage_sum'].sum(), readings['water_usage'].sum())
+
+
+def test_quantiles_come_from_the_shards(partitioned_db, readings):
+    result = quantile_sketch.get_range_quantiles('2025-01-20', '2025-02-10')
+    assert not result.isna().any().any()
+    assert (result['count'] == 22 * 24).all()
+
+
+def test_retention_rolls_up_shards(partitioned_db, make_readings):
+    today = datetime.combine(datetime.now().date(), datetime.min.time())
+    frame = make_readings(today - timedelta(days=100), 24 * 100)
+    partitioned_db.upsert_data(frame)
+    oldest = partitioned_db.list_partitions()[0]
+    partitioned_db.seal_partition(oldest)
+
+    removed = partitioned_db.apply_retention_policy(retention_days=30, batch_size=1000)
+
+    cutoff = today - timedelta(days=30)
+    assert removed == int((frame['date'] < cutoff).sum())
+    assert oldest not in partitioned_db.list_partitions()
+    assert not os.path.exists(partitioned_db._partition_path(oldest, sealed=True))
+    remaining = partitioned_db.load_partitioned()
+    assert len(remaining) == len(frame) - removed
+    assert remaining['date'].min() >= cutoff
+
+    rollups = partitioned_db.load_daily_rollups()
+    assert rollups['sample_count'].sum() == removed
+    daily = partitioned_db.load_resampled(freq='D')
+    assert daily['sample_count'].sum() == len(frame)
+    np.testing.assert_allclose((daily['water_usage'] * daily['sample_count']).sum(), frame['water_usage'].sum())
+
@@ -0,0 +1,57 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+from datetime import datetime, timedelta
+
+import pytest
+
+pytestmark = pytest.mark.usefixtures('sample_data')
+
+
+@pytest.fixture
+def precompute(metrics_db, make_readings, monkeypatch):
+    import precompute
+
+    monkeypatch.setattr(precompute, '_precompute_state', {
+        'version': None, 'computed_at': 0.0, 'stale': True, 'results': {}, 'thread': None,
+    })
+    start = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(days=3)
+    metrics_db.upsert_data(make_readings(start, 48))
+    return precompute
+
+
+def test_windows_are_served_once_computed(precompute):
+    assert precompute.get_precomputed(7) is None
+    assert precompute.refresh_precomputed()
+    assert not precompute.refresh_precomputed()
+
+    week = precompute.get_precomputed(7, 'Midwest')
+    assert week['records'] == 48
+    assert week['regional_comparison'] is week['regional']['Midwest']
+    assert precompute.get_precomputed(7, 'Atlantis') is None
+
+
+def test_write_in_this_process_marks_results_stale(precompute, metrics_db, make_readings, monkeypatch):
+    monkeypatch.setattr(metrics_db, '_write_listeners', [precompute._on_rows_written])
+    precompute.refresh_precomputed()
+
+    metrics_db.upsert_data(make_readings(datetime.now().replace(microsecond=0) - timedelta(hours=1), 1, seed=1))
+    assert precompute.get_precomputed(7) is None
+    assert precompute.refresh_precomputed()
+    assert precompute.get_precomputed(7)['records'] == 49
+
+
+def test_write_from_another_process_is_not_served(precompute, write_from_other_process):
+    precompute.refresh_precomputed()
+    precompute._wake_event.clear()
+    assert precompute.get_precomputed(30)['records'] == 48
+
+    when = (datetime.now() - timedelta(hours=1)).strftime('%Y-%m-%d %H:%M:%S')
+    write_from_other_process(
+        f"db.upsert_data(pd.DataFrame([{{'date': '{when}', 'temperature': 20.0, 'humidity': 50.0,"
+        " 'soil_moisture': 30.0, 'water_usage': 10.0, 'energy_consumption': 5.0}]))"
+    )
+    assert precompute.get_precomputed(30) is None
+    # The worker is woken to recompute rather than waiting for its next tick.
+    assert precompute._wake_event.is_set()
+    assert precompute.refresh_precomputed()
+    assert precompute.get_precomputed(30)['records'] == 49
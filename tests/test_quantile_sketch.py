@@ -0,0 +1,85 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import text
+
+import quantile_sketch
+
+
+def _old_readings(make_readings, days_ago=60, days=10):
+    start = datetime.combine(datetime.now().date(), datetime.min.time()) - timedelta(days=days_ago)
+    return make_readings(start, 24 * days)
+
+
+def _stored_sketches(db):
+    with db.engine.connect() as conn:
+        return conn.execute(text("SELECT day, metric, sample_count FROM metric_sketches")).fetchall()
+
+
+def test_quantiles_match_the_readings(metrics_db, make_readings):
+    readings = make_readings('2025-01-01', 24 * 10)
+    metrics_db.upsert_data(readings)
+
+    result = quantile_sketch.get_range_quantiles('2025-01-01', '2025-01-10')
+    assert (result['count'] == 240).all()
+    exact = np.quantile(readings['temperature'], [0.05, 0.5, 0.95])
+    np.testing.assert_allclose(result.loc['temperature', ['p5', 'p50', 'p95']], exact, atol=1.0)
+
+
+def test_sketches_outlive_retention(metrics_db, make_readings):
+    readings = _old_readings(make_readings)
+    metrics_db.upsert_data(readings)
+    metrics_db.apply_retention_policy(retention_days=30)
+
+    first, last = readings['date'].min(), readings['date'].max()
+    result = quantile_sketch.get_range_quantiles(first, last)
+    assert not result.isna().any().any()
+    assert (result['count'] == len(readings)).all()
+
+
+@pytest.mark.usefixtures('partitioned_db')
+def test_sketches_outlive_partition_retention(metrics_db, make_readings):
+    readings = _old_readings(make_readings, days_ago=80, days=40)
+    metrics_db.upsert_data(readings)
+    metrics_db.seal_partition(metrics_db.list_partitions()[0])
+    metrics_db.apply_retention_policy(retention_days=30)
+
+    result = quantile_sketch.get_range_quantiles(readings['date'].min(), readings['date'].max())
+    assert (result['count'] == len(readings)).all()
+
+
+def test_rolled_up_days_get_no_empty_sketches(metrics_db, make_readings):
+    readings = _old_readings(make_readings)
+    metrics_db.upsert_data(readings)
+    metrics_db.apply_retention_policy(retention_days=30)
+    # As if the days had been rolled up before sketches were kept through retention.
+    metrics_db.invalidate_metric_sketches()
+
+    result = quantile_sketch.get_range_quantiles(readings['date'].min(), readings['date'].max())
+    assert (result['count'] == 0).all()
+    assert _stored_sketches(metrics_db) == []
+
+
+def test_write_during_build_is_not_stored_stale(metrics_db, make_readings, monkeypatch):
+    metrics_db.upsert_data(make_readings('2025-01-01', 24))
+    late = make_readings('2025-01-01 00:30', 1, seed=1)
+    from_values = quantile_sketch.TDigest.from_values
+
+    def racing_from_values(values, *args, **kwargs):
+        # The late reading commits after the raw rows were read, as a concurrent ingest would.
+        if len(late):
+            metrics_db.upsert_data(late.iloc[:1])
+            late.drop(late.index, inplace=True)
+        return from_values(values, *args, **kwargs)
+
+    monkeypatch.setattr(quantile_sketch.TDigest, 'from_values', staticmethod(racing_from_values))
+    first = quantile_sketch.get_range_quantiles('2025-01-01', '2025-01-01')
+    assert (first['count'] == 24).all()
+    assert _stored_sketches(metrics_db) == []
+
+    monkeypatch.setattr(quantile_sketch.TDigest, 'from_values', from_values)
+    assert (quantile_sketch.get_range_quantiles('2025-01-01', '2025-01-01')['count'] == 25).all()
+    assert {count for _, _, count in _stored_sketches(metrics_db)} == {25}
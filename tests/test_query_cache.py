@@ -0,0 +1,36 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+
+def test_repeated_reads_hit_the_cache(metrics_db, make_readings):
+    metrics_db.upsert_data(make_readings('2025-01-01', 24))
+    metrics_db.load_data_from_db()
+    hits = metrics_db.get_query_cache_stats()['hits']
+    assert len(metrics_db.load_data_from_db()) == 24
+    assert metrics_db.get_query_cache_stats()['hits'] == hits + 1
+
+
+def test_write_from_another_process_is_seen(metrics_db, make_readings, write_from_other_process):
+    metrics_db.upsert_data(make_readings('2025-01-01', 24))
+    assert len(metrics_db.load_data_from_db()) == 24
+    resampled = metrics_db.load_resampled(freq='D')
+    assert resampled['sample_count'].sum() == 24
+
+    write_from_other_process(
+        "db.upsert_data(pd.DataFrame([{'date': '2025-01-02 00:30', 'temperature': 20.0, 'humidity': 50.0,"
+        " 'soil_moisture': 30.0, 'water_usage': 10.0, 'energy_consumption': 5.0}]))"
+    )
+    assert len(metrics_db.load_data_from_db()) == 25
+    assert metrics_db.load_resampled(freq='D')['sample_count'].sum() == 25
+
+
+def test_update_from_another_process_is_seen(metrics_db, make_readings, write_from_other_process):
+    metrics_db.upsert_data(make_readings('2025-01-01', 24))
+    first = metrics_db.load_data_from_db()
+
+    write_from_other_process(
+        f"db.upsert_data(pd.DataFrame([{{'date': '{first['date'].iloc[0]}', 'temperature': -5.0, 'humidity': 50.0,"
+        " 'soil_moisture': 30.0, 'water_usage': 10.0, 'energy_consumption': 5.0}]))"
+    )
+    reloaded = metrics_db.load_data_from_db()
+    assert len(reloaded) == 24
+    assert reloaded['temperature'].iloc[0] == -5.0
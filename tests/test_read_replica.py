@@ -0,0 +1,100 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+
+@pytest.fixture
+def replica_db(metrics_db, monkeypatch):
+    monkeypatch.setattr(metrics_db, 'READ_REPLICA', True)
+    monkeypatch.setattr(metrics_db, '_replica_state', {
+        'engine': None, 'keeper': None, 'watch': None, 'data_version': None, 'failed': False,
+    })
+    yield metrics_db
+    state = metrics_db._replica_state
+    if state['engine'] is not None:
+        state['engine'].dispose()
+        state['keeper'].close()
+        state['watch'].close()
+
+
+def test_replica_follows_appends_and_updates(replica_db, make_readings, write_from_other_process):
+    readings = make_readings('2025-01-01', 48)
+    replica_db.upsert_data(readings.iloc[:24])
+    assert len(replica_db.load_data_from_db()) == 24
+    assert replica_db.verify_read_replica()['consistent']
+
+    replica_db.upsert_data(readings)
+    changed = readings.iloc[:3].copy()
+    changed['temperature'] = -5.0
+    replica_db.upsert_data(changed)
+    report = replica_db.verify_read_replica()
+    assert report['consistent'], report
+    assert report['rows'] == report['replica_rows'] == 48
+
+    write_from_other_process(
+        "db.upsert_data(pd.DataFrame([{'date': '2025-01-01 00:00', 'temperature': 30.0, 'humidity': 50.0,"
+        " 'soil_moisture': 30.0, 'water_usage': 10.0, 'energy_consumption': 5.0},"
+        " {'date': '2025-01-05 00:00', 'temperature': 30.0, 'humidity': 50.0,"
+        " 'soil_moisture': 30.0, 'water_usage': 10.0, 'energy_consumption': 5.0}]))"
+    )
+    report = replica_db.verify_read_replica()
+    assert report['consistent'], report
+    assert report['rows'] == 49
+    assert replica_db.load_data_from_db()['temperature'].iloc[0] == 30.0
+
+
+def test_verify_reports_drift(replica_db, make_readings):
+    replica_db.upsert_data(make_readings('2025-01-01', 24))
+    assert replica_db.verify_read_replica()['consistent']
+
+    # Edited behind db's back, which leaves the database's data_version unchanged.
+    with replica_db._replica_state['engine'].begin() as conn:
+        conn.exec_driver_sql("UPDATE environmental_metrics SET temperature = 99 WHERE id = 3")
+    report = replica_db.verify_read_replica()
+    assert not report['consistent']
+    assert report['mismatched_ids'] == [3]
+
+
+def test_readers_do_not_wait_for_each_other(replica_db, make_readings):
+    replica_db.upsert_data(make_readings('2025-01-01', 24))
+    replica_db.load_data_from_db()
+    inside = threading.Barrier(3, timeout=5)
+
+    def read():
+        with replica_db.read_engine() as source, source.connect() as conn:
+            # Every reader must be inside at once for the barrier to open.
+            inside.wait()
+            return conn.exec_driver_sql("SELECT COUNT(*) FROM environmental_metrics").scalar()
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        assert list(executor.map(lambda _: read(), range(3))) == [24, 24, 24]
+
+
+def test_reads_during_writes_stay_consistent(replica_db, make_readings):
+    readings = make_readings('2025-01-01', 400, freq='15min')
+    replica_db.upsert_data(readings.iloc[:100])
+
+    def write():
+        for start in range(100, 400, 50):
+            replica_db.upsert_data(readings.iloc[start:start + 50])
+
+    def read(_):
+        counts = []
+        for _ in range(20):
+            with replica_db.read_engine() as source, source.connect() as conn:
+                counts.append(conn.exec_driver_sql("SELECT COUNT(*) FROM environmental_metrics").scalar())
+        return counts
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(read, range(4)))
+    writer.join()
+
+    for counts in results:
+        assert counts == sorted(counts)
+        assert all(count % 50 == 0 for count in counts)
+    assert replica_db.verify_read_replica()['consistent']
@@ -0,0 +1,80 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+BUCKETS = {
+    'H': lambda dates: dates.dt.floor('h'),
+    'D': lambda dates: dates.dt.normalize(),
+    'W': lambda dates: dates.dt.normalize() - pd.to_timedelta(dates.dt.weekday, unit='D'),
+    'M': lambda dates: dates.dt.to_period('M').dt.start_time,
+}
+
+
+@pytest.fixture(params=['metrics_db', 'partitioned_db'])
+def store(request):
+    return request.getfixturevalue(request.param)
+
+
+def _expected(readings, freq):
+    grouped = readings.groupby(BUCKETS[freq](readings['date']))
+    return grouped.size(), grouped
+
+
+@pytest.mark.parametrize('freq', ['H', 'D', 'W', 'M'])
+def test_buckets_match_pandas(store, make_readings, freq):
+    readings = make_readings('2025-01-27 06:00', 24 * 40, freq='30min')
+    store.upsert_data(readings)
+
+    result = store.load_resampled(freq=freq, aggs=('mean', 'min', 'max', 'sum'))
+    counts, grouped = _expected(readings, freq)
+    assert result['date'].tolist() == counts.index.tolist()
+    assert result['sample_count'].tolist() == counts.tolist()
+    np.testing.assert_allclose(result['temperature'], grouped['temperature'].mean())
+    np.testing.assert_allclose(result['humidity_min'], grouped['humidity'].min())
+    np.testing.assert_allclose(result['soil_moisture_max'], grouped['soil_moisture'].max())
+    np.testing.assert_allclose(result['water_usage_sum'], grouped['water_usage'].sum())
+
+
+def test_range_bounds_cover_whole_days(metrics_db, make_readings):
+    readings = make_readings('2025-01-01', 24 * 10)
+    metrics_db.upsert_data(readings)
+
+    result = metrics_db.load_resampled(datetime(2025, 1, 3).date(), datetime(2025, 1, 5).date())
+    assert result['sample_count'].tolist() == [24, 24, 24]
+    partial = metrics_db.load_resampled(datetime(2025, 1, 3, 12), datetime(2025, 1, 4, 5, 30), freq='D')
+    assert partial['sample_count'].tolist() == [12, 6]
+
+
+def test_rolled_up_days_keep_their_counts_and_means(store, make_readings):
+    start = datetime.combine(datetime.now().date(), datetime.min.time()) - timedelta(days=45)
+    readings = make_readings(start, 24 * 40)
+    store.upsert_data(readings)
+    assert store.apply_retention_policy(retention_days=30) > 0
+
+    daily = store.load_resampled(freq='D', aggs=('mean', 'min', 'max', 'sum'))
+    counts, grouped = _expected(readings, 'D')
+    assert daily['sample_count'].tolist() == counts.tolist()
+    np.testing.assert_allclose(daily['temperature'], grouped['temperature'].mean())
+    np.testing.assert_allclose(daily['humidity_min'], grouped['humidity'].min())
+    np.testing.assert_allclose(daily['energy_consumption_sum'], grouped['energy_consumption'].sum())
+
+    # Weeks mix rolled-up days with raw ones and still weigh every reading once.
+    weekly = store.load_resampled(freq='W')
+    counts, grouped = _expected(readings, 'W')
+    assert weekly['sample_count'].tolist() == counts.tolist()
+    np.testing.assert_allclose(weekly['temperature'], grouped['temperature'].mean())
+
+    # Hours can't be recovered from daily rollups, so only raw days appear.
+    hourly = store.load_resampled(freq='H')
+    assert hourly['sample_count'].sum() == len(store.load_data_from_db())
+
+
+def test_unknown_frequency_or_aggregate(metrics_db):
+    with pytest.raises(ValueError):
+        metrics_db.load_resampled(freq='Q')
+    with pytest.raises(ValueError):
+        metrics_db.load_resampled(aggs=('median',))
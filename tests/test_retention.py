@@ -0,0 +1,47 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import sqlite3
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, event
+
+
+def _old_readings(make_readings, days_ago=60, days=10):
+    start = datetime.combine(datetime.now().date(), datetime.min.time()) - timedelta(days=days_ago)
+    return make_readings(start, 24 * days)
+
+
+def test_retention_rolls_up_raw_readings(metrics_db, make_readings):
+    metrics_db.upsert_data(_old_readings(make_readings))
+    assert metrics_db.apply_retention_policy(retention_days=30, batch_size=100) == 240
+
+    assert metrics_db.load_daily_rollups()['sample_count'].sum() == 240
+    assert metrics_db.get_ledger_totals()['readings'] == 240
+
+
+def test_rolled_up_database_is_not_seeded(metrics_db, make_readings):
+    metrics_db.upsert_data(_old_readings(make_readings))
+    metrics_db.apply_retention_policy(retention_days=30)
+
+    assert len(metrics_db.load_data_from_db()) == 0
+    assert metrics_db.get_data_version()[0] == 0
+    assert metrics_db.get_ledger_totals()['readings'] == 240
+
+
+def test_write_path_never_runs_a_full_vacuum(metrics_db, tmp_path, monkeypatch):
+    # A file created before incremental vacuum was enabled.
+    path = tmp_path / "legacy.db"
+    sqlite3.connect(path).close()
+    legacy_engine = create_engine(f"sqlite:///{path}")
+    metrics_db.metadata.create_all(legacy_engine)
+    statements = []
+    event.listen(legacy_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    monkeypatch.setattr(metrics_db, 'engine', legacy_engine)
+
+    metrics_db.compact_storage()
+    assert "VACUUM" not in statements
+
+    metrics_db.compact_storage(full=True)
+    assert "VACUUM" in statements
+    with legacy_engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2
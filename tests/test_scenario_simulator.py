@@ -0,0 +1,110 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import numpy as np
+import pytest
+
+import scenario_simulator as sim
+from recommendation_engine import calculate_potential_savings, calculate_environmental_impact
+
+
+@pytest.fixture
+def readings(make_readings):
+    return make_readings('2025-01-01', 24 * 7)
+
+
+def test_grid_covers_every_combination(readings):
+    water = [10, 20, 30]
+    energy_cost = [0.1, 0.2]
+    carbon = [0.3, 0.5, 0.7, 0.9]
+    grid = sim.simulate_scenario_grid(readings, water_reduction_percent=water,
+                                      energy_cost_per_kwh=energy_cost, carbon_per_kwh=carbon)
+
+    assert len(grid) == 3 * 2 * 4
+    assert list(grid.columns) == sim.SCENARIO_PARAMETERS + sim.SCENARIO_OUTCOMES
+    combinations = set(zip(grid['water_reduction_percent'], grid['energy_cost_per_kwh'], grid['carbon_per_kwh']))
+    assert len(combinations) == len(grid)
+    # Parameters that weren't swept stay at the default scenario.
+    assert (grid['energy_reduction_percent'] == sim.DEFAULT_SCENARIO['energy_reduction_percent']).all()
+
+
+def test_scalar_grid_is_one_row(readings):
+    grid = sim.simulate_scenario_grid(readings)
+    assert len(grid) == 1
+
+
+def test_unknown_parameter_is_rejected(readings):
+    with pytest.raises(ValueError, match="water_price"):
+        sim.simulate_scenario_grid(readings, water_price=[0.1])
+
+
+def test_default_scenario_matches_the_dashboard(readings):
+    row = sim.simulate_scenario_grid(readings).iloc[0]
+    savings = calculate_potential_savings(readings)
+    impact = calculate_environmental_impact(readings, savings)
+
+    for outcome in ('water_savings', 'energy_savings', 'cost_savings'):
+        assert row[outcome] == pytest.approx(savings[outcome])
+    for outcome in ('carbon_reduction', 'carbon_reduction_percent'):
+        assert row[outcome] == pytest.approx(impact[outcome])
+
+
+def test_grid_rows_match_the_formulas(readings):
+    grid = sim.simulate_scenario_grid(readings, water_reduction_percent=[10, 40],
+                                      energy_reduction_percent=[5, 25], water_cost_per_liter=[0.001, 0.004])
+    water, energy = readings['water_usage'].sum(), readings['energy_consumption'].sum()
+
+    for row in grid.itertuples():
+        water_savings = water * row.water_reduction_percent / 100
+        energy_savings = energy * row.energy_reduction_percent / 100
+        assert row.water_savings == pytest.approx(water_savings)
+        assert row.energy_savings == pytest.approx(energy_savings)
+        assert row.cost_savings == pytest.approx(water_savings * row.water_cost_per_liter
+                                                 + energy_savings * row.energy_cost_per_kwh)
+        carbon = energy_savings * row.carbon_per_kwh + water_savings * row.carbon_per_liter
+        assert row.carbon_reduction == pytest.approx(carbon)
+        assert row.carbon_reduction_percent == pytest.approx(
+            carbon / (energy * row.carbon_per_kwh + water * row.carbon_per_liter) * 100)
+
+
+def test_no_usage_means_no_savings(readings):
+    idle = readings.assign(water_usage=0.0, energy_consumption=0.0)
+    grid = sim.simulate_scenario_grid(idle, water_reduction_percent=[10, 30])
+    assert (grid[sim.SCENARIO_OUTCOMES] == 0).all().all()
+
+
+def test_samples_stay_in_range_and_are_reproducible(readings):
+    ranges = {'water_reduction_percent': (20.0, 25.0)}
+    first = sim.sample_scenarios(readings, n=500, ranges=ranges, seed=3)
+    second = sim.sample_scenarios(readings, n=500, ranges=ranges, seed=3)
+
+    assert len(first) == 500
+    assert first.equals(second)
+    assert first['water_reduction_percent'].between(20.0, 25.0).all()
+    low, high = sim.DEFAULT_RANGES['carbon_per_kwh']
+    assert first['carbon_per_kwh'].between(low, high).all()
+
+
+def test_distribution_summary(readings):
+    scenarios = sim.sample_scenarios(readings, n=1000, seed=0)
+    summary = sim.summarize_distribution(scenarios)
+
+    assert list(summary.index) == sim.SCENARIO_OUTCOMES
+    assert list(summary.columns) == ['mean', 'p5', 'p50', 'p95']
+    assert (summary['p5'] <= summary['p50']).all() and (summary['p50'] <= summary['p95']).all()
+    assert summary.loc['cost_savings', 'mean'] == pytest.approx(scenarios['cost_savings'].mean())
+
+
+def test_sensitivity_swings_one_parameter_at_a_time(readings):
+    table = sim.sensitivity_table(readings)
+
+    assert sorted(table['parameter']) == sorted(sim.SCENARIO_PARAMETERS)
+    assert np.all(np.diff(table['swing']) <= 0)
+    # Carbon factors don't enter the cost, so swinging them changes nothing.
+    carbon = table[table['parameter'].isin(['carbon_per_kwh', 'carbon_per_liter'])]
+    assert (carbon['swing'] == 0).all()
+
+    row = table[table['parameter'] == 'energy_cost_per_kwh'].iloc[0]
+    expected = sim.simulate_scenario_grid(readings, energy_cost_per_kwh=[row['low_value'], row['high_value']])
+    assert row['cost_savings_at_low'] == pytest.approx(expected['cost_savings'].iloc[0])
+    assert row['cost_savings_at_high'] == pytest.approx(expected['cost_savings'].iloc[1])
+    assert row['base'] == pytest.approx(sim.simulate_scenario_grid(readings)['cost_savings'].iloc[0])
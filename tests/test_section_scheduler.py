@@ -0,0 +1,98 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from section_scheduler import SectionScheduler
+
+TIMEOUT = 5
+
+
+@pytest.fixture
+def executor():
+    pool = ThreadPoolExecutor(max_workers=2)
+    yield pool
+    pool.shutdown(wait=True)
+
+
+def test_dependency_results_follow_the_arguments(executor):
+    sections = SectionScheduler(executor)
+    sections.submit('stats', lambda: 'stats')
+    sections.add_result('forecast', 'forecast')
+    sections.submit('recommendations', lambda data, stats, forecast, scale=1: (data, stats, forecast, scale),
+                    'data', depends_on=('stats', 'forecast'), scale=2)
+
+    assert 'recommendations' in sections and 'missing' not in sections
+    assert sections.result('recommendations', TIMEOUT) == ('data', 'stats', 'forecast', 2)
+
+
+def test_dependents_wait_for_their_inputs(executor):
+    release = threading.Event()
+    order = []
+
+    def slow():
+        release.wait(TIMEOUT)
+        order.append('slow')
+        return 1
+
+    def dependent(value):
+        order.append('dependent')
+        return value + 1
+
+    sections = SectionScheduler(executor)
+    sections.submit('slow', slow)
+    sections.submit('dependent', dependent, depends_on=('slow',))
+    sections.submit('independent', lambda: order.append('independent'))
+
+    sections.result('independent', TIMEOUT)
+    assert order == ['independent']
+    release.set()
+    assert sections.result('dependent', TIMEOUT) == 2
+    assert order == ['independent', 'slow', 'dependent']
+
+
+def test_chains_finish_on_a_single_worker():
+    # Dependents are started from callbacks, so nothing holds the only worker
+    # while waiting on another section.
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        sections = SectionScheduler(pool)
+        sections.submit('a', lambda: 1)
+        sections.submit('b', lambda a: a + 1, depends_on=('a',))
+        sections.submit('c', lambda a, b: a + b, depends_on=('a', 'b'))
+        sections.submit('d', lambda c: c * 10, depends_on=('c',))
+        assert sections.result('d', TIMEOUT) == 30
+
+
+def test_errors_reach_every_dependent(executor):
+    calls = []
+
+    def failing():
+        raise ValueError("ledger unavailable")
+
+    sections = SectionScheduler(executor)
+    sections.submit('ledger_totals', failing)
+    sections.submit('stats', lambda: 'stats')
+    sections.submit('savings', lambda totals: calls.append('savings'), depends_on=('ledger_totals',))
+    sections.submit('impact', lambda savings, stats: calls.append('impact'), depends_on=('savings', 'stats'))
+
+    for name in ('ledger_totals', 'savings', 'impact'):
+        with pytest.raises(ValueError, match="ledger unavailable"):
+            sections.result(name, TIMEOUT)
+    assert calls == []
+    assert sections.result('stats', TIMEOUT) == 'stats'
+
+
+def test_error_in_a_dependent_is_raised_from_result(executor):
+    sections = SectionScheduler(executor)
+    sections.submit('stats', lambda: {})
+    sections.submit('efficiency', lambda stats: stats['missing'], depends_on=('stats',))
+    with pytest.raises(KeyError):
+        sections.result('efficiency', TIMEOUT)
+
+
+def test_unknown_dependency_is_rejected(executor):
+    sections = SectionScheduler(executor)
+    with pytest.raises(KeyError):
+        sections.submit('impact', lambda savings: savings, depends_on=('savings',))
@@ -0,0 +1,75 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import snapshot
+
+
+@pytest.mark.usefixtures('sample_data')
+def test_snapshot_is_not_tagged_from_a_stale_cached_frame(metrics_db, make_readings, snapshot_dir):
+    import data_processor
+
+    metrics_db.upsert_data(make_readings('2025-01-01', 48))
+    version = metrics_db.get_data_version()
+    fresh = metrics_db.load_data_from_db()
+
+    # A frame cached before the last reading landed, but filed under the current
+    # version, as happens when a write races the cache fill.
+    stale = fresh.iloc[:-1]
+    metrics_db.clear_query_cache()
+    metrics_db._query_cache_put(metrics_db._query_cache_key("SELECT * FROM environmental_metrics ORDER BY date"),
+                                stale, version)
+
+    data, _ = data_processor.load_data_and_aggregates()
+    assert len(data) == 48
+
+    with open(os.path.join(snapshot_dir, snapshot.META_FILE)) as handle:
+        meta = json.load(handle)
+    assert tuple(meta['version']) == version
+    assert meta['rows'] == version[0] == 48
+
+
+def _snapshot_frame(make_readings):
+    readings = make_readings('2025-01-01', 100).sort_values('date', ignore_index=True)
+    readings['source'] = np.where(np.arange(100) % 3, 'gateway-a', '')
+    readings.insert(0, 'id', np.arange(1, 101))
+    readings['quality_flags'] = np.zeros(100, dtype=np.int64)
+    return readings
+
+
+def test_snapshot_round_trip_keeps_every_column(make_readings, snapshot_dir):
+    frame = _snapshot_frame(make_readings)
+    frame.loc[5, 'source'] = None
+    snapshot.save_snapshot(frame, (100, 100, 0), {'answer': 42})
+
+    loaded, aggregates = snapshot.load_snapshot((100, 100, 0))
+    assert aggregates == {'answer': 42}
+    assert list(loaded.columns) == list(frame.columns)
+    pd.testing.assert_frame_equal(loaded.copy(), frame)
+    assert snapshot.load_snapshot((101, 101, 0)) is None
+
+
+def test_snapshot_columns_are_memory_mapped(make_readings, snapshot_dir, monkeypatch):
+    snapshot.save_snapshot(_snapshot_frame(make_readings), (100, 100, 0))
+
+    maps = {}
+    load = np.load
+
+    def recording_load(file, *args, **kwargs):
+        values = load(file, *args, **kwargs)
+        maps[os.path.basename(file)] = values
+        return values
+
+    monkeypatch.setattr(np, 'load', recording_load)
+    loaded, _ = snapshot.load_snapshot((100, 100, 0))
+
+    assert maps
+    for position, column in enumerate(loaded.columns):
+        if column == 'source':
+            continue
+        assert np.shares_memory(loaded[column].to_numpy(), maps[f"col_{position}.npy"]), column
@@ -0,0 +1,44 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+import pytest
+
+import storage_backends
+from storage_backends import SQLiteBackend, StorageBackend
+
+
+def test_backends_must_implement_the_interface():
+    class ScanOnly(StorageBackend):
+        def scan(self, start_date=None, end_date=None, columns=None):
+            return None
+
+    with pytest.raises(TypeError):
+        StorageBackend()
+    with pytest.raises(TypeError):
+        ScanOnly()
+
+
+def test_sqlite_backend_scans_and_aggregates(metrics_db, make_readings):
+    metrics_db.upsert_data(make_readings('2025-01-01', 48))
+    backend = SQLiteBackend()
+    assert len(backend.scan(columns=['temperature'])) == 48
+    assert backend.aggregate(freq='D')['sample_count'].tolist() == [24, 24]
+
+
+def test_duckdb_reload_ignores_the_query_cache(metrics_db, make_readings, tmp_path):
+    if not storage_backends.duckdb_available():
+        pytest.skip("duckdb is not installed")
+
+    metrics_db.upsert_data(make_readings('2025-01-01', 48))
+    version = metrics_db.get_data_version()
+    # A frame missing the newest reading, cached under the current version.
+    stale = metrics_db.load_data_from_db().iloc[:-1]
+    metrics_db.clear_query_cache()
+    metrics_db._query_cache_put(metrics_db._query_cache_key("SELECT * FROM environmental_metrics ORDER BY date"),
+                                stale, version)
+
+    backend = storage_backends.DuckDBBackend(str(tmp_path / "mirror.duckdb"))
+    try:
+        assert len(backend.scan()) == 48
+        assert backend.aggregate(freq='D')['sample_count'].tolist() == [24, 24]
+    finally:
+        backend.close()
@@ -0,0 +1,58 @@
+# This is Team No. 21016-1 submission for TSA Nationals 2025 Software Development. The website is https://ecoimpactnationalstsa2025.replit.app
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import text
+
+
+def _raw_totals(db):
+    with db.engine.connect() as conn:
+        return conn.execute(text(
+            "SELECT COUNT(*), COALESCE(SUM(water_usage), 0), COALESCE(SUM(energy_consumption), 0) FROM environmental_metrics"
+        )).one()
+
+
+def test_upsert_twice_leaves_one_copy(metrics_db, make_readings):
+    readings = make_readings('2025-01-01', 48)
+    assert metrics_db.upsert_data(readings) == {'inserted': 48, 'updated': 0, 'unchanged': 0}
+    assert metrics_db.upsert_data(readings) == {'inserted': 0, 'updated': 0, 'unchanged': 48}
+
+    changed = readings.assign(water_usage=readings['water_usage'] + 1)
+    assert metrics_db.upsert_data(changed.head(10)) == {'inserted': 0, 'updated': 10, 'unchanged': 0}
+
+    count, water, _ = _raw_totals(metrics_db)
+    totals = metrics_db.get_ledger_totals()
+    assert count == totals['readings'] == 48
+    assert water == pytest.approx(totals['water'])
+
+
+def test_concurrent_retries_keep_ledger_in_step(metrics_db, make_readings):
+    workers = 4
+    # Every retry of the same batch has to see the rows its predecessors wrote,
+    # otherwise each one adds the whole batch to the ledger again.
+    readings = make_readings('2025-01-01', 3000, freq='15min')
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda _: metrics_db.upsert_data(readings, batch_size=1000), range(workers)))
+
+    assert all(result is not None for result in results)
+    assert sum(result['inserted'] for result in results) == 3000
+
+    count, water, energy = _raw_totals(metrics_db)
+    totals = metrics_db.get_ledger_totals()
+    assert count == 3000
+    assert totals['readings'] == count
+    assert totals['water'] == pytest.approx(water)
+    assert totals['energy'] == pytest.approx(energy)
+
+
+def test_concurrent_retries_into_partitions(partitioned_db, make_readings):
+    readings = make_readings('2025-01-20', 1000, freq='h')
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: partitioned_db.upsert_data(readings, batch_size=400), range(4)))
+
+    assert sum(result['inserted'] for result in results) == 1000
+    loaded = partitioned_db.load_partitioned()
+    totals = partitioned_db.get_ledger_totals()
+    assert len(loaded) == loaded['id'].nunique() == totals['readings'] == 1000
+    assert totals['water'] == pytest.approx(loaded['water_usage'].sum())